@@ -1,26 +1,77 @@
 # business_logic.py - Core Business Logic
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass
+import heapq
 import logging
+import math
+import operator
 import os
 import csv
 from datetime import datetime
 
+from config.search_limits import ACCOMMODATIONS_PER_SOURCE, BUDGET_TOLERANCE
+from utils.records import Flight, Hotel, AirbnbListing, Accommodation, Combination
+
 logger = logging.getLogger(__name__)
 
+# NumPy is installed with pandas (used by the city resolver); without it the scalar path is used
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+@dataclass
+class ScoringWeights:
+    """Multipliers for the two score components (1.0 = the standard 0-50 points each)"""
+    rating: float = 1.0  # Accommodation rating component
+    cost: float = 1.0  # Budget/cost component
+
 class TravelCombinationEngine:
     """Engine for creating intelligent travel combinations"""
     
+    BUDGET_TOLERANCE = BUDGET_TOLERANCE  # Combinations may exceed the budget by 20%
+    ACCOMMODATIONS_PER_SOURCE = ACCOMMODATIONS_PER_SOURCE  # Hotels / Airbnb listings combined per source
+    SCALAR_CANDIDATES = 3  # Flights/accommodations per list considered by the scalar strategy
+    CHUNK_SIZE = 1_000_000  # Combinations scored per vectorized block
+    STRATEGIES = ("branch_and_bound", "vectorized", "scalar")
+    
+    def __init__(
+        self,
+        max_combinations: int = 5,
+        strategy: str = "branch_and_bound",
+        weights: Optional[ScoringWeights] = None
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown combination strategy: {strategy}")
+        weights = weights or ScoringWeights()
+        if not all(math.isfinite(weight) and weight >= 0 for weight in (weights.rating, weights.cost)):
+            raise ValueError("Scoring weights must be finite and not negative")
+        if strategy == "vectorized" and not NUMPY_AVAILABLE:
+            logger.warning("NumPy is not installed - using the scalar combination strategy")
+            strategy = "scalar"
+        self.max_combinations = max_combinations
+        self.strategy = strategy
+        self.weights = weights
+    
     def create_combinations(
         self,
-        outbound_flights: List[Dict[str, Any]],
-        return_flights: List[Dict[str, Any]],
-        hotels: List[Dict[str, Any]],
-        airbnb_properties: List[Dict[str, Any]],
+        outbound_flights: List[Flight],
+        return_flights: List[Flight],
+        hotels: List[Hotel],
+        airbnb_properties: List[AirbnbListing],
         search_params: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Combination]:
         """
         Create optimized flight + accommodation combinations
         
+        The branch_and_bound and vectorized strategies consider every
+        outbound × return × accommodation combination of the flights and the
+        top ACCOMMODATIONS_PER_SOURCE hotels and Airbnb listings;
+        branch_and_bound only scores the ones that can still reach the top
+        (see _branch_and_bound_combinations). The scalar strategy combines
+        the top 3 of each list in Python.
+        
         Args:
             outbound_flights: List of outbound flight options
             return_flights: List of return flight options 
@@ -33,8 +84,10 @@ class TravelCombinationEngine:
         """
         logger.info("Creating travel combinations...")
         
+        limit = self.SCALAR_CANDIDATES if self.strategy == "scalar" else self.ACCOMMODATIONS_PER_SOURCE
+        
         # Prepare accommodation options
-        all_accommodations = self._prepare_accommodations(hotels, airbnb_properties)
+        all_accommodations = self._prepare_accommodations(hotels, airbnb_properties, limit)
         
         if not outbound_flights or not return_flights:
             logger.warning("No flights available for combinations")
@@ -44,98 +97,403 @@ class TravelCombinationEngine:
             logger.warning("No accommodations available for combinations") 
             return []
         
-        # Generate combinations
-        combinations = []
         nights = search_params['nights']
         persons = search_params['persons']
         budget = search_params.get('budget')
         
-        # Limit options for performance (top 3 of each)
-        for outbound in outbound_flights[:3]:
-            for return_flight in return_flights[:3]:
-                for accommodation in all_accommodations:
-                    
-                    combination = self._create_single_combination(
-                        outbound, return_flight, accommodation, 
-                        nights, persons, budget
-                    )
-                    
-                    if combination:  # Only add valid combinations
-                        combinations.append(combination)
-        
-        # Sort by score and return top combinations
-        combinations.sort(key=lambda x: x['score'], reverse=True)
-        top_combinations = combinations[:5]
+        if self.strategy == "branch_and_bound":
+            top_combinations = self._branch_and_bound_combinations(
+                outbound_flights, return_flights, all_accommodations, nights, persons, budget
+            )
+        elif self.strategy == "vectorized":
+            top_combinations = self._vectorized_combinations(
+                outbound_flights, return_flights, all_accommodations, nights, persons, budget
+            )
+        else:
+            top_combinations = self._scalar_combinations(
+                outbound_flights[:limit], return_flights[:limit], all_accommodations, nights, persons, budget
+            )
         
         logger.info(f"Created {len(top_combinations)} optimized combinations")
         return top_combinations
     
+    def pareto_frontier(
+        self,
+        outbound_flights: List[Flight],
+        return_flights: List[Flight],
+        hotels: List[Hotel],
+        airbnb_properties: List[AirbnbListing],
+        search_params: Dict[str, Any]
+    ) -> List[Combination]:
+        """
+        Pareto-optimal combinations over cost, rating, flight duration and stops
+        
+        A combination is on the frontier if no other combination is at least
+        as good on total cost (lower), accommodation rating (higher), total
+        flight minutes (lower) and stops (lower) and better on one of them.
+        Unknown durations count as the longest. The budget filter of
+        create_combinations applies.
+        
+        A flight that is dominated on (price, duration, stops) only forms
+        dominated pairs, a dominated pair only dominated combinations, and an
+        accommodation dominated on (cost, rating) likewise, so each stage is
+        reduced to its skyline before the next is built and the full
+        outbound × return × accommodation product is never enumerated.
+        
+        Args:
+            outbound_flights: List of outbound flight options
+            return_flights: List of return flight options
+            hotels: List of hotel options
+            airbnb_properties: List of Airbnb options
+            search_params: Search parameters including nights, persons, budget
+            
+        Returns:
+            The frontier sorted by total cost (cheapest first)
+        """
+        accommodations = self._prepare_accommodations(hotels, airbnb_properties, self.ACCOMMODATIONS_PER_SOURCE)
+        if not outbound_flights or not return_flights or not accommodations:
+            return []
+        
+        nights = search_params['nights']
+        persons = search_params['persons']
+        budget = search_params.get('budget')
+        max_cost = budget * self.BUDGET_TOLERANCE if budget else math.inf
+        
+        def flight_key(flight: Flight) -> Tuple[float, float, int]:
+            minutes = flight.duration_minutes if flight.duration_minutes is not None else math.inf
+            return (flight.price, minutes, flight.stops)
+        
+        outbound_keys = [flight_key(f) for f in outbound_flights]
+        return_keys = [flight_key(f) for f in return_flights]
+        
+        best_outbound = _skyline(outbound_keys)
+        best_return = _skyline(return_keys)
+        pairs = [(o, r) for o in best_outbound for r in best_return]
+        pair_keys = [
+            (
+                (outbound_keys[o][0] + return_keys[r][0]) * persons,
+                outbound_keys[o][1] + return_keys[r][1],
+                outbound_keys[o][2] + return_keys[r][2]
+            )
+            for o, r in pairs
+        ]
+        best_pairs = _skyline(pair_keys)
+        stays = _skyline([(a.price * nights, -a.rating) for a in accommodations])
+        
+        candidates = []
+        candidate_keys = []
+        for k in best_pairs:
+            o, r = pairs[k]
+            pair_cost, minutes, stops = pair_keys[k]
+            for a in stays:
+                total_cost = pair_cost + accommodations[a].price * nights
+                if total_cost > max_cost:
+                    continue
+                candidates.append((o, r, a))
+                candidate_keys.append((total_cost, -accommodations[a].rating, minutes, stops))
+        
+        frontier = _skyline(candidate_keys)
+        frontier.sort(key=lambda k: candidate_keys[k])
+        
+        logger.debug(
+            f"Pareto frontier: {len(frontier)} of {len(candidates)} candidates "
+            f"({len(best_pairs)} flight pairs x {len(stays)} accommodations)"
+        )
+        
+        return [
+            self._create_single_combination(
+                outbound_flights[o], return_flights[r], accommodations[a], nights, persons, budget
+            )
+            for o, r, a in (candidates[k] for k in frontier)
+        ]
+    
+    def _scalar_combinations(
+        self,
+        outbound_flights: List[Flight],
+        return_flights: List[Flight],
+        accommodations: List[Accommodation],
+        nights: int,
+        persons: int,
+        budget: Optional[int]
+    ) -> List[Combination]:
+        """
+        Score every combination in Python and materialize only the best ones
+        
+        Combinations are scored as (-score, total cost, outbound, return,
+        accommodation) tuples; heapq.nsmallest keeps the top max_combinations
+        of them and only those become Combination records. Equal scores are
+        ordered by lower total cost, then loop order, as in every strategy.
+        """
+        max_cost = budget * self.BUDGET_TOLERANCE if budget else None
+        stay_costs = [a.price * nights for a in accommodations]
+        ratings = [a.rating for a in accommodations]
+        
+        def scored():
+            for o, outbound in enumerate(outbound_flights):
+                for r, return_flight in enumerate(return_flights):
+                    flight_cost = (outbound.price + return_flight.price) * persons
+                    for a, stay_cost in enumerate(stay_costs):
+                        total_cost = flight_cost + stay_cost
+                        if max_cost is not None and total_cost > max_cost:
+                            continue  # Same budget filter as _create_single_combination
+                        score = self._calculate_combination_score(total_cost, ratings[a], budget)
+                        yield (-score, total_cost, o, r, a)
+        
+        return [
+            self._create_single_combination(
+                outbound_flights[o], return_flights[r], accommodations[a], nights, persons, budget
+            )
+            for _, _, o, r, a in heapq.nsmallest(self.max_combinations, scored())
+        ]
+    
+    def _vectorized_combinations(
+        self,
+        outbound_flights: List[Flight],
+        return_flights: List[Flight],
+        accommodations: List[Accommodation],
+        nights: int,
+        persons: int,
+        budget: Optional[int]
+    ) -> List[Combination]:
+        """
+        Score all combinations as NumPy array operations and return the best ones
+        
+        Total cost, the budget filter and the score are broadcast over
+        outbound × return × accommodation in blocks of CHUNK_SIZE. Each block
+        keeps its top max_combinations candidates (argpartition); the winners
+        are rebuilt with _create_single_combination, so the returned scores
+        and their order are exactly those of the scalar path.
+        """
+        outbound_prices = np.array([f.price for f in outbound_flights], dtype=np.float64)
+        return_prices = np.array([f.price for f in return_flights], dtype=np.float64)
+        accommodation_prices = np.array([a.price for a in accommodations], dtype=np.float64)
+        ratings = np.array([a.rating for a in accommodations], dtype=np.float64)
+        
+        flight_costs = (outbound_prices[:, None] + return_prices[None, :]) * persons  # (O, R)
+        accommodation_costs = accommodation_prices * nights  # (A,)
+        rating_scores = 0.0 + ratings * 10 * self.weights.rating  # Same operation order as _calculate_combination_score
+        
+        pair_count = len(return_flights) * len(accommodations)
+        block = max(1, self.CHUNK_SIZE // pair_count)  # Outbound flights per block
+        candidates: List[Tuple[float, float, int]] = []
+        
+        for start in range(0, len(outbound_flights), block):
+            totals = flight_costs[start:start + block, :, None] + accommodation_costs[None, None, :]
+            scores = self._score_block(totals, rating_scores, budget).ravel()
+            totals = totals.ravel()
+            for index in self._top_indices(scores, totals, self.max_combinations):
+                candidates.append((-scores[index], totals[index], start * pair_count + int(index)))
+        
+        # Best score first; ties by lower total cost, then loop order, as in the other strategies
+        candidates.sort()
+        
+        combinations = []
+        for _, _, flat_index in candidates[:self.max_combinations]:
+            o, rest = divmod(flat_index, pair_count)
+            r, a = divmod(rest, len(accommodations))
+            combination = self._create_single_combination(
+                outbound_flights[o], return_flights[r], accommodations[a], nights, persons, budget
+            )
+            if combination:
+                combinations.append(combination)
+        
+        combinations.sort(key=lambda x: x.score, reverse=True)
+        return combinations
+    
+    def _score_block(self, totals: "np.ndarray", rating_scores: "np.ndarray", budget: Optional[int]) -> "np.ndarray":
+        """Vectorized _calculate_combination_score; combinations over budget score -inf"""
+        if budget:
+            cost_scores = np.select(
+                [totals <= budget * 0.8, totals <= budget, totals <= budget * 1.1],
+                [50.0, 30.0, 15.0],
+                default=0.0
+            )
+        else:
+            cost_scores = 50 * (1 - np.minimum(totals / 2000, 1.0))
+        
+        scores = self._round_scores(rating_scores + cost_scores * self.weights.cost)
+        if budget:
+            scores[totals > budget * self.BUDGET_TOLERANCE] = -np.inf
+        return scores
+    
+    @staticmethod
+    def _round_scores(scores: "np.ndarray") -> "np.ndarray":
+        """
+        round(score, 1) exactly as Python rounds each float
+        
+        np.round scales by 10 in floating point, which turns values such as
+        132.45 (stored slightly below) into an exact .5 and rounds them up.
+        The rounding error of the scaling is recovered exactly (Dekker's
+        two-product with a Veltkamp split) and decides those halfway cases.
+        """
+        scaled = scores * 10
+        split = 134217729.0 * scores  # 2**27 + 1
+        high = split - (split - scores)
+        low = scores - high
+        error = (high * 10 - scaled) + low * 10  # scores * 10 == scaled + error, exactly
+        
+        floor = np.floor(scaled)
+        halfway = (scaled - floor) == 0.5
+        rounded = np.rint(scaled)  # Half to even, as Python on exact ties
+        rounded = np.where(halfway & (error > 0), floor + 1, rounded)
+        rounded = np.where(halfway & (error < 0), floor, rounded)
+        return rounded / 10
+    
+    @staticmethod
+    def _top_indices(scores: "np.ndarray", totals: "np.ndarray", count: int) -> "np.ndarray":
+        """Indices of the count highest finite scores (ties: lowest total cost, then lowest index)"""
+        if scores.size > count:
+            kth = -np.partition(-scores, count - 1)[count - 1]
+            better = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)
+            ties = ties[np.lexsort((ties, totals[ties]))][:count - len(better)]
+            indices = np.concatenate([better, ties])
+        else:
+            indices = np.arange(scores.size)
+        return indices[np.isfinite(scores[indices])]
+    
+    def _branch_and_bound_combinations(
+        self,
+        outbound_flights: List[Flight],
+        return_flights: List[Flight],
+        accommodations: List[Accommodation],
+        nights: int,
+        persons: int,
+        budget: Optional[int]
+    ) -> List[Combination]:
+        """
+        Best-first top-K search that only scores combinations able to reach the top
+        
+        The score never increases with total cost, so for one accommodation
+        its combinations with flight pairs in ascending cost are in descending
+        score order, and the cheapest pair gives an upper bound. Accommodations
+        are sorted by rating; a node for the remaining suffix is bounded by
+        its best rating and its cheapest accommodation, so whole suffixes are
+        never expanded once max_combinations results beat their bound.
+        Anything above budget * BUDGET_TOLERANCE is cut off as soon as its
+        cheapest possible cost exceeds it.
+        
+        Results are ordered by score, then lower total cost, then loop order.
+        """
+        pairs = _FlightPairs(outbound_flights, return_flights, persons)
+        cheapest_pair = pairs.cost(0)
+        max_cost = budget * self.BUDGET_TOLERANCE if budget else None
+        
+        # Highest rating first; suffix_min[i] = cheapest stay among by_rating[i:]
+        by_rating = sorted(range(len(accommodations)), key=lambda a: -accommodations[a].rating)
+        stay_costs = [accommodations[a].price * nights for a in by_rating]
+        suffix_min = stay_costs[:]
+        for i in range(len(suffix_min) - 2, -1, -1):
+            suffix_min[i] = min(suffix_min[i], suffix_min[i + 1])
+        
+        # Heap entries: (-score bound, cost lower bound, outbound, return, accommodation, node)
+        # node = ("suffix", i) bounds by_rating[i:], ("stay", i, k) is by_rating[i] with pair k.
+        # Children never sort before their parent, so exact entries pop in final order.
+        heap = []
+        
+        def push_suffix(i: int) -> None:
+            if i >= len(by_rating):
+                return
+            lowest_cost = cheapest_pair + suffix_min[i]
+            if max_cost is not None and lowest_cost > max_cost:
+                return  # Every combination in this suffix is over budget
+            bound = self._calculate_combination_score(lowest_cost, accommodations[by_rating[i]].rating, budget)
+            heapq.heappush(heap, (-bound, lowest_cost, -1, -1, -1, ("suffix", i)))
+        
+        def push_stay(i: int, k: int) -> None:
+            pair = pairs.get(k)
+            if pair is None:
+                return
+            pair_cost, o, r = pair
+            total_cost = pair_cost + stay_costs[i]
+            if max_cost is not None and total_cost > max_cost:
+                return  # Later pairs only cost more
+            score = self._calculate_combination_score(total_cost, accommodations[by_rating[i]].rating, budget)
+            heapq.heappush(heap, (-score, total_cost, o, r, by_rating[i], ("stay", i, k)))
+        
+        push_suffix(0)
+        winners = []
+        scored = 0
+        
+        while heap and len(winners) < self.max_combinations:
+            _, _, o, r, a, node = heapq.heappop(heap)
+            if node[0] == "suffix":
+                push_stay(node[1], 0)
+                push_suffix(node[1] + 1)
+                scored += 1
+            else:
+                winners.append((o, r, a))
+                push_stay(node[1], node[2] + 1)
+                scored += 1
+        
+        logger.debug(
+            f"Branch and bound expanded {scored} nodes of "
+            f"{len(outbound_flights) * len(return_flights) * len(accommodations)} combinations"
+        )
+        
+        return [
+            self._create_single_combination(
+                outbound_flights[o], return_flights[r], accommodations[a], nights, persons, budget
+            )
+            for o, r, a in winners
+        ]
+    
     def _prepare_accommodations(
         self, 
-        hotels: List[Dict[str, Any]], 
-        airbnb_properties: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Prepare and mark accommodation types"""
-        accommodations = []
-        
-        # Add top hotels
-        for hotel in hotels[:3]:
-            hotel_copy = hotel.copy()
-            hotel_copy['accommodation_type'] = 'hotel'
-            accommodations.append(hotel_copy)
-        
-        # Add top Airbnb properties
-        for airbnb in airbnb_properties[:3]:
-            airbnb_copy = airbnb.copy()
-            airbnb_copy['accommodation_type'] = 'airbnb'
-            accommodations.append(airbnb_copy)
-        
-        return accommodations
+        hotels: List[Hotel], 
+        airbnb_properties: List[AirbnbListing],
+        limit: Optional[int] = None
+    ) -> List[Accommodation]:
+        """Hotels followed by Airbnb properties, optionally only the top `limit` of each"""
+        return hotels[:limit] + airbnb_properties[:limit]
     
     def _create_single_combination(
         self,
-        outbound_flight: Dict[str, Any],
-        return_flight: Dict[str, Any],
-        accommodation: Dict[str, Any],
+        outbound_flight: Flight,
+        return_flight: Flight,
+        accommodation: Accommodation,
         nights: int,
         persons: int,
         budget: Optional[int]
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Combination]:
         """Create a single travel combination with cost calculation"""
         
         try:
             # Calculate flight costs (multiply by persons)
-            flight_cost = (outbound_flight['price'] + return_flight['price']) * persons
+            flight_cost = (outbound_flight.price + return_flight.price) * persons
             
             # Calculate accommodation cost
-            accommodation_cost = accommodation['price'] * nights
+            accommodation_cost = accommodation.price * nights
             
             # Calculate total cost
             total_cost = flight_cost + accommodation_cost
             
             # Budget filter (allow 20% over budget for flexibility)
-            if budget and total_cost > budget * 1.2:
+            if budget and total_cost > budget * self.BUDGET_TOLERANCE:
                 return None
             
             # Calculate score
             score = self._calculate_combination_score(
-                total_cost, accommodation['rating'], budget
+                total_cost, accommodation.rating, budget
             )
             
-            combination = {
-                'outbound_flight': outbound_flight,
-                'return_flight': return_flight,
-                'accommodation': accommodation,
-                'accommodation_type': accommodation['accommodation_type'],
-                'flight_cost': flight_cost,
-                'accommodation_cost': accommodation_cost,
-                'total_cost': total_cost,
-                'nights': nights,
-                'persons': persons,
-                'score': score,
-                'cost_per_person': total_cost / persons,
-                'cost_per_night': total_cost / nights if nights > 0 else total_cost
-            }
+            # References the flight and accommodation records instead of copying them
+            combination = Combination(
+                outbound_flight=outbound_flight,
+                return_flight=return_flight,
+                accommodation=accommodation,
+                accommodation_type=accommodation.accommodation_type,
+                flight_cost=flight_cost,
+                accommodation_cost=accommodation_cost,
+                total_cost=total_cost,
+                nights=nights,
+                persons=persons,
+                score=score,
+                cost_per_person=total_cost / persons,
+                cost_per_night=total_cost / nights if nights > 0 else total_cost,
+                flight_minutes=_total_minutes(outbound_flight, return_flight),
+                stops=outbound_flight.stops + return_flight.stops
+            )
             
             logger.debug(f"Created combination: €{total_cost} total (score: {score})")
             return combination
@@ -153,31 +511,98 @@ class TravelCombinationEngine:
         """
         Calculate combination score based on cost and quality
         
-        Higher score = better combination
+        Higher score = better combination; each component is scaled by self.weights
         """
         score = 0.0
         
         # Accommodation rating component (0-50 points)
-        score += accommodation_rating * 10
+        score += accommodation_rating * 10 * self.weights.rating
         
         # Budget/cost component (0-50 points)
         if budget:
             if total_cost <= budget * 0.8:  # Under 80% of budget
-                score += 50
+                cost_score = 50
             elif total_cost <= budget:  # Within budget
-                score += 30
+                cost_score = 30
             elif total_cost <= budget * 1.1:  # Up to 10% over budget
-                score += 15
+                cost_score = 15
             else:  # More than 10% over budget
-                score += 0
+                cost_score = 0
         else:
             # No budget specified - prefer lower prices
             # Normalize cost to 0-50 scale (assuming max reasonable cost ~2000)
             normalized_cost = min(total_cost / 2000, 1.0)
-            score += 50 * (1 - normalized_cost)  # Lower cost = higher score
+            cost_score = 50 * (1 - normalized_cost)  # Lower cost = higher score
+        
+        score += cost_score * self.weights.cost
         
         return round(score, 1)
 
+class _FlightPairs:
+    """
+    Outbound × return flight pairs generated lazily in ascending (cost, outbound, return) order
+    
+    Both lists are sorted by price once; pair (i, j) of the sorted lists is
+    followed by (i, j + 1) and, for j == 0, by (i + 1, 0), so only pairs
+    that were actually asked for (plus their frontier) are ever built.
+    """
+    
+    def __init__(self, outbound_flights: List[Flight], return_flights: List[Flight], persons: int):
+        self.persons = persons
+        self.outbound = sorted(range(len(outbound_flights)), key=lambda i: outbound_flights[i].price)
+        self.returns = sorted(range(len(return_flights)), key=lambda j: return_flights[j].price)
+        self.outbound_prices = [outbound_flights[i].price for i in self.outbound]
+        self.return_prices = [return_flights[j].price for j in self.returns]
+        self.pairs: List[Tuple[int, int, int]] = []  # (cost, outbound index, return index)
+        self._frontier = []
+        if self.outbound and self.returns:
+            self._push(0, 0)
+    
+    def cost(self, k: int) -> int:
+        return self.get(k)[0]
+    
+    def get(self, k: int) -> Optional[Tuple[int, int, int]]:
+        """The k-th cheapest pair, or None if there are fewer pairs"""
+        while len(self.pairs) <= k and self._frontier:
+            cost, o, r, i, j = heapq.heappop(self._frontier)
+            self.pairs.append((cost, o, r))
+            if j + 1 < len(self.returns):
+                self._push(i, j + 1)
+            if j == 0 and i + 1 < len(self.outbound):
+                self._push(i + 1, 0)
+        return self.pairs[k] if k < len(self.pairs) else None
+    
+    def _push(self, i: int, j: int) -> None:
+        cost = (self.outbound_prices[i] + self.return_prices[j]) * self.persons
+        heapq.heappush(self._frontier, (cost, self.outbound[i], self.returns[j], i, j))
+
+def _total_minutes(outbound_flight: Flight, return_flight: Flight) -> Optional[int]:
+    if outbound_flight.duration_minutes is None or return_flight.duration_minutes is None:
+        return None
+    return outbound_flight.duration_minutes + return_flight.duration_minutes
+
+def _skyline(keys: List[Tuple[float, ...]]) -> List[int]:
+    """
+    Indices of the points no other point dominates (every criterion minimized)
+    
+    Sort-filter skyline: after a lexicographic sort a point can only be
+    dominated by points before it, so each point is only compared with the
+    skyline found so far - O(n log n + n * s) for s skyline points instead
+    of all n² pairs. Identical points do not dominate each other and are
+    all kept.
+    """
+    window: List[Tuple[float, ...]] = []
+    indices: List[int] = []
+    for i in sorted(range(len(keys)), key=keys.__getitem__):
+        point = keys[i]
+        for other in window:
+            if all(map(operator.le, other, point)) and other != point:
+                break  # Dominated: no worse on every criterion and not identical
+        else:
+            window.append(point)
+            indices.append(i)
+    return indices
+
 # Export functionality
 async def export_search_results(
     search_results: Dict[str, Any], 
@@ -206,7 +631,7 @@ async def export_search_results(
         logger.error(f"Failed to export search results: {e}")
 
 async def _export_flights(
-    flights: Dict[str, List[Dict[str, Any]]], 
+    flights: Dict[str, List[Flight]], 
     search_params: Dict[str, Any], 
     search_id: str
 ) -> None:
@@ -275,7 +700,7 @@ async def _export_flights(
     logger.info(f"Exported flights to {flights_file}")
 
 async def _export_accommodations(
-    accommodations: Dict[str, List[Dict[str, Any]]], 
+    accommodations: Dict[str, List[Accommodation]], 
     search_params: Dict[str, Any], 
     search_id: str
 ) -> None:
@@ -292,7 +717,7 @@ async def _export_accommodations(
         await _export_airbnb(accommodations['airbnb'], search_params, search_id)
 
 async def _export_hotels(
-    hotels: List[Dict[str, Any]], 
+    hotels: List[Hotel], 
     search_params: Dict[str, Any], 
     search_id: str
 ) -> None:
@@ -340,7 +765,7 @@ async def _export_hotels(
     logger.info(f"Exported hotels to {hotels_file}")
 
 async def _export_airbnb(
-    airbnb_properties: List[Dict[str, Any]], 
+    airbnb_properties: List[AirbnbListing], 
     search_params: Dict[str, Any], 
     search_id: str
 ) -> None:
@@ -395,21 +820,21 @@ async def _export_airbnb(
     logger.info(f"Exported Airbnb properties to {airbnb_file}")
 
 # Utility functions for combination analysis
-def analyze_combination_statistics(combinations: List[Dict[str, Any]]) -> Dict[str, Any]:
+def analyze_combination_statistics(combinations: List[Combination]) -> Dict[str, Any]:
     """Analyze combination statistics for insights"""
     
     if not combinations:
         return {"error": "No combinations to analyze"}
     
     # Calculate statistics
-    total_costs = [c['total_cost'] for c in combinations]
-    flight_costs = [c['flight_cost'] for c in combinations]
-    accommodation_costs = [c['accommodation_cost'] for c in combinations]
-    scores = [c['score'] for c in combinations]
+    total_costs = [c.total_cost for c in combinations]
+    flight_costs = [c.flight_cost for c in combinations]
+    accommodation_costs = [c.accommodation_cost for c in combinations]
+    scores = [c.score for c in combinations]
     
     # Count accommodation types
-    hotel_count = sum(1 for c in combinations if c['accommodation_type'] == 'hotel')
-    airbnb_count = sum(1 for c in combinations if c['accommodation_type'] == 'airbnb')
+    hotel_count = sum(1 for c in combinations if c.accommodation_type == 'hotel')
+    airbnb_count = sum(1 for c in combinations if c.accommodation_type == 'airbnb')
     
     return {
         "total_combinations": len(combinations),
@@ -429,5 +854,5 @@ def analyze_combination_statistics(combinations: List[Dict[str, Any]]) -> Dict[s
             "hotels": hotel_count,
             "airbnb": airbnb_count
         },
-        "best_combination": combinations[0] if combinations else None
+        "best_combination": combinations[0].to_dict() if combinations else None
     }
\ No newline at end of file
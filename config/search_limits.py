@@ -0,0 +1,11 @@
+# config/search_limits.py - Limits Shared by the Actor Inputs and the Combination Engine
+"""
+Constants that both the services (actor inputs) and business_logic
+(combination engine) depend on. They live here so neither layer imports
+the other for them.
+"""
+
+BUDGET_TOLERANCE = 1.2  # Combinations may exceed the budget by 20%
+
+# Hotels and Airbnb listings per source the combination engine combines (best value first)
+ACCOMMODATIONS_PER_SOURCE = 30
@@ -1,6 +1,6 @@
 # config/settings.py - Centralized Configuration Management
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict
 import logging
 import os
 
@@ -12,6 +12,20 @@ class Settings(BaseSettings):
     x_rapidapi_key: Optional[str] = None  # For RapidAPI services
     x_rapidapi_host: Optional[str] = None  # For RapidAPI services
     
+    # Upstream base URLs (point at utils/standin.py for offline load tests)
+    apify_api_url: str = "https://api.apify.com/v2"
+    reddit_base_url: str = "https://www.reddit.com"
+    nominatim_base_url: str = "https://nominatim.openstreetmap.org"
+    
+    # City resolution: offline gazetteer first, Nominatim as rate-limited fallback
+    gazetteer_geonames_path: Optional[str] = None  # GeoNames dump, e.g. config/cities15000.txt
+    gazetteer_min_population: int = 0
+    nominatim_min_interval: float = 1.0  # Seconds between Nominatim calls per worker (usage policy: 1 req/s)
+    nominatim_max_wait: float = 5.0  # Skip geocoding rather than queue longer for a Nominatim slot
+    city_cache_ttl: int = 604800  # Geocoded resolutions: a week (airports rarely move)
+    city_cache_negative_ttl: int = 3600  # Inputs Nominatim could not place: retried after an hour
+    city_cache_max_entries: int = 4096
+    
     # Application Configuration
     debug: bool = False
     host: str = "0.0.0.0"
@@ -23,11 +37,45 @@ class Settings(BaseSettings):
     max_retry_delay: float = 60.0
     api_timeout: float = 300.0
     
+    # HTTP Connection Pool Configuration (shared per process)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection stays open
+    http2_enabled: bool = True
+    
+    # Share one upstream run between concurrent identical actor calls
+    coalesce_requests: bool = True
+    
+    # Per-actor adaptive concurrency limit (AIMD: grows on success, halves on 429/5xx/timeout)
+    actor_concurrency_enabled: bool = True
+    actor_concurrency_initial: int = 4
+    actor_concurrency_min: int = 1
+    actor_concurrency_max: int = 32
+    
+    # Circuit breakers per actor and per external host (Apify, Reddit, Nominatim)
+    circuit_breaker_enabled: bool = True
+    circuit_failure_threshold: int = 5  # Consecutive failures before failing fast
+    circuit_recovery_timeout: float = 30.0  # Seconds before a probe call is let through
+    
+    # Actor Run Mode: "sync" (run-sync-get-dataset-items) or "async" (start run, poll, page dataset)
+    apify_run_mode: str = "sync"
+    apify_dataset_page_size: int = 50
+    apify_poll_interval: float = 2.0
+    apify_async_run_timeout: float = 600.0
+    
+    # Decode sync-mode responses incrementally and stop reading once parsers have enough
+    # (streamed calls are not coalesced with concurrent identical calls)
+    apify_stream_decode: bool = False
+    
     # Search Configuration  
+    batch_flight_legs: bool = True  # Request outbound + return in one Skyscanner run
+    search_deadline: float = 90.0  # Latency budget of /smart-search; slower sources return partial results
+    search_deadline_grace: float = 2.0  # Extra seconds for services to hand back partial results
     max_flights_per_search: int = 50
     max_hotels_per_search: int = 200
     max_airbnb_per_search: int = 100
     max_combinations: int = 5
+    combination_strategy: str = "branch_and_bound"  # branch_and_bound, vectorized (NumPy) or scalar (top 3 only)
     
     # Logging Configuration
     log_level: str = "INFO"
@@ -38,9 +86,23 @@ class Settings(BaseSettings):
     output_directory: str = "output"
     export_csv: bool = True
     
-    # Cache Configuration (future)
+    # Cache Configuration (actor responses: memory LRU + SQLite on disk)
+    # Off by default. When enabled, cache_directory also holds the search results, city
+    # resolutions, learned place names and airport snapshot, so workers and restarts share them
     cache_enabled: bool = False
-    cache_ttl: int = 300  # 5 minutes
+    cache_ttl: int = 300  # Default TTL: 5 minutes
+    cache_stale_ttl: int = 600  # Serve expired entries this long while refreshing in background
+    cache_fallback_ttl: int = 86400  # Keep dead entries this long to serve while an upstream is down
+    cache_actor_ttls: Dict[str, int] = {
+        "jupri~skyscanner-flight": 300,  # Flight prices change quickly
+        "voyager~fast-booking-scraper": 1800,
+        "tri_angle~new-fast-airbnb-scraper": 1800
+    }
+    cache_directory: str = "cache"  # Shared by all workers on the host
+    cache_memory_max_entries: int = 256
+    cache_memory_max_mb: int = 64
+    cache_disk_max_mb: int = 512
+    search_result_ttl: int = 1800  # Seconds a search can be refined (/api/search/{id}/refine) without new actor runs
     
     class Config:
         env_file = ".env"
@@ -79,6 +141,8 @@ class Settings(BaseSettings):
     def ensure_directories(self) -> None:
         """Ensure required directories exist"""
         os.makedirs(self.output_directory, exist_ok=True)
+        if self.cache_enabled:
+            os.makedirs(self.cache_directory, exist_ok=True)
     
     @property
     def is_production(self) -> bool:
@@ -9,17 +9,26 @@ from fastapi.templating import Jinja2Templates
 from typing import Optional, Dict, Any, Tuple
 import asyncio
 import logging
+import time
 import httpx
 from datetime import datetime
 
 # Import refactored services
 from config.settings import settings
-from utils.api_client import create_apify_client, ApiClientError
+from utils.api_client import create_apify_client, ApiClientError, PoolConfig, AsyncRunConfig
+from utils.concurrency import ConcurrencyConfig
+from utils.circuit_breaker import CircuitBreakerRegistry, CircuitBreakerConfig
+from utils.deadline import Deadline
+from utils.cache import TwoTierCache, CacheConfig
+from utils.gazetteer import Gazetteer
+from utils.rate_limiter import RateLimiter
 from services.flight_service import FlightService
 from services.hotel_service import AccommodationService
+from services.search_filters import SearchFilters
 from services.city_resolver import CityResolverService
-from services.crowd_sourced_service import SimpleCrowdService, router as crowd_router
-from business_logic import TravelCombinationEngine, export_search_results
+from services.crowd_sourced_service import SimpleCrowdService, get_crowd_service, router as crowd_router
+from services.search_results import SearchResultStore
+from business_logic import TravelCombinationEngine, ScoringWeights, export_search_results
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -36,22 +45,116 @@ app = FastAPI(
 templates = Jinja2Templates(directory="templates")
 
 # Initialize services
+# Circuit breakers shared by the Apify client, crowd tips and city resolution
+circuit_breakers = CircuitBreakerRegistry(
+    CircuitBreakerConfig(
+        failure_threshold=settings.circuit_failure_threshold,
+        recovery_timeout=settings.circuit_recovery_timeout
+    )
+) if settings.circuit_breaker_enabled else None
+
+response_cache = TwoTierCache(
+    CacheConfig(
+        default_ttl=settings.cache_ttl,
+        stale_ttl=settings.cache_stale_ttl,
+        fallback_ttl=settings.cache_fallback_ttl,
+        memory_max_entries=settings.cache_memory_max_entries,
+        memory_max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+        disk_path=os.path.join(settings.cache_directory, "actor_responses.sqlite3"),
+        disk_max_bytes=settings.cache_disk_max_mb * 1024 * 1024
+    ),
+    namespace="actor_responses"
+) if settings.cache_enabled else None
+
 api_client = create_apify_client(
     api_token=settings.apify_token,
+    api_url=settings.apify_api_url,
     max_retries=settings.max_retries,
     base_delay=settings.base_retry_delay,
     max_delay=settings.max_retry_delay,
-    timeout=settings.api_timeout
+    timeout=settings.api_timeout,
+    pool_config=PoolConfig(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+        http2=settings.http2_enabled
+    ),
+    coalesce_requests=settings.coalesce_requests,
+    cache=response_cache,
+    cache_ttls=settings.cache_actor_ttls,
+    run_config=AsyncRunConfig(
+        page_size=settings.apify_dataset_page_size,
+        poll_interval=settings.apify_poll_interval,
+        run_timeout=settings.apify_async_run_timeout
+    ) if settings.apify_run_mode == "async" else None,
+    stream_decode=settings.apify_stream_decode,
+    concurrency_config=ConcurrencyConfig(
+        initial_limit=settings.actor_concurrency_initial,
+        min_limit=settings.actor_concurrency_min,
+        max_limit=settings.actor_concurrency_max
+    ) if settings.actor_concurrency_enabled else None,
+    breakers=circuit_breakers
 )
 
-flight_service = FlightService(api_client)
+flight_service = FlightService(api_client, batch_legs=settings.batch_flight_legs)
 accommodation_service = AccommodationService(api_client)
-combination_engine = TravelCombinationEngine()
-city_resolver = CityResolverService()
-crowd_service = SimpleCrowdService()  # ✅ NEW: Crowd-sourced service
+combination_engine = TravelCombinationEngine(
+    max_combinations=settings.max_combinations,
+    strategy=settings.combination_strategy
+)
+# Parsed results of recent searches, re-ranked by /api/search/{id}/refine
+search_result_store = SearchResultStore(
+    TwoTierCache(
+        CacheConfig(
+            default_ttl=settings.search_result_ttl,
+            stale_ttl=0,
+            fallback_ttl=0,
+            memory_max_entries=settings.cache_memory_max_entries,
+            memory_max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+            disk_path=os.path.join(settings.cache_directory, "search_results.sqlite3") if settings.cache_enabled else None,
+            disk_max_bytes=settings.cache_disk_max_mb * 1024 * 1024
+        ),
+        namespace="search_results"
+    ),
+    ttl=settings.search_result_ttl
+)
+# Offline place names for city resolution (Nominatim answers are learned and shared by the workers)
+gazetteer = Gazetteer(
+    learned_path=os.path.join(settings.cache_directory, "gazetteer_learned.tsv") if settings.cache_enabled else None
+)
+if settings.gazetteer_geonames_path:
+    try:
+        gazetteer.load_geonames(settings.gazetteer_geonames_path, settings.gazetteer_min_population)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load GeoNames gazetteer {settings.gazetteer_geonames_path}: {e}")
+nominatim_limiter = RateLimiter("nominatim", interval=settings.nominatim_min_interval, max_wait=settings.nominatim_max_wait)
+city_resolver = CityResolverService(
+    breakers=circuit_breakers,
+    nominatim_url=settings.nominatim_base_url,
+    snapshot_path=os.path.join(settings.cache_directory, "airports.snapshot") if settings.cache_enabled else None,
+    gazetteer=gazetteer,
+    nominatim_limiter=nominatim_limiter,
+    cache=TwoTierCache(
+        CacheConfig(
+            default_ttl=settings.city_cache_ttl,
+            stale_ttl=0,
+            fallback_ttl=0,
+            memory_max_entries=settings.city_cache_max_entries,
+            memory_max_bytes=settings.cache_memory_max_mb * 1024 * 1024,
+            disk_path=os.path.join(settings.cache_directory, "city_resolution.sqlite3") if settings.cache_enabled else None,
+            disk_max_bytes=settings.cache_disk_max_mb * 1024 * 1024
+        ),
+        namespace="city_resolution"
+    ),
+    negative_ttl=settings.city_cache_negative_ttl
+)
+gazetteer.build_search_indexes()  # Autocomplete and suggestions over GeoNames and airport municipalities
+nominatim_client = httpx.AsyncClient(timeout=5.0)  # Autocomplete fallback, kept open for keep-alive
+crowd_service = SimpleCrowdService(breakers=circuit_breakers, base_url=settings.reddit_base_url)  # ✅ NEW: Crowd-sourced service
 
 # Include crowd-sourced router
 app.include_router(crowd_router, prefix="/api", tags=["crowd-sourced"])  # ✅ NEW
+app.dependency_overrides[get_crowd_service] = lambda: crowd_service
 
 # =============================================================================
 # MAIN ROUTES
@@ -67,11 +170,14 @@ async def health_check():
     """Application health check"""
     try:
         api_health = await api_client.health_check()
+        open_circuits = circuit_breakers.open_circuits() if circuit_breakers else []
         return {
-            "status": "healthy",
+            "status": "degraded" if open_circuits else "healthy",
             "version": "2.1.0",
             "debug": settings.debug,
             "api_status": api_health["status"],
+            "open_circuits": open_circuits,
+            "circuit_breakers": circuit_breakers.get_stats() if circuit_breakers else {},
             "services": {
                 "flight_service": "active",
                 "accommodation_service": "active", 
@@ -98,6 +204,7 @@ async def smart_search(
     Smart travel search with crowd-sourced community tips
     """
     search_start_time = datetime.now()
+    deadline = Deadline(settings.search_deadline)
     
     try:
         # Step 1: Validate and process inputs
@@ -112,7 +219,7 @@ async def smart_search(
         
         # Step 3: Perform all searches concurrently (including crowd tips)
         search_results = await _perform_all_searches(
-            origin_info, dest_info, search_params
+            origin_info, dest_info, search_params, deadline
         )
         
         # Step 4: Create intelligent combinations
@@ -124,6 +231,18 @@ async def smart_search(
             search_params=search_params
         )
         
+        # Cost / rating / flight time / stops trade-offs for the sliders on the results page
+        pareto_frontier = combination_engine.pareto_frontier(
+            outbound_flights=search_results['flights']['outbound'],
+            return_flights=search_results['flights']['return'],
+            hotels=search_results['accommodations']['hotels'],
+            airbnb_properties=search_results['accommodations']['airbnb'],
+            search_params=search_params
+        )
+        
+        # Keep the parsed results so budget, weights and filters can be changed without a new search
+        search_id = await search_result_store.save(search_params, search_results)
+        
         # Step 5: Export results (if enabled)
         export_data = None
         if settings.export_csv:
@@ -136,6 +255,8 @@ async def smart_search(
         return templates.TemplateResponse("results.html", {
             "request": request,
             "combinations": combinations,
+            "pareto_frontier": [combination.to_dict() for combination in pareto_frontier],
+            "search_id": search_id,
             "outbound_flights": search_results['flights']['outbound'],
             "return_flights": search_results['flights']['return'],
             "hotels": search_results['accommodations']['hotels'],
@@ -154,6 +275,7 @@ async def smart_search(
             "budget": search_params['budget'],
             "persons": search_params['persons'],
             "search_time": round(search_time, 2),
+            "partial_results": search_results['partial'],
             "export_data": export_data,
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M")
         })
@@ -189,8 +311,8 @@ async def smart_search(
 @app.get("/api/cities/autocomplete")
 async def city_autocomplete(q: str = ""):
     """
-    Live city autocomplete using OpenStreetMap Nominatim
-    Enhanced with better filtering and performance
+    Live city autocomplete from the offline gazetteer's prefix index
+    Falls back to OpenStreetMap Nominatim only for names it does not know
     """
     if not q or len(q) < 2:
         return {"suggestions": []}
@@ -198,8 +320,10 @@ async def city_autocomplete(q: str = ""):
     try:
         logger.info(f"Autocomplete search: '{q}'")
         
-        # Call Nominatim API with optimized parameters
-        suggestions = await _fetch_city_suggestions(q)
+        # In-process prefix index first (no network); Nominatim only without a local match
+        suggestions = _local_city_suggestions(q)
+        if not suggestions:
+            suggestions = await _fetch_city_suggestions(q)
         
         logger.info(f"Found {len(suggestions)} city suggestions for '{q}'")
         return {"suggestions": suggestions}
@@ -242,6 +366,80 @@ async def resolve_city_to_airport(city: str = ""):
         logger.error(f"City resolution error: {e}")
         return {"error": "Resolution failed"}
 
+# Orderings of the refined combinations (the engine always selects by score)
+REFINE_SORT_KEYS = {
+    "score": lambda c: -c.score,
+    "price": lambda c: c.total_cost,
+    "rating": lambda c: -c.accommodation.rating
+}
+
+@app.post("/api/search/{search_id}/refine")
+async def refine_search(
+    search_id: str,
+    budget: Optional[str] = Form(None),
+    accommodation_type: str = Form("all"),
+    sort: str = Form("score"),
+    rating_weight: float = Form(1.0),
+    cost_weight: float = Form(1.0)
+):
+    """
+    Re-rank a stored search with a new budget, scoring weights or accommodation type
+    
+    Only the combination engine runs again, on the flights and accommodations
+    stored by /smart-search - no city resolution and no actor runs. An empty
+    budget means no budget.
+    """
+    refine_start = time.perf_counter()
+    
+    stored = await search_result_store.load(search_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Search expired or not found - please search again")
+    
+    if accommodation_type not in ("all", "hotel", "airbnb"):
+        raise HTTPException(status_code=400, detail=f"Unknown accommodation type: {accommodation_type}")
+    if sort not in REFINE_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort order: {sort}")
+    
+    try:
+        engine = TravelCombinationEngine(
+            max_combinations=settings.max_combinations,
+            strategy=settings.combination_strategy,
+            weights=ScoringWeights(rating=rating_weight, cost=cost_weight)
+        )
+        search_params = {**stored.search_params, 'budget': _parse_budget(budget)}
+    except (ValidationError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    candidates = {
+        'outbound_flights': stored.outbound_flights,
+        'return_flights': stored.return_flights,
+        'hotels': stored.hotels if accommodation_type != "airbnb" else [],
+        'airbnb_properties': stored.airbnb_properties if accommodation_type != "hotel" else [],
+        'search_params': search_params
+    }
+    combinations = sorted(engine.create_combinations(**candidates), key=REFINE_SORT_KEYS[sort])
+    pareto_frontier = engine.pareto_frontier(**candidates)
+    
+    return {
+        "search_id": search_id,
+        "budget": search_params['budget'],
+        "combinations": [combination.to_dict() for combination in combinations],
+        "pareto_frontier": [combination.to_dict() for combination in pareto_frontier],
+        "refine_time_ms": round((time.perf_counter() - refine_start) * 1000, 2)
+    }
+
+@app.get("/api/metrics")
+async def metrics():
+    """
+    Runtime metrics for upstream calls (coalesced runs, cache, per-actor concurrency limits, Nominatim rate limit,
+    city resolution cache)
+    """
+    return {
+        "apify": api_client.get_stats(),
+        "nominatim": nominatim_limiter.get_stats(),
+        "city_resolution": city_resolver.get_cache_stats()["cache"]
+    }
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
@@ -278,26 +476,28 @@ async def _validate_search_params(
     except ValueError:
         raise ValidationError("Invalid date format. Use YYYY-MM-DD")
     
-    # Process budget
-    budget_int = None
-    if budget and budget.strip():
-        try:
-            budget_int = int(budget)
-            if budget_int < 50:
-                raise ValidationError("Budget must be at least €50")
-        except ValueError:
-            raise ValidationError("Budget must be a valid number")
-    
     return {
         'origin': origin.strip(),
         'destination': destination.strip(),
         'departure': departure,
         'return_date': return_date,
-        'budget': budget_int,
+        'budget': _parse_budget(budget),
         'persons': persons,
         'nights': nights
     }
 
+def _parse_budget(budget: Optional[str]) -> Optional[int]:
+    """Budget form value as whole euros, None if empty"""
+    budget_int = None
+    if budget and budget.strip():
+        try:
+            budget_int = int(budget)
+            if budget_int < 50:
+                raise ValidationError("Budget must be at least €50")
+        except ValueError:
+            raise ValidationError("Budget must be a valid number")
+    return budget_int
+
 async def _resolve_cities(origin: str, destination: str) -> Tuple[Dict[str, str], Dict[str, str]]:
     """Resolve city names to IATA codes"""
     
@@ -328,10 +528,15 @@ async def _resolve_cities(origin: str, destination: str) -> Tuple[Dict[str, str]
 async def _perform_all_searches(
     origin_info: Dict[str, str], 
     dest_info: Dict[str, str], 
-    search_params: Dict[str, Any]
+    search_params: Dict[str, Any],
+    deadline: Optional[Deadline] = None
 ) -> Dict[str, Any]:
     """
     Perform all searches concurrently: flights, accommodations, and crowd tips
+    
+    With a deadline, every service gets the remaining budget and returns what
+    it has by then; a service that still hasn't answered after the grace
+    period contributes empty results.
     """
     
     logger.info("Starting concurrent search for flights, accommodations, and community tips")
@@ -342,7 +547,8 @@ async def _perform_all_searches(
         destination=dest_info['iata'],
         departure_date=search_params['departure'],
         return_date=search_params['return_date'],
-        max_results_per_direction=settings.max_flights_per_search // 2
+        max_results_per_direction=settings.max_flights_per_search // 2,
+        deadline=deadline
     )
     
     accommodation_task = accommodation_service.search_all_accommodations(
@@ -351,11 +557,18 @@ async def _perform_all_searches(
         checkout=search_params['return_date'],
         guests=search_params['persons'],
         max_hotels=settings.max_hotels_per_search,
-        max_airbnb=settings.max_airbnb_per_search
+        max_airbnb=settings.max_airbnb_per_search,
+        deadline=deadline,
+        filters=SearchFilters.from_search_params(search_params)
     )
     
     # ✅ NEW: Community tips task
-    crowd_tips_task = crowd_service.get_travel_tips(dest_info['city'])
+    crowd_tips_task = crowd_service.get_travel_tips(dest_info['city'], deadline)
+    
+    if deadline is not None:
+        flight_task = _within_deadline(flight_task, deadline, "Flight search")
+        accommodation_task = _within_deadline(accommodation_task, deadline, "Accommodation search")
+        crowd_tips_task = _within_deadline(crowd_tips_task, deadline, "Crowd tips search")
     
     # Execute all tasks concurrently
     try:
@@ -367,15 +580,15 @@ async def _perform_all_searches(
         )
         
         # Handle exceptions for each service
-        if isinstance(flights, Exception):
+        if isinstance(flights, Exception) or flights is None:
             logger.error(f"Flight search failed: {flights}")
             flights = {'outbound': [], 'return': []}
         
-        if isinstance(accommodations, Exception):
+        if isinstance(accommodations, Exception) or accommodations is None:
             logger.error(f"Accommodation search failed: {accommodations}")
             accommodations = {'hotels': [], 'airbnb': []}
         
-        if isinstance(crowd_tips, Exception):
+        if isinstance(crowd_tips, Exception) or crowd_tips is None:
             logger.error(f"Crowd tips search failed: {crowd_tips}")
             crowd_tips = []
         
@@ -391,22 +604,51 @@ async def _perform_all_searches(
         
         logger.info(f"Search completed: {total_flights} flights, {total_accommodations} accommodations, {len(crowd_tips)} community tips")
         
+        partial = deadline is not None and deadline.expired
+        if partial:
+            logger.warning(f"Search deadline of {deadline.budget}s reached - returning partial results")
+        
         return {
             'flights': flights,
             'accommodations': accommodations,
-            'crowd_tips': crowd_tips  # ✅ NEW: Include community tips
+            'crowd_tips': crowd_tips,  # ✅ NEW: Include community tips
+            'partial': partial
         }
         
     except Exception as e:
         logger.error(f"Concurrent search failed: {e}")
         raise
 
+async def _within_deadline(coro, deadline: Deadline, label: str):
+    """Await a service call, giving up (None) once the deadline plus grace has passed"""
+    try:
+        return await deadline.wait_for(coro, grace=settings.search_deadline_grace)
+    except asyncio.TimeoutError:
+        logger.warning(f"{label} did not finish within the {deadline.budget}s search deadline")
+        return None
+
+def _local_city_suggestions(query: str) -> list:
+    """City suggestions from the gazetteer, in the format of _process_city_suggestions"""
+    return [
+        {
+            "city": place.name,
+            "country": place.country,
+            "country_code": place.country,
+            "display_name": place.display_name,
+            "lat": place.latitude,
+            "lon": place.longitude,
+            "importance": place.importance,
+            "type": "city"
+        }
+        for place in gazetteer.complete(query, limit=6)
+    ]
+
 async def _fetch_city_suggestions(query: str) -> list:
     """
     Fetch city suggestions from OpenStreetMap Nominatim
     Optimized and refactored for better maintainability
     """
-    url = "https://nominatim.openstreetmap.org/search"
+    url = f"{settings.nominatim_base_url.rstrip('/')}/search"
     params = {
         "q": query,
         "format": "json",
@@ -420,21 +662,38 @@ async def _fetch_city_suggestions(query: str) -> list:
         "User-Agent": "HolidayEngine/2.1 (travel-search-platform)"
     }
     
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        response = await client.get(url, params=params, headers=headers)
-        
-        if response.status_code != 200:
-            logger.warning(f"Nominatim API error: {response.status_code}")
-            return []
-        
-        data = response.json()
-        
-        # Debug logging
-        logger.info(f"DEBUG: Raw Nominatim data for '{query}':")
-        for i, item in enumerate(data[:3]):
-            logger.info(f"  Result {i}: type='{item.get('type')}', class='{item.get('class')}', name='{item.get('name')}'")
-        
-        return _process_city_suggestions(data)
+    breaker = circuit_breakers.get("nominatim") if circuit_breakers else None
+    if breaker is not None and not breaker.allow_request():
+        logger.warning(f"Nominatim circuit open - no suggestions for '{query}'")
+        return []
+    
+    # Nominatim usage policy: at most one request per second (shared with city resolution)
+    if not await nominatim_limiter.acquire(max_wait=settings.nominatim_min_interval):
+        return []
+    
+    try:
+        response = await nominatim_client.get(url, params=params, headers=headers)
+    except httpx.RequestError:
+        if breaker is not None:
+            breaker.record_failure()
+        raise
+    
+    if response.status_code != 200:
+        logger.warning(f"Nominatim API error: {response.status_code}")
+        if breaker is not None and (response.status_code >= 500 or response.status_code == 429):
+            breaker.record_failure()
+        return []
+    
+    if breaker is not None:
+        breaker.record_success()
+    data = response.json()
+    
+    # Debug logging
+    logger.info(f"DEBUG: Raw Nominatim data for '{query}':")
+    for i, item in enumerate(data[:3]):
+        logger.info(f"  Result {i}: type='{item.get('type')}', class='{item.get('class')}', name='{item.get('name')}'")
+    
+    return _process_city_suggestions(data)
 
 def _process_city_suggestions(data: list) -> list:
     """Process raw Nominatim data into clean city suggestions"""
@@ -572,6 +831,12 @@ async def startup_event():
     logger.info(f"Debug mode: {settings.debug}")
     logger.info(f"API token configured: {'Yes' if settings.apify_token else 'No'}")
     
+    # Open the shared Apify connection pool
+    await api_client.start()
+    
+    # Resolutions geocoded before the restart (or by other workers)
+    await city_resolver.warm_cache()
+    
     # Test API connectivity
     try:
         health = await api_client.health_check()
@@ -590,6 +855,15 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown tasks"""
     logger.info("Shutting down Holiday Engine v2.1")
+    
+    # Release pooled keep-alive connections
+    await api_client.close()
+    await nominatim_client.aclose()
+    
+    if response_cache is not None:
+        response_cache.close()
+    search_result_store.cache.close()
+    city_resolver.cache.close()
 
 # =============================================================================
 # MAIN EXECUTION
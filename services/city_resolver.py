@@ -2,22 +2,61 @@
 from typing import Optional, Tuple, List, Dict, Any
 import asyncio
 import logging
-import pandas as pd
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
-from difflib import SequenceMatcher
+from geopy.exc import GeocoderQueryError, GeocoderServiceError
 import os
 
+from utils.airport_snapshot import PASSENGER_TYPES, AirportTable, load_airport_table
+from utils.cache import CacheConfig, TwoTierCache
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from utils.fuzzy_index import similarity
+from utils.gazetteer import Gazetteer
+from utils.rate_limiter import RateLimiter
+from utils.spatial_index import SphericalIndex
+
 logger = logging.getLogger(__name__)
 
+# Great-circle and WGS84 geodesic distances differ by less than 0.6%; candidates
+# within this factor of the spherical nearest are refined with geodesic()
+GEODESIC_MARGIN = 1.01
+
 class CityResolverService:
     """Service for resolving city names to IATA airport codes using real airport data"""
     
-    def __init__(self):
-        self.cache = {}  # Simple in-memory cache
-        self.airports_df = None
+    def __init__(
+        self,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        nominatim_url: str = "https://nominatim.openstreetmap.org",
+        snapshot_path: Optional[str] = None,
+        gazetteer: Optional[Gazetteer] = None,
+        nominatim_limiter: Optional[RateLimiter] = None,
+        cache: Optional[TwoTierCache] = None,
+        negative_ttl: float = 3600.0
+    ):
+        # Geocoded resolutions (with a disk tier: kept across restarts and shared by the workers)
+        self.cache = cache if cache is not None else TwoTierCache(
+            CacheConfig(default_ttl=7 * 86400, stale_ttl=0, fallback_ttl=0, memory_max_entries=4096),
+            namespace="city_resolution"
+        )
+        self.negative_ttl = negative_ttl  # Seconds an unresolvable input is remembered
+        self.negative_hits = 0
+        self.snapshot_path = snapshot_path  # Compiled airport database (None = parse the CSV in memory)
+        self.airports: Optional[AirportTable] = None
+        self._airports_df = None
+        self.airport_index: Optional[SphericalIndex] = None  # Rows of airports by position
+        self._by_municipality: Dict[str, List[int]] = {}  # Normalized municipality -> positions, largest first
+        self._by_type: Dict[str, List[int]] = {}  # Airport type -> positions
         self.common_cities = self._load_common_cities()
-        self.geolocator = Nominatim(user_agent="HolidayEngine/2.0")
+        
+        # geopy takes scheme and domain (which may include a path prefix) separately
+        scheme, _, domain = nominatim_url.rstrip("/").partition("://")
+        self.geolocator = Nominatim(user_agent="HolidayEngine/2.0", domain=domain, scheme=scheme)
+        # Shared Nominatim circuit breaker (None = always call Nominatim)
+        self.breaker: Optional[CircuitBreaker] = breakers.get("nominatim") if breakers else None
+        # Places resolved in-process; Nominatim is only the (rate-limited) fallback
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer()
+        self.nominatim_limiter = nominatim_limiter or RateLimiter("nominatim", interval=1.0, max_wait=5.0)
         
         # Load airports on initialization
         self._load_airports()
@@ -40,7 +79,7 @@ class CityResolverService:
                     break
             
             # DEBUG: Check if file exists
-            if not airports_file:
+            if not airports_file and not (self.snapshot_path and os.path.exists(self.snapshot_path)):
                 logger.error(f"airports.csv not found in any of these locations:")
                 for path in possible_paths:
                     abs_path = os.path.abspath(path)
@@ -52,40 +91,111 @@ class CityResolverService:
                     logger.error(f"Files in config/: {os.listdir('config')}")
                 return
             
-            logger.info(f"Loading airports database from: {os.path.abspath(airports_file)}")
-            
-            # Load all airports
-            self.airports_df = pd.read_csv(airports_file)
-            logger.info(f"Loaded {len(self.airports_df)} total airports from CSV")
-            
-            # Filter to passenger airports only
-            passenger_types = ['large_airport', 'medium_airport', 'small_airport']
-            before_filter = len(self.airports_df)
+            if airports_file:
+                logger.info(f"Loading airports database from: {os.path.abspath(airports_file)}")
             
-            self.airports_df = self.airports_df[
-                self.airports_df['type'].isin(passenger_types) &
-                self.airports_df['scheduled_service'].eq('yes') &
-                self.airports_df['iata_code'].notna()  # Must have IATA code
-            ].copy()
-            
-            # Clean up data
-            self.airports_df['iata_code'] = self.airports_df['iata_code'].str.upper()
-            
-            after_filter = len(self.airports_df)
-            logger.info(f"Filtered from {before_filter} to {after_filter} passenger airports with IATA codes")
+            # Snapshot if current, otherwise (re)compiled from the CSV
+            self.airports = load_airport_table(airports_file, self.snapshot_path)
+            if self.airports is None:
+                return
+            logger.info(f"Loaded {len(self.airports)} passenger airports with IATA codes")
             
-            # DEBUG: Show some examples
-            if not self.airports_df.empty:
-                sample_airports = self.airports_df.head(3)
-                logger.info("Sample airports loaded:")
-                for _, airport in sample_airports.iterrows():
-                    logger.info(f"  {airport['iata_code']}: {airport['name']} ({airport['municipality']})")
+            self._index_airports()
+            self.gazetteer.add_airports(self.airports)
             
         except Exception as e:
             logger.error(f"Failed to load airports database: {e}")
             import traceback
             logger.error(f"Full traceback: {traceback.format_exc()}")
-            self.airports_df = None
+            self.airports = None
+            self._airports_df = None
+            self.airport_index = None
+            self._by_municipality, self._by_type = {}, {}
+    
+    @property
+    def airports_df(self):
+        """pandas view of the airports, built on first use (startup does not need pandas)"""
+        if self._airports_df is None and self.airports is not None:
+            self._airports_df = self.airports.to_dataframe()
+        return self._airports_df
+    
+    @airports_df.setter
+    def airports_df(self, frame) -> None:
+        self._airports_df = frame
+        self.airports = AirportTable.from_dataframe(frame) if frame is not None else None
+    
+    def _index_airports(self) -> None:
+        """Build the spatial and lookup indexes over the airports (call after changing airports)"""
+        airports = self.airports
+        self.airport_index = SphericalIndex(list(zip(airports.latitudes, airports.longitudes)))
+        
+        self._by_municipality = {}
+        self._by_type = {airport_type: [] for airport_type in PASSENGER_TYPES}
+        for position in range(len(airports)):
+            municipality = airports.municipality(position)
+            if municipality:
+                self._by_municipality.setdefault(self._normalize(municipality), []).append(position)
+            self._by_type.setdefault(airports.airport_type(position), []).append(position)
+        
+        rank = {airport_type: i for i, airport_type in enumerate(PASSENGER_TYPES)}
+        for positions in self._by_municipality.values():
+            positions.sort(key=lambda position: rank.get(airports.airport_type(position), len(rank)))
+        
+        logger.info(f"Indexed {len(self.airport_index)} airport locations, "
+                    f"{len(self._by_municipality)} municipalities")
+    
+    def airports_in_municipality(self, city: str) -> List[str]:
+        """
+        IATA codes of the airports serving a municipality, large airports first
+        
+        Args:
+            city: Municipality name as in airports.csv (case and accents are ignored)
+        """
+        return [self.airports.iata(p) for p in self._by_municipality.get(self._normalize(city), [])]
+    
+    def nearest_airports(self, lat: float, lon: float, k: int = 1) -> List[Tuple[str, float]]:
+        """
+        The k airports closest to a location by geodesic distance
+        
+        Returns:
+            (IATA code, km) pairs, closest first
+        """
+        return [(self.airports.iata(position), km) for km, position in self._nearest_positions(lat, lon, k)]
+    
+    def airports_within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        All airports within a geodesic radius of a location
+        
+        Returns:
+            (IATA code, km) pairs, closest first
+        """
+        if self.airport_index is None:
+            return []
+        candidates = self.airport_index.within(lat, lon, radius_km * GEODESIC_MARGIN)
+        return [
+            (self.airports.iata(position), km)
+            for km, position in self._refine(lat, lon, candidates) if km <= radius_km
+        ]
+    
+    def _nearest_positions(self, lat: float, lon: float, k: int) -> List[Tuple[float, int]]:
+        """(geodesic km, airport position) of the k nearest airports, closest first"""
+        if self.airport_index is None or k < 1:
+            return []
+        
+        candidates = self.airport_index.nearest(lat, lon, k)
+        if not candidates:
+            return []
+        
+        # The geodesic k nearest are no farther than the farthest of these k, so within the margin of it on the sphere
+        bound = max(self._geodesic_km(lat, lon, position) for _, position in candidates) * GEODESIC_MARGIN
+        return self._refine(lat, lon, self.airport_index.within(lat, lon, bound))[:k]
+    
+    def _refine(self, lat: float, lon: float, candidates: List[Tuple[float, int]]) -> List[Tuple[float, int]]:
+        """Exact geodesic distances for index candidates, closest first (ties in airport order)"""
+        return sorted((self._geodesic_km(lat, lon, position), position) for _, position in candidates)
+    
+    def _geodesic_km(self, lat: float, lon: float, position: int) -> float:
+        return geodesic((lat, lon), (self.airports.latitudes[position], self.airports.longitudes[position])).kilometers
     
     async def resolve_to_iata(self, location: str) -> Tuple[Optional[str], str, List[str]]:
         """
@@ -105,143 +215,183 @@ class CityResolverService:
         # Normalize input
         normalized = self._normalize(location)
         
-        # 1. Cache hit (fast path)
-        if normalized in self.cache:
-            logger.debug(f"Cache hit: {location} → {self.cache[normalized]}")
-            return self.cache[normalized], location.title(), []
-        
-        # 2. Common cities (curated quality)
+        # 1. Common cities (curated quality)
         if normalized in self.common_cities:
             iata = self.common_cities[normalized]
-            self.cache[normalized] = iata
             logger.info(f"Common city match: {location} → {iata}")
             return iata, location.title(), []
         
-        # 3. Check if it's already an IATA code
+        # 2. Check if it's already an IATA code
         if len(normalized) == 3 and self._is_valid_iata(normalized.upper()):
             iata = normalized.upper()
-            self.cache[normalized] = iata
             logger.info(f"Direct IATA: {location} → {iata}")
             return iata, location.title(), []
         
+        # 3. Cache hit (earlier geocoding, possibly by another worker or before a restart)
+        entry = await self.cache.get(normalized)
+        if entry is not None:
+            if entry.value['iata'] is None:
+                self.negative_hits += 1
+                logger.debug(f"Cache hit (unresolvable): {location}")
+                return None, location.title(), entry.value['suggestions']
+            logger.debug(f"Cache hit: {location} → {entry.value['iata']}")
+            return entry.value['iata'], entry.value['city'], []
+        
         # 4. Geocode + nearest airport using real data
         logger.info(f"Geocoding: {location}")
-        nearest_iata = await self._find_nearest_airport_real(location)
+        nearest_iata, definitive = await self._find_nearest_airport_real(location)
         
         if nearest_iata:
-            self.cache[normalized] = nearest_iata
             airport_info = self._get_airport_info(nearest_iata)
-            city_name = airport_info.get('municipality', location.title())
+            city_name = airport_info.get('municipality') or location.title()
+            await self.cache.set(normalized, {'iata': nearest_iata, 'city': city_name})
             logger.info(f"Nearest airport: {location} → {nearest_iata} ({city_name})")
             return nearest_iata, city_name, []
         
         # 5. Generate suggestions for failed lookups
         suggestions = self._get_suggestions(location)
+        if definitive:
+            # Throttled or failed geocoding is retried on the next request; a clear "not found" is not
+            await self.cache.set(normalized, {'iata': None, 'suggestions': suggestions}, ttl=self.negative_ttl)
         logger.warning(f"Could not resolve: {location}. Suggestions: {suggestions}")
         return None, location.title(), suggestions
     
     def _is_valid_iata(self, iata_code: str) -> bool:
         """Check if IATA code exists in our database"""
-        if self.airports_df is None:
-            return False
-        return iata_code in self.airports_df['iata_code'].values
+        return self.airports is not None and self.airports.find(iata_code) is not None
     
     def _get_airport_info(self, iata_code: str) -> Dict[str, Any]:
-        """Get airport information from database"""
-        if self.airports_df is None:
-            return {}
-        
-        airport = self.airports_df[self.airports_df['iata_code'] == iata_code]
-        if airport.empty:
+        """Get airport information from database (the snapshot's IATA index; first row wins on duplicates)"""
+        position = self.airports.find(iata_code) if self.airports is not None else None
+        if position is None:
             return {}
         
-        airport_row = airport.iloc[0]
         return {
-            'municipality': airport_row.get('municipality', ''),
-            'name': airport_row.get('name', ''),
-            'country': airport_row.get('iso_country', ''),
-            'latitude': airport_row.get('latitude_deg', 0),
-            'longitude': airport_row.get('longitude_deg', 0)
+            'municipality': self.airports.municipality(position),
+            'name': self.airports.name(position),
+            'country': self.airports.country(position),
+            'latitude': self.airports.latitudes[position],
+            'longitude': self.airports.longitudes[position]
         }
     
-    async def _find_nearest_airport_real(self, location: str) -> Optional[str]:
-        """Find nearest airport using real geocoding and airport database"""
+    async def _find_nearest_airport_real(self, location: str) -> Tuple[Optional[str], bool]:
+        """
+        Find nearest airport using real geocoding and airport database
+        
+        Returns:
+            Tuple of (IATA code or None, whether a None is definitive rather than a skipped or failed geocoding)
+        """
         try:
             # Geocode the location
-            coords = await self._geocode_location(location)
+            coords, definitive = await self._geocode(location)
             if not coords:
-                return None
+                return None, definitive
             
-            # Find nearest airport from real database
+            # Find nearest airport from real database (None: too far from any airport)
             nearest_iata = self._find_nearest_airport_from_coords(
                 coords['lat'], coords['lon']
             )
             
-            return nearest_iata
+            return nearest_iata, self.airport_index is not None
             
         except Exception as e:
             logger.error(f"Error finding nearest airport for {location}: {e}")
-            return None
+            return None, False
     
     async def _geocode_location(self, location: str) -> Optional[Dict[str, float]]:
-        """Geocode location using Nominatim"""
+        """Geocode location with the offline gazetteer, falling back to Nominatim"""
+        coords, _ = await self._geocode(location)
+        return coords
+    
+    def _learn(self, location: str, geo_result) -> None:
+        """Teach the gazetteer a Nominatim answer under Nominatim's name and country for the place"""
+        raw = getattr(geo_result, 'raw', None) or {}
+        name = raw.get('name') or geo_result.address.split(',')[0]
+        country = raw.get('address', {}).get('country_code', '')
+        importance = min(1.0, float(raw.get('importance') or 0.0))  # Nominatim's, 0..1 like the gazetteer's
+        self.gazetteer.learn(location, name, geo_result.latitude, geo_result.longitude, country, importance)
+    
+    async def _geocode(self, location: str) -> Tuple[Optional[Dict[str, float]], bool]:
+        """
+        Geocode location with the offline gazetteer, falling back to Nominatim
+        
+        Returns:
+            Tuple of (coordinates or None, whether a None is definitive: Nominatim answered
+            without a match rather than being skipped, throttled or failing)
+        """
+        place = self.gazetteer.lookup(location)
+        if place is None and self.gazetteer.load_learned():  # Learned by another worker meanwhile
+            place = self.gazetteer.lookup(location)
+        if place is not None:
+            logger.info(f"Gazetteer match {location}: {place.display_name} ({place.latitude:.4f}, {place.longitude:.4f})")
+            return {
+                'lat': place.latitude,
+                'lon': place.longitude,
+                'display_name': place.display_name
+            }, True
+        
+        if self.breaker is not None and not self.breaker.allow_request():
+            logger.warning(f"Nominatim circuit open - skipping geocoding for {location}")
+            return None, False
+        
+        # Nominatim usage policy: at most one request per second
+        if not await self.nominatim_limiter.acquire():
+            return None, False
+        
         try:
             # Run geocoding in thread pool to avoid blocking
             import asyncio
             loop = asyncio.get_event_loop()
             
             def geocode_sync():
-                return self.geolocator.geocode(location, timeout=10)
+                return self.geolocator.geocode(location, timeout=10, addressdetails=True)
             
             geo_result = await loop.run_in_executor(None, geocode_sync)
+            if self.breaker is not None:
+                self.breaker.record_success()
             
             if geo_result:
                 logger.info(f"Geocoded {location}: {geo_result.latitude:.4f}, {geo_result.longitude:.4f}")
+                self._learn(location, geo_result)
                 return {
                     'lat': geo_result.latitude,
                     'lon': geo_result.longitude,
                     'display_name': geo_result.address
-                }
+                }, True
             
-            return None
+            return None, True
             
         except Exception as e:
             logger.warning(f"Geocoding failed for {location}: {e}")
-            return None
+            # Timeouts, 429/5xx and connection problems open the breaker - rejected queries don't
+            if self.breaker is not None and isinstance(e, GeocoderServiceError):
+                if isinstance(e, GeocoderQueryError):
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+            return None, isinstance(e, GeocoderQueryError)
     
     def _find_nearest_airport_from_coords(self, lat: float, lon: float) -> Optional[str]:
-        """Find nearest airport from coordinates using real airport database"""
-        if self.airports_df is None:
+        """
+        Find nearest airport from coordinates using real airport database
+        
+        The spatial index narrows the airports down to the few that can be
+        nearest; only those get an exact geodesic distance.
+        """
+        if self.airports is None or self.airport_index is None:
             logger.error("Airport database not loaded!")
             return None
         
         try:
-            # Calculate distances to all airports
-            def calculate_distance(row):
-                try:
-                    airport_coords = (row['latitude_deg'], row['longitude_deg'])
-                    user_coords = (lat, lon)
-                    return geodesic(user_coords, airport_coords).kilometers
-                except:
-                    return float('inf')  # Invalid coordinates
+            nearest = self._nearest_positions(lat, lon, k=1)
             
-            # Add distance column
-            airports_copy = self.airports_df.copy()
-            airports_copy['distance_km'] = airports_copy.apply(calculate_distance, axis=1)
-            
-            # Filter out invalid distances and sort
-            valid_airports = airports_copy[airports_copy['distance_km'] < float('inf')]
-            
-            if valid_airports.empty:
+            if not nearest:
                 logger.warning("No valid airports found for distance calculation")
                 return None
             
-            # Sort by distance and get nearest
-            nearest = valid_airports.sort_values('distance_km').iloc[0]
-            
-            distance = nearest['distance_km']
-            iata = nearest['iata_code']
-            name = nearest['name']
+            distance, position = nearest[0]
+            iata = self.airports.iata(position)
+            name = self.airports.name(position)
             
             # IMPROVED: More flexible distance thresholds
             if distance <= 50:
@@ -325,54 +475,46 @@ class CityResolverService:
         return city
     
     def _get_suggestions(self, city_input: str) -> List[str]:
-        """Generate suggestions using airport database"""
-        suggestions = []
-        
-        if self.airports_df is None:
-            # Fallback to hardcoded list
-            popular_cities = [
-                "Vienna", "Graz", "Munich", "Frankfurt", "Paris", "London",
-                "Barcelona", "Madrid", "Rome", "Athens", "Rhodes"
-            ]
-        else:
-            # Use real airport data for suggestions
-            major_airports = self.airports_df[
-                self.airports_df['type'] == 'large_airport'
-            ]['municipality'].unique()[:20]
-            popular_cities = [city for city in major_airports if pd.notna(city)]
+        """Generate suggestions from all known municipalities and aliases (typo-tolerant)"""
+        if len(self.gazetteer):
+            return [place.name for place in self.gazetteer.suggest(city_input, limit=5)]
         
+        # Fallback to hardcoded list
+        popular_cities = [
+            "Vienna", "Graz", "Munich", "Frankfurt", "Paris", "London",
+            "Barcelona", "Madrid", "Rome", "Athens", "Rhodes"
+        ]
         city_lower = city_input.lower()
-        
-        for city in popular_cities:
-            if pd.isna(city):
-                continue
-                
-            similarity = SequenceMatcher(None, city_lower, city.lower()).ratio()
-            
-            # Boost score for partial matches
-            if city_lower in city.lower() or city.lower() in city_lower:
-                similarity = max(similarity, 0.7)
-            
-            if similarity > 0.5:
-                suggestions.append(str(city))
+        scored = [(similarity(city_lower, city.lower()), city) for city in popular_cities]
         
         # Sort by similarity and return top 5
-        suggestions.sort(key=lambda x: SequenceMatcher(None, city_lower, x.lower()).ratio(), reverse=True)
-        return suggestions[:5]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [city for score, city in scored if score > 0.5][:5]
+    
+    async def warm_cache(self) -> int:
+        """Load recent resolutions from the shared disk cache into memory (at startup)"""
+        loaded = await self.cache.warm()
+        if loaded:
+            logger.info(f"City resolution cache: {loaded} entries warm-loaded")
+        return loaded
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get service statistics"""
+        cache_stats = self.cache.get_stats()
         stats = {
-            'cache_size': len(self.cache),
+            'cache_size': cache_stats['memory_entries'],
+            'cache': {**cache_stats, 'negative_hits': self.negative_hits},
             'common_cities': len(self.common_cities),
-            'airports_loaded': len(self.airports_df) if self.airports_df is not None else 0
+            'airports_loaded': len(self.airports) if self.airports is not None else 0,
+            'gazetteer_places': len(self.gazetteer),
+            'nominatim_rate_limit': self.nominatim_limiter.get_stats()
         }
         
-        if self.airports_df is not None:
+        if self.airports is not None:
             stats.update({
-                'large_airports': len(self.airports_df[self.airports_df['type'] == 'large_airport']),
-                'medium_airports': len(self.airports_df[self.airports_df['type'] == 'medium_airport']),
-                'small_airports': len(self.airports_df[self.airports_df['type'] == 'small_airport'])
+                'large_airports': len(self._by_type.get('large_airport', [])),
+                'medium_airports': len(self._by_type.get('medium_airport', [])),
+                'small_airports': len(self._by_type.get('small_airport', []))
             })
         
         return stats
\ No newline at end of file
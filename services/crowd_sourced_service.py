@@ -11,6 +11,9 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import re
 
+from utils.circuit_breaker import CLOSED, OPEN, CircuitBreaker, CircuitBreakerRegistry
+from utils.deadline import Deadline
+
 logger = logging.getLogger(__name__)
 
 class SimpleCrowdService:
@@ -19,16 +22,24 @@ class SimpleCrowdService:
     Only returns REAL data from Reddit - no mock/fake data
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        base_url: str = "https://www.reddit.com"
+    ):
         self.cache = {}  # Simple in-memory cache
         self.session = None
+        self.base_url = base_url.rstrip("/")
+        # Shared Reddit circuit breaker (None = always call Reddit)
+        self.breaker: Optional[CircuitBreaker] = breakers.get("reddit") if breakers else None
     
-    async def get_travel_tips(self, destination: str) -> List[Dict[str, Any]]:
+    async def get_travel_tips(self, destination: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """
         Get travel tips for destination - ONLY REAL DATA
         
         Args:
             destination: Destination city name
+            deadline: Request deadline; subreddits not searched by then are skipped
             
         Returns:
             List of REAL travel tips from Reddit (empty if none found)
@@ -42,12 +53,20 @@ class SimpleCrowdService:
                 logger.info(f"Using cached tips for {destination}")
                 return cached_tips
         
+        if self.breaker is not None and not self.breaker.allow_request():
+            # Reddit is down - fall back to cached tips of any age
+            cached_tips = self.cache.get(cache_key, ([], None))[0]
+            logger.warning(f"Reddit circuit open - serving {len(cached_tips)} cached tips for {destination}")
+            return cached_tips
+        
         try:
             # Try Reddit JSON API (no authentication needed)
-            tips = await self._fetch_reddit_tips(destination)
+            tips = await self._fetch_reddit_tips(destination, deadline)
             
-            # Cache results (even if empty)
-            self.cache[cache_key] = (tips, datetime.now())
+            # Cache results (even if empty, unless Reddit failed underneath or the search was cut short)
+            complete = deadline is None or not deadline.expired
+            if complete and (tips or self.breaker is None or self.breaker.state == CLOSED):
+                self.cache[cache_key] = (tips, datetime.now())
             
             logger.info(f"Found {len(tips)} REAL tips for {destination}")
             return tips
@@ -57,7 +76,7 @@ class SimpleCrowdService:
             # Return empty list - NO FAKE DATA
             return []
     
-    async def _fetch_reddit_tips(self, destination: str) -> List[Dict[str, Any]]:
+    async def _fetch_reddit_tips(self, destination: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
         """
         Fetch REAL tips from Reddit JSON API
         """
@@ -67,8 +86,16 @@ class SimpleCrowdService:
         subreddits = ['travel', 'solotravel', 'backpacking', 'digitalnomad']
         
         for subreddit in subreddits:
+            if self.breaker is not None and self.breaker.state == OPEN:
+                logger.warning("Reddit circuit opened - skipping remaining subreddits")
+                break
+            
+            if deadline is not None and deadline.expired:
+                logger.warning(f"Deadline reached - skipping r/{subreddit} and later subreddits")
+                break
+            
             try:
-                subreddit_tips = await self._search_subreddit(subreddit, destination)
+                subreddit_tips = await self._search_subreddit(subreddit, destination, deadline)
                 tips.extend(subreddit_tips)
                 
                 # Small delay to be respectful
@@ -84,13 +111,18 @@ class SimpleCrowdService:
         
         return tips[:20]  # Max 20 tips
     
-    async def _search_subreddit(self, subreddit: str, destination: str) -> List[Dict[str, Any]]:
+    async def _search_subreddit(
+        self,
+        subreddit: str,
+        destination: str,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
         """Search a specific subreddit for destination tips"""
         tips = []
         
         try:
             # Reddit JSON API endpoint
-            url = f"https://www.reddit.com/r/{subreddit}/search.json"
+            url = f"{self.base_url}/r/{subreddit}/search.json"
             params = {
                 'q': destination,
                 'limit': 10,
@@ -103,18 +135,35 @@ class SimpleCrowdService:
             }
             
             async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers, timeout=15) as response:
+                timeout = deadline.cap(15) if deadline else 15
+                async with session.get(url, params=params, headers=headers, timeout=timeout) as response:
                     if response.status == 200:
                         data = await response.json()
+                        self._record_outcome(True)
                         tips = self._parse_reddit_data(data, destination, subreddit)
                     else:
                         logger.warning(f"Reddit API returned status {response.status} for r/{subreddit}")
+                        # 429 (unauthenticated rate limit) and 5xx mean Reddit won't answer for a while
+                        self._record_outcome(response.status < 500 and response.status != 429)
                         
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Error searching r/{subreddit}: {e}")
+            if deadline is None or not deadline.expired:
+                self._record_outcome(False)
         except Exception as e:
             logger.warning(f"Error searching r/{subreddit}: {e}")
         
         return tips
     
+    def _record_outcome(self, success: bool) -> None:
+        """Report a Reddit call result to the circuit breaker"""
+        if self.breaker is None:
+            return
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+    
     def _parse_reddit_data(self, data: Dict[str, Any], destination: str, subreddit: str) -> List[Dict[str, Any]]:
         """
         Parse Reddit JSON response into clean tip objects
@@ -281,14 +330,18 @@ class SimpleCrowdService:
 
 
 # FastAPI Router - NO CHANGES NEEDED
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import JSONResponse
 
 router = APIRouter()
 crowd_service = SimpleCrowdService()
 
+def get_crowd_service() -> SimpleCrowdService:
+    """Service used by the router (the app overrides it with its configured instance)"""
+    return crowd_service
+
 @router.get("/travel-tips/{destination}")
-async def get_travel_tips(destination: str):
+async def get_travel_tips(destination: str, crowd_service: SimpleCrowdService = Depends(get_crowd_service)):
     """
     Get REAL travel tips for destination from Reddit
     Returns empty list if no real tips found
@@ -309,7 +362,7 @@ async def get_travel_tips(destination: str):
         raise HTTPException(status_code=500, detail="Error fetching travel tips")
 
 @router.get("/travel-warnings/{destination}")
-async def get_travel_warnings(destination: str):
+async def get_travel_warnings(destination: str, crowd_service: SimpleCrowdService = Depends(get_crowd_service)):
     """
     Get travel warnings for destination from REAL data only
     """
@@ -1,28 +1,33 @@
 # services/flight_service.py - Clean Flight Service
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from contextlib import aclosing
 import asyncio
 from datetime import datetime
 import logging
 
 from utils.api_client import ApifyClient
-from utils.data_parser import FlightParser
+from utils.data_parser import FlightParser, parse_pages
+from utils.deadline import Deadline
+from utils.records import Flight
 
 logger = logging.getLogger(__name__)
 
 class FlightService:
     """Service for flight search operations"""
     
-    def __init__(self, api_client: ApifyClient):
+    def __init__(self, api_client: ApifyClient, batch_legs: bool = True):
         self.api_client = api_client
         self.parser = FlightParser()
+        self.batch_legs = batch_legs  # Request both round-trip legs in one actor run
     
     async def search_flights(
         self, 
         origin: str, 
         destination: str, 
         date: str,
-        max_results: int = 10
-    ) -> List[Dict[str, Any]]:
+        max_results: int = 10,
+        deadline: Optional[Deadline] = None
+    ) -> List[Flight]:
         """
         Search flights using Skyscanner via Apify
         
@@ -31,9 +36,10 @@ class FlightService:
             destination: IATA airport code (e.g., 'FCO') 
             date: Departure date in YYYY-MM-DD format
             max_results: Maximum number of results to return
+            deadline: Request deadline; flights received until then are returned
             
         Returns:
-            List of flight dictionaries with airline, price, time, duration
+            List of Flight records with airline, price, time, duration
         """
         logger.info(f"Searching flights: {origin} → {destination} on {date}")
         
@@ -47,21 +53,21 @@ class FlightService:
         }
         
         try:
-            # Call Apify API with retry logic
-            raw_data = await self.api_client.call_actor(
-                "jupri~skyscanner-flight",
-                actor_input
+            # Call Apify API with retry logic and parse result pages as they arrive
+            flights = await parse_pages(
+                self.api_client.iter_actor_pages(
+                    "jupri~skyscanner-flight", actor_input, deadline=deadline, fields=FlightParser.FIELDS
+                ),
+                self.parser.parse_flights,
+                max_results=FlightParser.MAX_FLIGHTS
             )
             
-            if not raw_data:
+            if not flights:
                 logger.warning(f"No data received for {origin} → {destination}")
                 return []
             
-            # Parse flights
-            flights = self.parser.parse_flights(raw_data)
-            
             # Sort by price and limit results
-            flights.sort(key=lambda x: x.get('price', 999999))
+            flights.sort(key=lambda x: x.price)
             limited_flights = flights[:max_results]
             
             logger.info(f"Found {len(limited_flights)} flights for {origin} → {destination}")
@@ -77,49 +83,139 @@ class FlightService:
         destination: str, 
         departure_date: str,
         return_date: str,
-        max_results_per_direction: int = 5
-    ) -> Dict[str, List[Dict[str, Any]]]:
+        max_results_per_direction: int = 5,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, List[Flight]]:
         """
         Search round-trip flights
         
+        Both legs are requested in one batched actor run when leg batching is
+        enabled; legs the batched run returns nothing for are searched separately.
+        
         Returns:
             Dict with 'outbound' and 'return' flight lists
         """
         logger.info(f"Searching round-trip: {origin} ↔ {destination}")
         
-        # Search both directions concurrently
-        outbound_task = self.search_flights(origin, destination, departure_date, max_results_per_direction)
-        return_task = self.search_flights(destination, origin, return_date, max_results_per_direction)
+        outbound_flights, return_flights = [], []
+        
+        if self.batch_legs:
+            try:
+                outbound_flights, return_flights = await self.search_multi_leg(
+                    [(origin, destination, departure_date), (destination, origin, return_date)],
+                    max_results_per_direction,
+                    deadline
+                )
+                if outbound_flights and return_flights:
+                    return {'outbound': outbound_flights, 'return': return_flights}
+                
+                if deadline is not None and deadline.expired:
+                    logger.warning("Deadline reached - returning partial round-trip results")
+                    return {'outbound': outbound_flights, 'return': return_flights}
+                
+                logger.warning("Batched run returned no flights for some legs - searching those separately")
+                
+            except Exception as e:
+                logger.warning(f"Batched round-trip search failed, falling back to separate runs: {e}")
+        
+        # Search missing directions concurrently
+        async def no_search() -> List[Flight]:
+            return []
+        
+        outbound_task = (
+            no_search() if outbound_flights
+            else self.search_flights(origin, destination, departure_date, max_results_per_direction, deadline)
+        )
+        return_task = (
+            no_search() if return_flights
+            else self.search_flights(destination, origin, return_date, max_results_per_direction, deadline)
+        )
         
         try:
-            outbound_flights, return_flights = await asyncio.gather(
+            outbound_result, return_result = await asyncio.gather(
                 outbound_task, 
                 return_task,
                 return_exceptions=True
             )
             
             # Handle exceptions
-            if isinstance(outbound_flights, Exception):
-                logger.error(f"Outbound flight search failed: {outbound_flights}")
-                outbound_flights = []
+            if isinstance(outbound_result, Exception):
+                logger.error(f"Outbound flight search failed: {outbound_result}")
+                outbound_result = []
             
-            if isinstance(return_flights, Exception):
-                logger.error(f"Return flight search failed: {return_flights}")
-                return_flights = []
+            if isinstance(return_result, Exception):
+                logger.error(f"Return flight search failed: {return_result}")
+                return_result = []
             
             return {
-                'outbound': outbound_flights,
-                'return': return_flights
+                'outbound': outbound_flights or outbound_result,
+                'return': return_flights or return_result
             }
             
         except Exception as e:
             logger.error(f"Round-trip search failed: {e}")
-            return {'outbound': [], 'return': []}
+            return {'outbound': outbound_flights, 'return': return_flights}
+    
+    async def search_multi_leg(
+        self,
+        legs: List[Tuple[str, str, str]],
+        max_results_per_leg: int = 5,
+        deadline: Optional[Deadline] = None
+    ) -> List[List[Flight]]:
+        """
+        Search several one-way legs in a single Skyscanner actor run
+        
+        Legs are encoded as indexed actor inputs (origin.0/target.0/depart.0,
+        origin.1/...) and the results are demultiplexed back per leg.
+        
+        Args:
+            legs: List of (origin IATA, destination IATA, YYYY-MM-DD date) tuples
+            max_results_per_leg: Maximum number of flights per leg
+            deadline: Request deadline; flights received until then are returned
+            
+        Returns:
+            One flight list per requested leg, in request order
+        """
+        route = ", ".join(f"{o} → {d} on {date}" for o, d, date in legs)
+        logger.info(f"Searching {len(legs)} legs in one run: {route}")
+        
+        actor_input = {
+            "market": "DE",
+            "currency": "EUR"
+        }
+        for index, (origin, destination, date) in enumerate(legs):
+            actor_input[f"origin.{index}"] = origin.upper()
+            actor_input[f"target.{index}"] = destination.upper()
+            actor_input[f"depart.{index}"] = date
+        
+        flights_per_leg: List[List[Flight]] = [[] for _ in legs]
+        
+        # Parse result pages as they arrive; stop once every leg has enough flights
+        pages = self.api_client.iter_actor_pages(
+            "jupri~skyscanner-flight", actor_input, deadline=deadline, fields=FlightParser.FIELDS
+        )
+        async with aclosing(pages):
+            async for page in pages:
+                for index, items in enumerate(self.parser.split_by_leg(page, legs)):
+                    if items and len(flights_per_leg[index]) < FlightParser.MAX_FLIGHTS:
+                        flights_per_leg[index].extend(self.parser.parse_flights(items))
+                
+                if all(len(flights) >= FlightParser.MAX_FLIGHTS for flights in flights_per_leg):
+                    break
+        
+        results = []
+        for (origin, destination, _), flights in zip(legs, flights_per_leg):
+            # Sort by price and limit results
+            flights.sort(key=lambda x: x.price)
+            results.append(flights[:max_results_per_leg])
+            logger.info(f"Found {len(results[-1])} flights for {origin} → {destination}")
+        
+        return results
     
     def calculate_flight_combinations(
         self,
-        outbound_flights: List[Dict[str, Any]],
-        return_flights: List[Dict[str, Any]], 
+        outbound_flights: List[Flight],
+        return_flights: List[Flight], 
         persons: int = 2
     ) -> List[Dict[str, Any]]:
         """
@@ -137,14 +233,14 @@ class FlightService:
         
         for outbound in outbound_flights[:3]:  # Limit to top 3
             for return_flight in return_flights[:3]:
-                total_cost = (outbound['price'] + return_flight['price']) * persons
+                total_cost = (outbound.price + return_flight.price) * persons
                 
                 combination = {
                     'outbound_flight': outbound,
                     'return_flight': return_flight,
                     'total_cost': total_cost,
                     'persons': persons,
-                    'cost_per_person': outbound['price'] + return_flight['price']
+                    'cost_per_person': outbound.price + return_flight.price
                 }
                 
                 combinations.append(combination)
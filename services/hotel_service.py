@@ -1,9 +1,12 @@
 # services/hotel_service.py - Hotel & Accommodation Service
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Optional
 import logging
 
 from utils.api_client import ApifyClient
-from utils.data_parser import HotelParser, AirbnbParser
+from utils.data_parser import HotelParser, AirbnbParser, parse_pages
+from utils.deadline import Deadline
+from utils.records import Accommodation, AirbnbListing, Hotel
+from services.search_filters import SearchFilters, max_items
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +23,10 @@ class AccommodationService:
         city: str,
         checkin: str,
         checkout: str,
-        max_results: int = 50
-    ) -> List[Dict[str, Any]]:
+        max_results: int = 50,
+        deadline: Optional[Deadline] = None,
+        filters: Optional[SearchFilters] = None
+    ) -> List[Hotel]:
         """
         Search hotels using Booking.com via Apify
         
@@ -30,9 +35,11 @@ class AccommodationService:
             checkin: Check-in date in YYYY-MM-DD format
             checkout: Check-out date in YYYY-MM-DD format
             max_results: Maximum number of results to return
+            deadline: Request deadline; hotels received until then are returned
+            filters: Guest count and nightly price cap passed on to the actor
             
         Returns:
-            List of hotel dictionaries
+            List of Hotel records
         """
         logger.info(f"Searching hotels in {city} ({checkin} - {checkout})")
         
@@ -51,27 +58,31 @@ class AccommodationService:
             "includeAlternativeAccommodations": True,
             "destType": "city"
         }
+        if filters is not None:
+            actor_input.update(filters.booking_input())
         
-        # Set options with maxItems
+        # Only scrape as many items as the parser will look at
         options = {
-            "maxItems": max(max_results * 4, 200),  # Request more to get better results
+            "maxItems": max_items(max_results, HotelParser.MAX_RAW_ITEMS),
             "timeout": 120
         }
         
         try:
-            # Call Apify API
-            raw_data = await self.api_client.call_actor(
-                "voyager~fast-booking-scraper",
-                actor_input,
-                options
+            # Call Apify API and parse result pages as they arrive
+            hotels = await parse_pages(
+                self.api_client.iter_actor_pages(
+                    "voyager~fast-booking-scraper", actor_input, options, deadline, fields=HotelParser.FIELDS
+                ),
+                self.hotel_parser.parse_hotels,
+                max_raw_items=HotelParser.MAX_RAW_ITEMS
             )
             
-            if not raw_data:
+            if not hotels:
                 logger.warning(f"No hotel data received for {city}")
                 return []
             
-            # Parse hotels
-            hotels = self.hotel_parser.parse_hotels(raw_data)
+            # Re-rank across pages (best value first)
+            hotels.sort(key=HotelParser.value_key)
             
             # Limit results
             limited_hotels = hotels[:max_results]
@@ -89,8 +100,10 @@ class AccommodationService:
         checkin: str,
         checkout: str,
         guests: int = 2,
-        max_results: int = 100
-    ) -> List[Dict[str, Any]]:
+        max_results: int = 100,
+        deadline: Optional[Deadline] = None,
+        filters: Optional[SearchFilters] = None
+    ) -> List[AirbnbListing]:
         """
         Search Airbnb properties
         
@@ -100,9 +113,12 @@ class AccommodationService:
             checkout: Check-out date in YYYY-MM-DD format
             guests: Number of guests
             max_results: Maximum number of results
+            deadline: Request deadline; properties received until then are returned
+            filters: Guest count and nightly price cap passed on to the actor
+                (overrides guests)
             
         Returns:
-            List of Airbnb property dictionaries
+            List of AirbnbListing records
         """
         logger.info(f"Searching Airbnb in {city} for {guests} guests ({checkin} - {checkout})")
         
@@ -122,27 +138,31 @@ class AccommodationService:
             "maxReviews": 0,
             "includeReviews": False
         }
+        if filters is not None:
+            actor_input.update(filters.airbnb_input())
         
-        # Set options with maxItems
+        # Only scrape as many items as the parser will look at
         options = {
-            "maxItems": max_results,
+            "maxItems": max_items(max_results, AirbnbParser.MAX_RAW_ITEMS),
             "timeout": 120
         }
         
         try:
-            # Call Apify API
-            raw_data = await self.api_client.call_actor(
-                "tri_angle~new-fast-airbnb-scraper",
-                actor_input,
-                options
+            # Call Apify API and parse result pages as they arrive
+            properties = await parse_pages(
+                self.api_client.iter_actor_pages(
+                    "tri_angle~new-fast-airbnb-scraper", actor_input, options, deadline, fields=AirbnbParser.FIELDS
+                ),
+                self.airbnb_parser.parse_properties,
+                max_raw_items=AirbnbParser.MAX_RAW_ITEMS
             )
             
-            if not raw_data:
+            if not properties:
                 logger.warning(f"No Airbnb data received for {city}")
                 return []
             
-            # Parse properties
-            properties = self.airbnb_parser.parse_properties(raw_data)
+            # Re-rank across pages (best value first)
+            properties.sort(key=AirbnbParser.value_key)
             
             logger.info(f"Found {len(properties)} Airbnb properties for {city}")
             return properties
@@ -159,21 +179,26 @@ class AccommodationService:
         checkout: str,
         guests: int = 2,
         max_hotels: int = 50,
-        max_airbnb: int = 100
-    ) -> Dict[str, List[Dict[str, Any]]]:
+        max_airbnb: int = 100,
+        deadline: Optional[Deadline] = None,
+        filters: Optional[SearchFilters] = None
+    ) -> Dict[str, List[Accommodation]]:
         """
         Search both hotels and Airbnb properties concurrently
         
+        With filters, the search's persons and budget are applied by the
+        actors themselves (see SearchFilters).
+        
         Returns:
-            Dict with 'hotels' and 'airbnb' lists
+            Dict with 'hotels' (Hotel records) and 'airbnb' (AirbnbListing records) lists
         """
         logger.info(f"Searching all accommodations in {city}")
         
         import asyncio
         
         # Search both concurrently
-        hotel_task = self.search_hotels(city, checkin, checkout, max_hotels)
-        airbnb_task = self.search_airbnb(city, checkin, checkout, guests, max_airbnb)
+        hotel_task = self.search_hotels(city, checkin, checkout, max_hotels, deadline, filters)
+        airbnb_task = self.search_airbnb(city, checkin, checkout, guests, max_airbnb, deadline, filters)
         
         try:
             hotels, airbnb_properties = await asyncio.gather(
@@ -0,0 +1,66 @@
+# services/search_filters.py - Search Constraints Pushed Down into Actor Inputs
+from typing import Dict, Any, Optional
+from dataclasses import dataclass
+import math
+
+from config.search_limits import BUDGET_TOLERANCE
+
+PRICE_CAP_STEP = 25  # Nightly price caps are rounded up to this step so similar budgets share cache entries
+
+@dataclass
+class SearchFilters:
+    """
+    Budget, persons and nights of a search as per-actor input filters
+
+    The combination engine drops every combination above budget * 1.2, so
+    an accommodation whose nightly price alone exceeds that share of the
+    budget can never be used. Passing the cap (and the guest count) to the
+    actors lets them skip those listings instead of scraping, transferring
+    and parsing them.
+    """
+    persons: int = 2
+    nights: int = 1
+    budget: Optional[int] = None
+
+    @classmethod
+    def from_search_params(cls, search_params: Dict[str, Any]) -> "SearchFilters":
+        """Build filters from the validated /smart-search parameters"""
+        return cls(
+            persons=search_params.get('persons', 2),
+            nights=max(search_params.get('nights', 1), 1),
+            budget=search_params.get('budget')
+        )
+
+    @property
+    def max_price_per_night(self) -> Optional[int]:
+        """Highest nightly price that can still fit the budget (None without budget)"""
+        if not self.budget:
+            return None
+        cap = self.budget * BUDGET_TOLERANCE / self.nights
+        return int(math.ceil(cap / PRICE_CAP_STEP) * PRICE_CAP_STEP)
+
+    def booking_input(self) -> Dict[str, Any]:
+        """Input overrides for voyager~fast-booking-scraper"""
+        actor_input: Dict[str, Any] = {"adults": self.persons}
+        if self.max_price_per_night is not None:
+            actor_input["minMaxPrice"] = f"0-{self.max_price_per_night}"
+        return actor_input
+
+    def airbnb_input(self) -> Dict[str, Any]:
+        """Input overrides for tri_angle~new-fast-airbnb-scraper"""
+        actor_input: Dict[str, Any] = {"adults": self.persons}
+        if self.max_price_per_night is not None:
+            actor_input["priceMax"] = self.max_price_per_night
+        return actor_input
+
+def max_items(max_results: int, parser_limit: int) -> int:
+    """
+    Actor maxItems for an accommodation search
+
+    Sized by the window the parser ranks: it reads up to parser_limit raw
+    items and sorts them by value (price per rating point), and the engine
+    combines the best of those. The actors rank by other criteria, so a
+    smaller maxItems would drop good-value listings unnoticed. The caller's
+    max_results only lowers it further.
+    """
+    return max(1, min(max_results, parser_limit))
@@ -0,0 +1,74 @@
+# services/search_results.py - Server-Side Search Results for Re-Ranking
+from typing import Dict, Any, List, Optional
+from dataclasses import dataclass
+import logging
+import uuid
+
+from utils.cache import TwoTierCache
+from utils.records import Flight, Hotel, AirbnbListing
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StoredSearch:
+    """The parsed results of one /smart-search, enough to rerun the combination engine"""
+    search_params: Dict[str, Any]
+    outbound_flights: List[Flight]
+    return_flights: List[Flight]
+    hotels: List[Hotel]
+    airbnb_properties: List[AirbnbListing]
+
+class SearchResultStore:
+    """
+    Keeps parsed search results under a random search ID for a limited time
+
+    Changing the budget, weights or accommodation type of a search only
+    needs the combination engine, not new city resolution or actor runs.
+    Results are stored as plain dicts in a TwoTierCache, so with the disk
+    tier enabled a refine request can be served by any worker on the host.
+    """
+
+    def __init__(self, cache: TwoTierCache, ttl: float = 1800.0):
+        self.cache = cache
+        self.ttl = ttl
+
+    async def save(self, search_params: Dict[str, Any], search_results: Dict[str, Any]) -> str:
+        """
+        Store the flights and accommodations of a search
+
+        Args:
+            search_params: Validated search parameters (nights, persons, budget, ...)
+            search_results: Result of the concurrent searches (flights, accommodations)
+
+        Returns:
+            The search ID to refine the results with
+        """
+        search_id = uuid.uuid4().hex
+        flights = search_results['flights']
+        accommodations = search_results['accommodations']
+
+        await self.cache.set(search_id, {
+            'search_params': search_params,
+            'outbound': [flight.to_dict() for flight in flights['outbound']],
+            'return': [flight.to_dict() for flight in flights['return']],
+            'hotels': [hotel.to_dict() for hotel in accommodations['hotels']],
+            'airbnb': [listing.to_dict() for listing in accommodations['airbnb']]
+        }, ttl=self.ttl)
+
+        logger.debug(f"Stored search {search_id} for {self.ttl:.0f}s")
+        return search_id
+
+    async def load(self, search_id: str) -> Optional[StoredSearch]:
+        """The stored search, or None if the ID is unknown or has expired"""
+        entry = await self.cache.get(search_id)
+        if entry is None:
+            return None
+
+        data = entry.value
+        return StoredSearch(
+            search_params=data['search_params'],
+            outbound_flights=[Flight.from_dict(item) for item in data['outbound']],
+            return_flights=[Flight.from_dict(item) for item in data['return']],
+            hotels=[Hotel.from_dict(item) for item in data['hotels']],
+            airbnb_properties=[AirbnbListing.from_dict(item) for item in data['airbnb']]
+        )
@@ -0,0 +1,106 @@
+# bench_airport_snapshot.py - Benchmark: airport database startup from the CSV vs. the mapped snapshot
+"""
+Loads the airport database the way a worker does at startup with
+
+  * csv:      pandas.read_csv + passenger filter + spatial index
+              (the resolver before the snapshot)
+  * snapshot: mmap of the compiled snapshot + spatial index
+
+Each variant runs in a fresh interpreter, so the time includes imports,
+and the peak RSS of that process is reported (Linux, /proc/self/status). The airports come from
+airports.csv when it is present; otherwise a synthetic CSV the size of
+OurAirports (83,000 rows, about 4,000 passenger airports) is generated.
+
+Usage:
+    python test/bench_airport_snapshot.py [airports.csv]
+"""
+import csv
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.airport_snapshot import compile_snapshot
+
+CSV_STARTUP = """
+import pandas as pd
+from utils.spatial_index import SphericalIndex
+frame = pd.read_csv({csv!r}, dtype={{'iata_code': str}})
+frame = frame[frame['type'].isin(['large_airport', 'medium_airport', 'small_airport']) &
+              frame['scheduled_service'].eq('yes') & frame['iata_code'].notna()].copy()
+frame['iata_code'] = frame['iata_code'].str.upper()
+SphericalIndex(list(zip(frame['latitude_deg'].tolist(), frame['longitude_deg'].tolist())))
+"""
+
+SNAPSHOT_STARTUP = """
+from utils.airport_snapshot import AirportTable
+from utils.spatial_index import SphericalIndex
+table = AirportTable.open({snapshot!r})
+SphericalIndex(list(zip(table.latitudes, table.longitudes)))
+"""
+
+MEASURE = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+peak_kb = next(line.split()[1] for line in open("/proc/self/status") if line.startswith("VmHWM"))
+print(elapsed, peak_kb)
+"""
+
+
+def synthetic_csv(path: str, rows: int = 83000, passenger: int = 4000) -> None:
+    rng = random.Random(42)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "ident", "type", "name", "latitude_deg", "longitude_deg", "elevation_ft",
+                         "continent", "iso_country", "iso_region", "municipality", "scheduled_service",
+                         "gps_code", "iata_code", "local_code", "home_link", "wikipedia_link", "keywords"])
+        for i in range(rows):
+            scheduled = i < passenger
+            writer.writerow([
+                i, f"X{i:05d}", rng.choice(["large_airport", "medium_airport", "small_airport"]) if scheduled
+                else rng.choice(["small_airport", "heliport", "closed"]),
+                f"Airport {i}", math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180),
+                rng.randint(0, 3000), "EU", "AT", "AT-6", f"Town {i % 20000}", "yes" if scheduled else "no",
+                f"X{i:05d}", "".join(chr(65 + i // 26 ** k % 26) for k in (2, 1, 0)) if scheduled else "", "", "", "", ""
+            ])
+
+
+def measure(body: str) -> tuple:
+    script = MEASURE.format(root=ROOT, body=body)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    elapsed, rss_kb = output.split()
+    return float(elapsed), int(rss_kb) / 1024
+
+
+def main():
+    import logging
+    logging.disable(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(directory, "airports.csv")
+        if len(sys.argv) <= 1:
+            synthetic_csv(csv_path)
+        snapshot_path = os.path.join(directory, "airports.snapshot")
+        compile_snapshot(csv_path, snapshot_path)
+
+        csv_time, csv_rss = min(measure(CSV_STARTUP.format(csv=csv_path)) for _ in range(3))
+        snap_time, snap_rss = min(measure(SNAPSHOT_STARTUP.format(snapshot=snapshot_path)) for _ in range(3))
+
+        print("🧪 Airport Snapshot Benchmark")
+        print("=" * 50)
+        print(f"CSV: {os.path.getsize(csv_path) / 1e6:.1f} MB, snapshot: {os.path.getsize(snapshot_path) / 1e3:.0f} KB")
+        print(f"   • read_csv + filter: {csv_time * 1000:8.1f}ms, peak RSS {csv_rss:6.1f} MB")
+        print(f"   • mapped snapshot:   {snap_time * 1000:8.1f}ms, peak RSS {snap_rss:6.1f} MB")
+        print(f"   • Startup speedup: {csv_time / snap_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
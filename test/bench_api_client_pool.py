@@ -0,0 +1,127 @@
+# bench_api_client_pool.py - Benchmark: per-call httpx clients vs. the shared connection pool
+"""
+Starts a local mock Apify endpoint (plain HTTP/1.1 with keep-alive) and compares
+the old behaviour (a fresh httpx.AsyncClient per call) with the pooled ApifyClient.
+
+The mock server counts accepted TCP connections, so the benchmark shows how many
+handshakes each strategy needs. Against api.apify.com every new connection also
+costs a TLS handshake, so real-world savings are larger than the local timings.
+
+Usage: python test/bench_api_client_pool.py [calls] [concurrency]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+
+PAYLOAD = json.dumps([{"name": f"Hotel {i}", "price": 100 + i} for i in range(20)]).encode()
+
+
+class MockApifyServer:
+    """Minimal keep-alive HTTP/1.1 server answering every request with PAYLOAD"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                headers = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in headers.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(PAYLOAD)).encode() + b"\r\n\r\n" + PAYLOAD
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_per_call_clients(url: str, calls: int, concurrency: int) -> float:
+    """Old behaviour: one AsyncClient (and one TCP connection) per call"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call(i):
+        async with semaphore:
+            async with httpx.AsyncClient(timeout=30.0) as client:
+                response = await client.post(url, json={"i": i})
+                response.json()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(calls)))
+    return time.perf_counter() - start
+
+
+async def run_pooled_client(port: int, calls: int, concurrency: int) -> float:
+    """New behaviour: all calls share the ApifyClient connection pool"""
+    client = ApifyClient(
+        "bench-token",
+        RetryConfig(max_retries=1),
+        PoolConfig(max_connections=concurrency, max_keepalive_connections=concurrency),
+        api_url=f"http://127.0.0.1:{port}/v2"
+    )
+    await client.start()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call(i):
+        async with semaphore:
+            await client.call_actor("bench~actor", {"i": i})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return elapsed
+
+
+async def main(calls: int = 500, concurrency: int = 10):
+    print("🧪 ApifyClient Connection Pool Benchmark")
+    print("=" * 50)
+    print(f"Calls: {calls} | Concurrency: {concurrency}")
+
+    for label, runner in [("Per-call clients", "per_call"), ("Shared pool", "pooled")]:
+        server = MockApifyServer()
+        await server.start()
+        url = f"http://127.0.0.1:{server.port}/v2/acts/bench~actor/run-sync-get-dataset-items"
+
+        if runner == "per_call":
+            elapsed = await run_per_call_clients(url, calls, concurrency)
+        else:
+            elapsed = await run_pooled_client(server.port, calls, concurrency)
+
+        await server.stop()
+        print(f"\n{label}:")
+        print(f"   • Total time: {elapsed * 1000:.0f}ms ({elapsed / calls * 1000:.2f}ms per call)")
+        print(f"   • TCP connections opened: {server.connections} for {server.requests} requests")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*args))
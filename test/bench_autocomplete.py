@@ -0,0 +1,89 @@
+# bench_autocomplete.py - Benchmark: city autocomplete with a name scan vs. the prefix index
+"""
+Completes typed prefixes (2-6 characters, as sent per keystroke) with
+
+  * scan:  every indexed name checked with startswith, matches ranked
+  * index: Gazetteer.complete (sorted keys + precomputed top-k per node)
+
+and reports the time per query, the search index build time and whether
+both return the same places. The gazetteer is a GeoNames dump when a path
+is given; otherwise a synthetic one the size of cities15000.txt (26,000
+places with alternate names).
+
+Usage:
+    python test/bench_autocomplete.py [cities15000.txt] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.gazetteer import Gazetteer, Place, fold, population_importance
+
+
+def synthetic_gazetteer(rng: random.Random, places: int = 26000) -> Gazetteer:
+    syllables = ["ber", "lin", "wa", "graz", "san", "ta", "mar", "ia", "ko", "burg", "dorf", "ville", "no", "el"]
+    gazetteer = Gazetteer()
+    for _ in range(places):
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+        alternates = [name + suffix for suffix in rng.sample(["a", "o", "en", " city", "stadt"], rng.randint(0, 3))]
+        population = int(10 ** rng.uniform(4.2, 7))
+        gazetteer.add(Place(name, rng.uniform(-60, 60), rng.uniform(-180, 180), "AT", population, "geonames",
+                            population_importance(population)), alternates)
+    return gazetteer
+
+
+def scan_complete(gazetteer: Gazetteer, representative: list, prefix: str, limit: int = 6) -> list:
+    key = fold(prefix)
+    positions = {representative[p] for name, ps in gazetteer._index.items() if name.startswith(key) for p in ps}
+    ranked = sorted(positions, key=lambda p: (-gazetteer.places[p].importance, p))
+    return [gazetteer.places[p] for p in ranked[:limit]]
+
+
+def timed(function, arguments) -> tuple:
+    """Results, mean and 99th percentile seconds per call"""
+    results, times = [], []
+    for argument in arguments:
+        start = time.perf_counter()
+        results.append(function(argument))
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return results, sum(times) / len(times), times[int(len(times) * 0.99)]
+
+
+def main():
+    import logging
+    logging.disable(logging.ERROR)
+
+    rng = random.Random(42)
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    if len(sys.argv) > 1:
+        gazetteer = Gazetteer()
+        gazetteer.load_geonames(sys.argv[1])
+    else:
+        gazetteer = synthetic_gazetteer(rng)
+
+    start = time.perf_counter()
+    gazetteer.build_search_indexes()
+    build_time = time.perf_counter() - start
+
+    names = [place.name for place in gazetteer.places]
+    prefixes = [name[:rng.randint(2, 6)] for name in rng.sample(names, queries)]
+
+    representative = gazetteer._representatives()
+    scanned, scan_time, scan_p99 = timed(lambda prefix: scan_complete(gazetteer, representative, prefix), prefixes)
+    indexed, index_time, index_p99 = timed(gazetteer.complete, prefixes)
+
+    print("🧪 Autocomplete Benchmark")
+    print("=" * 50)
+    print(f"Places: {len(gazetteer)}, names: {len(gazetteer._index)}, queries: {queries}")
+    print(f"   • Search index build (prefix + trigram): {build_time * 1000:.0f}ms")
+    print(f"   • Name scan:    {scan_time * 1000:8.2f}ms per query (p99 {scan_p99 * 1000:.2f}ms)")
+    print(f"   • Prefix index: {index_time * 1e6:8.1f}µs per query (p99 {index_p99 * 1e6:.1f}µs)")
+    print(f"   • Same suggestions: {scanned == indexed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# bench_field_projection.py - Benchmark: complete dataset items vs. projected fields for hotel searches
+"""
+Compares one Booking.com hotel search with complete dataset items against one
+that requests only HotelParser.FIELDS:
+
+  * bytes transferred: size of the response body
+  * decode time:       time to receive, decode, project and parse the items
+  * peak RSS:          growth of the process high-water mark during the search
+
+The mock transport selects top-level fields the way the Apify dataset API
+does for the "fields" query parameter. Each variant runs in a fresh
+subprocess so the RSS high-water marks do not influence each other.
+
+Usage:
+    python test/bench_field_projection.py                 # synthetic 200-item payload
+    python test/bench_field_projection.py recorded.json   # recorded actor response (JSON array)
+"""
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_stream_decode import synthetic_booking_payload
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+from utils.data_parser import HotelParser
+
+
+def make_client(items: list, transferred: list) -> ApifyClient:
+    def handler(request):
+        fields = request.url.params.get("fields")
+        data = items
+        if fields:
+            keep = fields.split(",")
+            data = [{key: item[key] for key in keep if key in item} for item in items]
+        body = json.dumps(data).encode("utf-8")
+        transferred.append(len(body))
+        return httpx.Response(200, content=body)
+
+    return ApifyClient(
+        "bench-token",
+        RetryConfig(max_retries=1),
+        PoolConfig(http2=False),
+        transport=httpx.MockTransport(handler)
+    )
+
+
+async def search(items: list, projected: bool) -> dict:
+    transferred = []
+    client = make_client(items, transferred)
+    fields = HotelParser.FIELDS if projected else None
+
+    start = time.perf_counter()
+    raw_data = await client.call_actor("voyager~fast-booking-scraper", {}, fields=fields)
+    hotels = HotelParser().parse_hotels(raw_data)
+    elapsed = time.perf_counter() - start
+
+    await client.close()
+    return {"hotels": len(hotels), "bytes": sum(transferred), "seconds": elapsed}
+
+
+def run_variant(path: str, projected: bool) -> dict:
+    """Body of the subprocess: one search, measured"""
+    import logging
+    logging.disable(logging.INFO)
+
+    if path:
+        with open(path, "rb") as f:
+            items = json.load(f)
+    else:
+        items = json.loads(synthetic_booking_payload())
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = asyncio.run(search(items, projected))
+    result["rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+
+    tracemalloc.start()
+    asyncio.run(search(items, projected))
+    result["traced_peak"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--variant":
+        path = sys.argv[3] if len(sys.argv) > 3 else ""
+        print(json.dumps(run_variant(path, sys.argv[2] == "projected")))
+        return
+
+    path = sys.argv[1] if len(sys.argv) > 1 else ""
+    print("🧪 Dataset Field Projection Benchmark")
+    print("=" * 50)
+    print(f"Payload: {path or 'synthetic (200 items)'}")
+
+    for label, variant in [("Complete items", "full"), ("Projected to HotelParser.FIELDS", "projected")]:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--variant", variant] + ([path] if path else []),
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"\n{label}:")
+        print(f"   • Hotels parsed: {result['hotels']}")
+        print(f"   • Bytes transferred: {result['bytes'] / 1024:.1f} KB")
+        print(f"   • Decode + parse time: {result['seconds'] * 1000:.1f}ms")
+        print(f"   • Peak RSS growth: {result['rss_kb'] / 1024:.2f} MB")
+        print(f"   • Peak traced memory: {result['traced_peak'] / 1024 / 1024:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
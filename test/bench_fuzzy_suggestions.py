@@ -0,0 +1,89 @@
+# bench_fuzzy_suggestions.py - Benchmark: "did you mean" suggestions by linear scan vs. the trigram index
+"""
+Suggests places for misspelled city names (one dropped, doubled, swapped
+or replaced character) with
+
+  * major 20:   the old suggestions, SequenceMatcher over the first 20
+                large-airport municipalities (scored twice: filter, sort)
+  * full scan:  the same scoring over every indexed name (first 20
+                queries only; about a second each)
+  * trigram:    Gazetteer.suggest (shared-trigram shortlist, then scoring)
+
+and reports the time per query and recall: how often the misspelled
+place is among the 5 suggestions. The gazetteer is a GeoNames dump when
+a path is given; otherwise the synthetic one of bench_autocomplete.
+
+Usage:
+    python test/bench_fuzzy_suggestions.py [cities15000.txt] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_autocomplete import synthetic_gazetteer, timed
+from test_fuzzy_index import typo
+from utils.fuzzy_index import similarity
+from utils.gazetteer import Gazetteer, fold
+
+
+def scan_suggest(names: list, query: str, limit: int = 5) -> list:
+    scored = [(similarity(query, name), name) for name in names]
+    return [name for score, name in sorted(scored, reverse=True) if score > 0.5][:limit]
+
+
+def major_suggest(cities: list, query: str, limit: int = 5) -> list:
+    """The previous CityResolverService._get_suggestions"""
+    from difflib import SequenceMatcher
+    query = query.lower()
+    suggestions = [city for city in cities if similarity(query, city.lower()) > 0.5]
+    suggestions.sort(key=lambda x: SequenceMatcher(None, query, x.lower()).ratio(), reverse=True)
+    return suggestions[:limit]
+
+
+def main():
+    import logging
+    logging.disable(logging.ERROR)
+
+    rng = random.Random(42)
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    if len(sys.argv) > 1:
+        gazetteer = Gazetteer()
+        gazetteer.load_geonames(sys.argv[1])
+    else:
+        gazetteer = synthetic_gazetteer(rng)
+
+    start = time.perf_counter()
+    gazetteer.build_search_indexes()
+    build_time = time.perf_counter() - start
+
+    # Misspell well-known places: the ones users actually type
+    ranked = sorted(gazetteer.places, key=lambda place: -place.importance)
+    targets = rng.sample(ranked[:2000], queries)
+    typed = [typo(rng, place.name) for place in targets]
+    major = [place.name for place in ranked[:20]]
+    names = list(gazetteer._index)
+
+    def recall(results, found) -> float:
+        return sum(found(target, result) for target, result in zip(targets, results)) / len(results)
+
+    old, old_time, _ = timed(lambda query: major_suggest(major, query), typed)
+    scanned, scan_time, scan_p99 = timed(lambda query: scan_suggest(names, fold(query)), typed[:20])
+    indexed, index_time, index_p99 = timed(gazetteer.suggest, typed)
+
+    print("🧪 Fuzzy Suggestion Benchmark")
+    print("=" * 50)
+    print(f"Places: {len(gazetteer)}, names: {len(names)}, misspelled queries: {queries}")
+    print(f"   • Trigram index build (with prefix index): {build_time * 1000:.0f}ms")
+    print(f"   • Major 20:  {old_time * 1e6:9.1f}µs per query, recall "
+          f"{recall(old, lambda target, result: target.name in result):.0%}")
+    print(f"   • Full scan: {scan_time * 1000:9.1f}ms per query (p99 {scan_p99 * 1000:.1f}ms), recall "
+          f"{recall(scanned, lambda target, result: fold(target.name) in result):.0%}")
+    print(f"   • Trigram:   {index_time * 1e6:9.1f}µs per query (p99 {index_p99 * 1000:.1f}ms), recall "
+          f"{recall(indexed, lambda target, result: target.name in [place.name for place in result]):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench_lazy_combinations.py - Benchmark: eager vs. lazy combination materialization in the scalar path
+"""
+Finds the top 5 outbound × return × accommodation combinations in Python
+
+  * eager: one Combination record per valid combination, sort, slice
+           (the scalar path before index tuples)
+  * lazy:  (-score, outbound, return, accommodation) tuples through
+           heapq.nsmallest, records only for the winners (_scalar_combinations)
+
+and reports time, peak traced memory and the number of Combination records
+built. Both variants must return the same combinations.
+
+Usage:
+    python test/bench_lazy_combinations.py
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import TravelCombinationEngine
+from test_combination_engine import accommodations, flights
+
+SIZES = [(3, 3, 3), (10, 10, 75), (25, 25, 100), (50, 50, 100)]
+NIGHTS, PERSONS, BUDGET = 7, 2, 2500
+
+
+def eager(engine, outbound, back, stays):
+    combinations = []
+    for o in outbound:
+        for r in back:
+            for a in stays:
+                combination = engine._create_single_combination(o, r, a, NIGHTS, PERSONS, BUDGET)
+                if combination:
+                    combinations.append(combination)
+    combinations.sort(key=lambda x: x.score, reverse=True)
+    return combinations[:engine.max_combinations]
+
+
+def lazy(engine, outbound, back, stays):
+    return engine._scalar_combinations(outbound, back, stays, NIGHTS, PERSONS, BUDGET)
+
+
+def measure(fn, engine, *args):
+    built = [0]
+    create = TravelCombinationEngine._create_single_combination
+
+    def counting(self, *inner):
+        built[0] += 1
+        return create(self, *inner)
+
+    engine._create_single_combination = counting.__get__(engine)
+    start = time.perf_counter()
+    result = fn(engine, *args)
+    elapsed = time.perf_counter() - start
+    records = built[0]
+
+    tracemalloc.start()
+    fn(engine, *args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del engine._create_single_combination
+    return result, elapsed, peak, records
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    engine = TravelCombinationEngine(max_combinations=5, strategy="scalar")
+    print("🧪 Lazy Combination Materialization Benchmark (top 5, 7 nights, 2 persons, budget 2500)")
+    print("=" * 50)
+
+    for out_count, ret_count, acc_per_type in SIZES:
+        rng = random.Random(42)
+        args = (flights(rng, out_count), flights(rng, ret_count), accommodations(rng, acc_per_type))
+        total = out_count * ret_count * acc_per_type * 2
+
+        eager_result, eager_time, eager_peak, eager_built = measure(eager, engine, *args)
+        lazy_result, lazy_time, lazy_peak, lazy_built = measure(lazy, engine, *args)
+
+        print(f"\n{total:,} combinations:")
+        print(f"   • Eager: {eager_time * 1000:8.2f}ms, peak {eager_peak / 1024:9.1f} KB, {eager_built:,} records")
+        print(f"   • Lazy:  {lazy_time * 1000:8.2f}ms, peak {lazy_peak / 1024:9.1f} KB, {lazy_built:,} records")
+        print(f"   • Same result: {eager_result == lazy_result}")
+
+
+if __name__ == "__main__":
+    main()
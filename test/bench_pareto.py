@@ -0,0 +1,94 @@
+# bench_pareto.py - Benchmark: Pareto frontier over cost, rating, flight time and stops
+"""
+Computes the Pareto frontier of outbound × return × accommodation with
+
+  * staged skyline: flights, flight pairs and accommodations are reduced to
+                    their skylines before combining (pareto_frontier)
+  * product SFS:    sort-filter skyline over every combination
+  * pairwise:       every combination compared with every other one
+                    (only timed up to PAIRWISE_MAX combinations)
+
+on synthetic inputs of increasing size, and checks that all variants find
+frontiers of the same size.
+
+Usage:
+    python test/bench_pareto.py
+"""
+import math
+import operator
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import TravelCombinationEngine, _skyline
+from test_combination_engine import accommodations, timed_flights
+
+# (10, 10, 75): a typical search - MAX_FLIGHTS per direction, 50 hotels + 100 listings
+SIZES = [(5, 5, 50), (10, 10, 75), (25, 25, 100), (50, 50, 200), (100, 100, 200), (300, 300, 400)]
+PRODUCT_MAX = 1_000_000
+PAIRWISE_MAX = 5_000
+NIGHTS, PERSONS = 7, 2
+
+
+def product_keys(engine, outbound, back, stays) -> list:
+    keys = []
+    for o in outbound:
+        for r in back:
+            for a in stays:
+                c = engine._create_single_combination(o, r, a, NIGHTS, PERSONS, None)
+                minutes = c.flight_minutes if c.flight_minutes is not None else math.inf
+                keys.append((c.total_cost, -a.rating, minutes, c.stops))
+    return keys
+
+
+def dominates(a: tuple, b: tuple) -> bool:
+    return all(map(operator.le, a, b)) and a != b  # map/operator.le compare in C, about 4x faster than a generator
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    engine = TravelCombinationEngine()
+    engine.ACCOMMODATIONS_PER_SOURCE = None  # Scale past the per-source cap of live searches
+    params = {"nights": NIGHTS, "persons": PERSONS, "budget": None}
+    print("🧪 Pareto Frontier Benchmark (7 nights, 2 persons)")
+    print("=" * 50)
+
+    for out_count, ret_count, acc_per_type in SIZES:
+        rng = random.Random(42)
+        outbound, back = timed_flights(rng, out_count), timed_flights(rng, ret_count)
+        stays = accommodations(rng, acc_per_type)
+        total = out_count * ret_count * len(stays)
+
+        frontier, staged_time = timed(
+            engine.pareto_frontier, outbound, back, stays[:acc_per_type], stays[acc_per_type:], params
+        )
+        line = f"{total:>10,} combinations: {len(frontier):3d} on frontier | staged {staged_time * 1000:7.1f}ms"
+
+        if total <= PRODUCT_MAX:
+            keys = product_keys(engine, outbound, back, stays)
+            product, product_time = timed(_skyline, keys)
+            line += f" | product SFS {product_time * 1000:8.1f}ms"
+            same = len(product) == len(frontier)
+            if total <= PAIRWISE_MAX:
+                pairwise, pairwise_time = timed(
+                    lambda: [k for k in keys if not any(dominates(other, k) for other in keys)]
+                )
+                line += f" | pairwise {pairwise_time * 1000:8.0f}ms"
+                same = same and len(pairwise) == len(frontier)
+            line += " | same frontier" if same else " | FRONTIERS DIFFER"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
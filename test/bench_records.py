@@ -0,0 +1,111 @@
+# bench_records.py - Benchmark: memory and allocations of parsed search results
+"""
+Parses one search worth of synthetic actor items (outbound + return
+flights, Booking hotels, Airbnb listings), builds the combinations and
+reports, for the results kept alive until the page is rendered:
+
+  * retained memory:  bytes still allocated after parsing and combining
+  * live blocks:      number of allocations still alive
+  * time:             parse + combine
+
+Raw items are created before tracing starts, so only the parsed results and
+combinations are measured.
+
+Usage:
+    python test/bench_records.py [searches]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import TravelCombinationEngine
+from utils.data_parser import AirbnbParser, FlightParser, HotelParser
+
+AIRLINES = ["Austrian", "Vueling", "Iberia", "Lufthansa", "Ryanair", "easyJet"]
+
+
+def raw_flights(date: str, count: int = 60) -> list:
+    return [{
+        "_carriers": {str(i): {"name": AIRLINES[i % len(AIRLINES)]} for i in range(len(AIRLINES))},
+        "legs": [{
+            "departure": f"{date}T{random.randint(5, 22):02d}:{random.choice([0, 15, 30, 45]):02d}:00",
+            "duration": random.randint(110, 300),
+            "stop_count": random.randint(0, 1),
+            "marketing_carrier_ids": [random.randint(0, len(AIRLINES) - 1)]
+        }],
+        "pricing_options": [
+            {"price": {"amount": random.randint(60, 400)}, "items": [{"url": f"/transport_deeplink/{i}/{j}"}]}
+            for j in range(5)
+        ]
+    } for i in range(count)]
+
+
+def raw_hotels(count: int = 50) -> list:
+    return [{
+        "name": f"Hotel {i}", "price": random.randint(60, 400), "rating": round(random.uniform(6, 9.8), 1),
+        "stars": random.randint(2, 5), "type": random.choice(["hotel", "apartment", "hostel"]),
+        "url": f"https://www.booking.com/hotel/es/hotel-{i}.html", "address": {"full": f"Carrer {i}, Barcelona"},
+        "checkInDate": "2026-07-01", "checkOutDate": "2026-07-08"
+    } for i in range(count)]
+
+
+def raw_airbnb(count: int = 100) -> list:
+    return [{
+        "name": f"Flat {i}", "roomType": random.choice(["entire_home", "private_room"]),
+        "url": f"https://www.airbnb.com/rooms/{i}", "pricing": {"price": f"€ {random.randint(50, 300)}"},
+        "rating": {"average": round(random.uniform(4.0, 5.0), 2), "reviewsCount": random.randint(0, 400)},
+        "coordinates": {"latitude": 41.38 + i / 1000, "longitude": 2.17 + i / 1000},
+        "badges": ["Superhost"] if i % 3 == 0 else [], "subtitles": [f"{1 + i % 3} beds"]
+    } for i in range(count)]
+
+
+def one_search(raw: tuple) -> tuple:
+    outbound_raw, return_raw, hotels_raw, airbnb_raw = raw
+    outbound = FlightParser().parse_flights(outbound_raw)
+    returns = FlightParser().parse_flights(return_raw)
+    hotels = HotelParser().parse_hotels(hotels_raw)
+    airbnb = AirbnbParser().parse_properties(airbnb_raw)
+    combinations = TravelCombinationEngine().create_combinations(
+        outbound, returns, hotels, airbnb, {"nights": 7, "persons": 2, "budget": 2500}
+    )
+    return outbound, returns, hotels, airbnb, combinations
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    random.seed(42)
+    raw = [
+        (raw_flights("2026-07-01"), raw_flights("2026-07-08"), raw_hotels(), raw_airbnb())
+        for _ in range(searches)
+    ]
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    results = [one_search(r) for r in raw]
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    retained = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    kept = sum(len(r[0]) + len(r[1]) + len(r[2]) + len(r[3]) for r in results)
+
+    print("🧪 Parsed Result Records Benchmark")
+    print("=" * 50)
+    print(f"Searches: {searches}, parsed results kept: {kept // searches} per search")
+    print(f"   • Retained memory per search: {retained / searches / 1024:.1f} KB")
+    print(f"   • Live allocations per search: {blocks / searches:.0f}")
+    print(f"   • Parse + combine time per search: {elapsed / searches * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# bench_standin_search.py - Offline load benchmark of the search path against the upstream stand-in
+"""
+Runs concurrent round-trip flight + accommodation searches through the real
+services and ApifyClient, answered by utils/standin.py instead of Apify. Runs
+are deterministic (seeded latency jitter and error injection) and cost no
+Apify credits.
+
+Without a cassette directory, synthetic Skyscanner/Booking/Airbnb cassettes
+are generated. Record real ones with:
+    python -m utils.standin --mode record --cassettes cassettes
+
+Usage:
+    python test/bench_standin_search.py [searches] [concurrency] [cassette_dir] [latency_seconds] [error_rate]
+"""
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.flight_service import FlightService
+from services.hotel_service import AccommodationService
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+from utils.standin import Cassette, CassetteStore, UpstreamProfile, UpstreamStandin
+
+ACTORS = {
+    "jupri~skyscanner-flight": "flights",
+    "voyager~fast-booking-scraper": "hotels",
+    "tri_angle~new-fast-airbnb-scraper": "airbnb"
+}
+
+
+def synthetic_items(kind: str, count: int):
+    random.seed(42)
+    if kind == "flights":
+        return [{
+            "_carriers": {"1": {"name": "Austrian"}},
+            "legs": [{
+                "origin": {"display_code": "VIE" if i % 2 == 0 else "BCN"},
+                "destination": {"display_code": "BCN" if i % 2 == 0 else "VIE"},
+                "departure": f"2026-07-{1 + (i % 2) * 7:02d}T08:30:00",
+                "duration": random.randint(120, 300),
+                "stop_count": random.randint(0, 1),
+                "marketing_carrier_ids": [1]
+            }],
+            "pricing_options": [{"price": {"amount": random.randint(60, 400)}, "items": [{"url": "/transport_deeplink/x"}]}]
+        } for i in range(count)]
+    if kind == "hotels":
+        return [{
+            "name": f"Hotel {i}", "price": random.randint(60, 400), "rating": round(random.uniform(6, 9.8), 1),
+            "stars": random.randint(2, 5), "type": "hotel", "url": f"https://www.booking.com/hotel/{i}.html",
+            "address": {"full": f"Street {i}"}
+        } for i in range(count)]
+    return [{
+        "name": f"Flat {i}", "roomType": "entire_home", "url": f"https://www.airbnb.com/rooms/{i}",
+        "pricing": {"price": f"€ {random.randint(50, 300)}"},
+        "rating": {"average": round(random.uniform(4.0, 5.0), 2), "reviewsCount": random.randint(0, 400)}
+    } for i in range(count)]
+
+
+def synthetic_store(directory: str) -> CassetteStore:
+    store = CassetteStore(directory)
+    for actor, kind in ACTORS.items():
+        store.save(Cassette(
+            upstream="apify", method="POST", path=f"v2/acts/{actor}/run-sync-get-dataset-items",
+            query="", body_digest="", status=200, content_type="application/json",
+            body=json.dumps(synthetic_items(kind, 100))
+        ))
+    return store
+
+
+async def one_search(flights: FlightService, accommodations: AccommodationService, i: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        flights.search_round_trip("VIE", "BCN", "2026-07-01", "2026-07-08"),
+        accommodations.search_all_accommodations(f"City {i}", "2026-07-01", "2026-07-08")
+    )
+    return time.perf_counter() - start
+
+
+async def run(searches: int, concurrency: int, store: CassetteStore, profile: UpstreamProfile):
+    standin = UpstreamStandin(store, profiles={"apify": profile}, seed=1)
+    client = ApifyClient(
+        "bench-token",
+        RetryConfig(max_retries=2, base_delay=0.1),
+        PoolConfig(http2=False),
+        api_url="http://standin/apify/v2",
+        transport=httpx.ASGITransport(app=standin.create_app())
+    )
+    flights, accommodations = FlightService(client), AccommodationService(client)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i):
+        async with semaphore:
+            return await one_search(flights, accommodations, i)
+
+    start = time.perf_counter()
+    latencies = sorted(await asyncio.gather(*(bounded(i) for i in range(searches))))
+    total = time.perf_counter() - start
+    await client.close()
+    return latencies, total, standin.stats
+
+
+def main():
+    import logging
+    logging.disable(logging.WARNING)
+
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    cassette_dir = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != "-" else None
+    latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.2
+    error_rate = float(sys.argv[5]) if len(sys.argv) > 5 else 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CassetteStore(cassette_dir) if cassette_dir else synthetic_store(tmp)
+        profile = UpstreamProfile(latency=latency, latency_jitter=latency / 4, error_rate=error_rate)
+        latencies, total, stats = asyncio.run(run(searches, concurrency, store, profile))
+
+    print("🧪 Offline Search Load Benchmark (upstream stand-in)")
+    print("=" * 50)
+    print(f"Searches: {searches}, concurrency: {concurrency}, Apify latency: {latency}s, error rate: {error_rate}")
+    print(f"   • Throughput: {searches / total:.1f} searches/s")
+    print(f"   • p50: {statistics.median(latencies) * 1000:.0f}ms")
+    print(f"   • p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms")
+    print(f"   • max: {latencies[-1] * 1000:.0f}ms")
+    print(f"   • Upstream requests: {stats['requests']} (misses: {stats['misses']}, injected errors: {stats['injected_errors']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench_stream_decode.py - Benchmark: full response.json() vs. streaming decode for hotel searches
+"""
+Compares peak memory and time of the two ways to turn a Booking.com actor
+response into parsed hotels:
+
+  * full:      response.json() materializes the whole list, then parse_hotels
+  * streaming: the body is decoded item by item and reading stops once the
+               parser has seen HotelParser.MAX_RAW_ITEMS items
+
+The response is served chunk by chunk through an httpx mock transport.
+
+Usage:
+    python test/bench_stream_decode.py                 # synthetic 200-item payload
+    python test/bench_stream_decode.py recorded.json   # recorded actor response (JSON array)
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+from utils.data_parser import HotelParser, parse_pages
+
+CHUNK_SIZE = 16 * 1024
+
+
+def synthetic_booking_payload(items: int = 200) -> bytes:
+    """Booking-like items with nested rooms/options, images and long descriptions"""
+    random.seed(42)
+    data = []
+    for i in range(items):
+        data.append({
+            "name": f"Hotel {i}",
+            "price": random.randint(60, 400),
+            "rating": round(random.uniform(6.0, 9.8), 1),
+            "stars": random.randint(2, 5),
+            "type": "hotel",
+            "url": f"https://www.booking.com/hotel/es/hotel-{i}.html",
+            "address": {"full": f"Carrer {i}, Barcelona", "city": "Barcelona"},
+            "description": "Lorem ipsum dolor sit amet. " * 40,
+            "images": [f"https://cf.bstatic.com/images/hotel/{i}/{j}.jpg" for j in range(30)],
+            "reviews": [{"title": "Great stay", "text": "Very nice. " * 20, "score": 9} for _ in range(10)],
+            "rooms": [
+                {"roomType": f"Room {r}", "options": [{"price": random.randint(60, 400), "policies": ["Free cancellation"] * 3} for _ in range(4)]}
+                for r in range(5)
+            ]
+        })
+    return json.dumps(data).encode("utf-8")
+
+
+def make_client(body: bytes, stream_decode: bool) -> ApifyClient:
+    async def chunks():
+        for i in range(0, len(body), CHUNK_SIZE):
+            yield body[i:i + CHUNK_SIZE]
+
+    def handler(request):
+        return httpx.Response(200, content=chunks())
+
+    return ApifyClient(
+        "bench-token",
+        RetryConfig(max_retries=1),
+        PoolConfig(http2=False),
+        transport=httpx.MockTransport(handler),
+        stream_decode=stream_decode
+    )
+
+
+async def run_full(body: bytes) -> int:
+    client = make_client(body, stream_decode=False)
+    raw_data = await client.call_actor("voyager~fast-booking-scraper", {})
+    hotels = HotelParser().parse_hotels(raw_data)
+    await client.close()
+    return len(hotels)
+
+
+async def run_streaming(body: bytes) -> int:
+    client = make_client(body, stream_decode=True)
+    hotels = await parse_pages(
+        client.iter_actor_pages("voyager~fast-booking-scraper", {}),
+        HotelParser().parse_hotels,
+        max_raw_items=HotelParser.MAX_RAW_ITEMS
+    )
+    await client.close()
+    return len(hotels)
+
+
+def measure(label: str, runner, body: bytes) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    hotels = asyncio.run(runner(body))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n{label}:")
+    print(f"   • Hotels parsed: {hotels}")
+    print(f"   • Time: {elapsed * 1000:.1f}ms")
+    print(f"   • Peak memory: {peak / 1024 / 1024:.2f} MB")
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            body = f.read()
+        source = sys.argv[1]
+    else:
+        body = synthetic_booking_payload()
+        source = "synthetic (200 items)"
+
+    print("🧪 Streaming JSON Decode Benchmark")
+    print("=" * 50)
+    print(f"Payload: {source}, {len(body) / 1024 / 1024:.2f} MB")
+
+    measure("Full response.json()", run_full, body)
+    measure("Streaming decode with early stop", run_streaming, body)
+
+
+if __name__ == "__main__":
+    main()
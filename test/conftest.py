@@ -0,0 +1,14 @@
+# conftest.py - Keeps files the app writes at import time out of the working tree during tests
+import os
+import shutil
+import tempfile
+
+# config.settings creates its directories on import, and main opens its SQLite caches and the
+# gazetteer's learned places there. Point them at a scratch directory before any test imports them.
+SCRATCH_DIRECTORY = tempfile.mkdtemp(prefix="holiday-engine-tests-")
+os.environ["CACHE_DIRECTORY"] = os.path.join(SCRATCH_DIRECTORY, "cache")
+os.environ["OUTPUT_DIRECTORY"] = os.path.join(SCRATCH_DIRECTORY, "output")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH_DIRECTORY, ignore_errors=True)
@@ -0,0 +1,187 @@
+# test_airport_snapshot.py - Tests for the compiled airport snapshot
+import csv
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import utils.airport_snapshot as airport_snapshot
+from services.city_resolver import CityResolverService
+from utils.airport_snapshot import AirportRow, AirportTable, SnapshotError, compile_snapshot, load_airport_table
+
+COLUMNS = ["id", "ident", "type", "name", "latitude_deg", "longitude_deg", "iso_country",
+           "municipality", "scheduled_service", "iata_code"]
+CSV_ROWS = [
+    (1, "LOWG", "medium_airport", "Graz Airport", 46.9911, 15.4396, "AT", "Graz", "yes", "GRZ"),
+    (2, "LOWW", "large_airport", "Vienna International Airport", 48.1103, 16.5697, "AT", "Wien", "yes", "VIE"),
+    (3, "LEPA", "large_airport", "Palma de Mallorca Airport", 39.5517, 2.7388, "ES", "Palma de Mallorca", "yes", "pmi"),
+    (4, "LSZR", "small_airport", "St. Gallen–Altenrhein Airport", 47.4850, 9.5608, "CH", "", "yes", "ACH"),
+    (5, "LOXZ", "medium_airport", "Zeltweg Air Base", 47.2028, 14.7442, "AT", "Zeltweg", "no", ""),
+    (6, "LOGG", "heliport", "Graz Heliport", 47.0, 15.4, "AT", "Graz", "yes", "GRH"),
+    (7, "EDDM", "large_airport", "Munich Airport", 48.3538, 11.7861, "DE", "München", "yes", "MUC"),
+]
+
+
+def write_csv(path, rows=CSV_ROWS) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return write_csv(tmp_path / "airports.csv"), str(tmp_path / "cache" / "airports.snapshot")
+
+
+class TestAirportTable:
+    """The snapshot holds exactly the filtered airports of the CSV"""
+
+    def test_compile_and_read_back(self, paths):
+        csv_path, snapshot_path = paths
+        compile_snapshot(csv_path, snapshot_path)
+        table = AirportTable.open(snapshot_path)
+
+        assert [table.iata(i) for i in range(len(table))] == ["GRZ", "VIE", "PMI", "ACH", "MUC"]
+        position = table.find("MUC")
+        assert table.row(position) == AirportRow("MUC", "Munich Airport", "München", "DE", "large_airport",
+                                                 48.3538, 11.7861)
+        assert table.name(table.find("ACH")) == "St. Gallen–Altenrhein Airport"
+        assert table.find("GRH") is None and table.find("ZZZ") is None and table.find("") is None
+        assert list(table.latitudes) == [46.9911, 48.1103, 39.5517, 47.4850, 48.3538]
+
+        frame = table.to_dataframe()
+        assert frame["iata_code"].tolist() == ["GRZ", "VIE", "PMI", "ACH", "MUC"]
+        assert frame.loc[frame["iata_code"] == "ACH", "municipality"].isna().all()
+        table.close()
+
+    def test_from_dataframe_keeps_missing_values(self):
+        pd = pytest.importorskip("pandas")
+        table = AirportTable.from_dataframe(pd.DataFrame({
+            "iata_code": ["AAA", "BBB"], "latitude_deg": [1.0, float("nan")], "longitude_deg": [2.0, 3.0]
+        }))
+        assert table.find("BBB") == 1 and table.municipality(1) == "" and table.airport_type(1) == ""
+        assert math.isnan(table.latitudes[1])
+
+    @pytest.mark.parametrize("content", [b"", b"AIRPORTS", b"NOTASNAP" + bytes(100)])
+    def test_invalid_files_are_rejected(self, tmp_path, content):
+        path = tmp_path / "broken.snapshot"
+        path.write_bytes(content)
+        with pytest.raises(SnapshotError):
+            AirportTable.open(str(path))
+
+
+class TestLoadAirportTable:
+    """The snapshot is reused while the CSV is unchanged and rebuilt otherwise"""
+
+    def test_reuses_current_snapshot(self, paths, monkeypatch):
+        csv_path, snapshot_path = paths
+        load_airport_table(csv_path, snapshot_path).close()
+        os.utime(csv_path)  # Touched, same content
+
+        def fail(_):
+            raise AssertionError("CSV parsed although the snapshot is current")
+        monkeypatch.setattr(airport_snapshot, "read_passenger_airports", fail)
+        table = load_airport_table(csv_path, snapshot_path)
+        assert len(table) == 5
+        table.close()
+
+    def test_rebuilds_when_csv_changes(self, paths):
+        csv_path, snapshot_path = paths
+        load_airport_table(csv_path, snapshot_path).close()
+        write_csv(csv_path, CSV_ROWS[:2])
+
+        table = load_airport_table(csv_path, snapshot_path)
+        assert [table.iata(i) for i in range(len(table))] == ["GRZ", "VIE"]
+        table.close()
+
+    def test_rebuilds_corrupt_snapshot(self, paths):
+        csv_path, snapshot_path = paths
+        os.makedirs(os.path.dirname(snapshot_path))
+        with open(snapshot_path, "wb") as f:
+            f.write(b"AIRPORTS\x01")
+
+        table = load_airport_table(csv_path, snapshot_path)
+        assert len(table) == 5
+        table.close()
+
+    def test_without_csv_or_snapshot_path(self, paths):
+        csv_path, snapshot_path = paths
+        assert load_airport_table(None, snapshot_path) is None
+        assert len(load_airport_table(csv_path, None)) == 5
+        assert not os.path.exists(snapshot_path)
+
+        load_airport_table(csv_path, snapshot_path).close()
+        os.remove(csv_path)
+        table = load_airport_table(None, snapshot_path)
+        assert len(table) == 5
+        table.close()
+
+
+class TestResolverSnapshot:
+    """The resolver answers from the mapped snapshot"""
+
+    def test_resolver_uses_snapshot(self, paths, monkeypatch):
+        csv_path, snapshot_path = paths
+        compile_snapshot(csv_path, snapshot_path)
+        monkeypatch.chdir(os.path.dirname(snapshot_path))  # No airports.csv on the search path
+
+        resolver = CityResolverService(snapshot_path=snapshot_path)
+        assert len(resolver.airports) == 5
+        assert resolver._is_valid_iata("PMI") and not resolver._is_valid_iata("GRH")
+        assert resolver._get_airport_info("VIE")["municipality"] == "Wien"
+        assert resolver._find_nearest_airport_from_coords(46.8133, 15.2167) == "GRZ"
+        assert resolver.airports_df["iata_code"].tolist() == ["GRZ", "VIE", "PMI", "ACH", "MUC"]
+
+
+class TestAirportLookups:
+    """Indexed lookups answer as the DataFrame filters did, without building a DataFrame"""
+
+    @pytest.fixture
+    def resolver(self, paths, monkeypatch):
+        csv_path, snapshot_path = paths
+        rows = CSV_ROWS + [(8, "LOWK", "small_airport", "Wien Ost Airfield", 48.2, 16.6, "AT", "Wien", "yes", "VIX"),
+                           (9, "XXXX", "large_airport", "Duplicate Graz", 0.0, 0.0, "AT", "Graz", "yes", "GRZ")]
+        compile_snapshot(write_csv(csv_path, rows), snapshot_path)
+        monkeypatch.chdir(os.path.dirname(snapshot_path))
+        return CityResolverService(snapshot_path=snapshot_path)
+
+    def test_iata_and_airport_info(self, resolver):
+        assert resolver._is_valid_iata("GRZ") and resolver._is_valid_iata("VIX")
+        assert not resolver._is_valid_iata("GRH") and not resolver._is_valid_iata("grz")
+        assert resolver._get_airport_info("GRZ") == {
+            'municipality': "Graz", 'name': "Graz Airport", 'country': "AT",
+            'latitude': 46.9911, 'longitude': 15.4396
+        }
+        assert resolver._get_airport_info("ZZZ") == {}
+        assert resolver._airports_df is None
+
+    def test_municipality_and_type_indexes(self, resolver):
+        assert resolver.airports_in_municipality("wien") == ["VIE", "VIX"]
+        assert resolver.airports_in_municipality("MÜNCHEN") == ["MUC"]
+        assert resolver.airports_in_municipality("Zeltweg") == []
+
+        stats = resolver.get_cache_stats()
+        assert (stats['large_airports'], stats['medium_airports'], stats['small_airports']) == (4, 1, 2)
+        assert stats['airports_loaded'] == 7
+        assert resolver._airports_df is None
+
+    def test_suggestions_without_pandas(self, resolver):
+        assert resolver._get_suggestions("Palma") == ["Palma de Mallorca"]
+        assert resolver._get_suggestions("Gratz") == ["Graz"]  # Medium airports count too now
+        assert resolver._get_suggestions("Mnchen") == ["München"]
+        assert resolver._airports_df is None
+
+    def test_resolve_endpoint_skips_pandas(self, resolver, monkeypatch):
+        from fastapi.testclient import TestClient
+        import main
+
+        monkeypatch.setattr(main, "city_resolver", resolver)
+        monkeypatch.setattr(type(resolver), "airports_df", property(lambda _: pytest.fail("DataFrame on request path")))
+        client = TestClient(main.app)
+        body = client.get("/api/cities/resolve", params={"city": "vix"}).json()
+        assert body["success"] and body["iata"] == "VIX"
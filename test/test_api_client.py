@@ -0,0 +1,369 @@
+# test_api_client.py - Tests for the pooled Apify API client
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+
+
+def make_client(handler, **kwargs) -> ApifyClient:
+    """Create an ApifyClient backed by an in-memory mock transport"""
+    return ApifyClient(
+        "test-token",
+        RetryConfig(max_retries=2, base_delay=0.0),
+        PoolConfig(http2=False),
+        transport=httpx.MockTransport(handler),
+        **kwargs
+    )
+
+
+class TestConnectionPool:
+    """The client should reuse one pooled httpx client per process"""
+
+    def test_calls_share_one_http_client(self):
+        def handler(request):
+            return httpx.Response(200, json=[{"id": 1}])
+
+        async def scenario():
+            client = make_client(handler)
+            await client.start()
+            pool = client._client
+            await client.call_actor("jupri~skyscanner-flight", {"a": 1})
+            await client.call_actor("jupri~skyscanner-flight", {"a": 2})
+            await client.health_check()
+            same_pool = client._client is pool
+            await client.close()
+            return same_pool, client._client
+
+        same_pool, after_close = asyncio.run(scenario())
+        assert same_pool, "All calls should go through the same pooled client"
+        assert after_close is None, "close() should release the pool"
+
+    def test_client_is_created_lazily_without_startup_hook(self):
+        def handler(request):
+            return httpx.Response(200, json=[{"id": 1}, {"id": 2}])
+
+        async def scenario():
+            client = make_client(handler)
+            result = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            await client.close()
+            return result
+
+        assert asyncio.run(scenario()) == [{"id": 1}, {"id": 2}]
+
+    def test_custom_api_url_is_used(self):
+        seen_urls = []
+
+        def handler(request):
+            seen_urls.append(str(request.url))
+            return httpx.Response(200, json=[])
+
+        async def scenario():
+            client = make_client(handler, api_url="http://127.0.0.1:9000/v2/")
+            await client.call_actor("jupri~skyscanner-flight", {})
+            await client.close()
+
+        asyncio.run(scenario())
+        assert seen_urls == ["http://127.0.0.1:9000/v2/acts/jupri~skyscanner-flight/run-sync-get-dataset-items"]
+
+
+class TestCoalescing:
+    """Identical concurrent actor calls should trigger a single upstream run"""
+
+    def test_identical_calls_share_one_run(self):
+        seen = []
+
+        async def handler(request):
+            seen.append(request.content)
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, json=[{"id": 1}])
+
+        async def scenario():
+            client = make_client(handler)
+            results = await asyncio.gather(
+                client.call_actor("jupri~skyscanner-flight", {"origin.0": "VIE", "target.0": "BCN"}),
+                client.call_actor("jupri~skyscanner-flight", {"target.0": "BCN", "origin.0": "VIE"}),
+                client.call_actor("jupri~skyscanner-flight", {"origin.0": "GRZ", "target.0": "BCN"})
+            )
+            await client.close()
+            return results, client.get_stats()
+
+        results, stats = asyncio.run(scenario())
+        assert len(seen) == 2
+        assert results[0] == results[1] and results[0] is not results[1]
+        assert stats["coalescing"]["coalesced_calls"] == 1
+
+
+class FakeAsyncRunApi:
+    """Mock Apify API for async runs: the dataset grows by one page per status poll"""
+
+    def __init__(self, total_items=7, items_per_poll=3):
+        self.items = [{"id": i} for i in range(total_items)]
+        self.available = 0
+        self.items_per_poll = items_per_poll
+        self.aborted = False
+        self.requests = []
+
+    def handler(self, request):
+        path = request.url.path
+        self.requests.append((request.method, path))
+
+        if request.method == "POST" and path.endswith("/runs"):
+            return httpx.Response(201, json={"data": {"id": "run1", "defaultDatasetId": "ds1", "status": "RUNNING"}})
+
+        if path.endswith("/abort"):
+            self.aborted = True
+            return httpx.Response(200, json={"data": {"status": "ABORTED"}})
+
+        if path.endswith("/actor-runs/run1"):
+            self.available = min(len(self.items), self.available + self.items_per_poll)
+            status = "SUCCEEDED" if self.available == len(self.items) else "RUNNING"
+            return httpx.Response(200, json={"data": {"status": status}})
+
+        if path.endswith("/datasets/ds1/items"):
+            offset = int(request.url.params["offset"])
+            limit = int(request.url.params["limit"])
+            return httpx.Response(200, json=self.items[offset:min(offset + limit, self.available)])
+
+        return httpx.Response(404)
+
+
+class TestAsyncRunMode:
+    """Async runs should poll the run and page through the dataset"""
+
+    def make_async_client(self, api, page_size=2):
+        from utils.api_client import AsyncRunConfig
+        return make_client(api.handler, run_config=AsyncRunConfig(page_size=page_size, poll_interval=0.0))
+
+    def test_pages_are_streamed_until_run_finishes(self):
+        api = FakeAsyncRunApi()
+
+        async def scenario():
+            client = self.make_async_client(api)
+            pages = [page async for page in client.iter_actor_pages("voyager~fast-booking-scraper", {})]
+            await client.close()
+            return pages
+
+        pages = asyncio.run(scenario())
+        assert [item["id"] for page in pages for item in page] == list(range(7))
+        assert all(len(page) <= 2 for page in pages)
+        assert not api.aborted
+
+    def test_call_actor_collects_all_pages(self):
+        api = FakeAsyncRunApi()
+
+        async def scenario():
+            client = self.make_async_client(api)
+            data = await client.call_actor("voyager~fast-booking-scraper", {})
+            await client.close()
+            return data
+
+        assert len(asyncio.run(scenario())) == 7
+
+    def test_early_stop_aborts_run(self):
+        from utils.data_parser import parse_pages
+        api = FakeAsyncRunApi(total_items=100)
+
+        async def scenario():
+            client = self.make_async_client(api)
+            parsed = await parse_pages(
+                client.iter_actor_pages("voyager~fast-booking-scraper", {}),
+                lambda page: page,
+                max_raw_items=4
+            )
+            await client.close()
+            return parsed
+
+        parsed = asyncio.run(scenario())
+        assert [item["id"] for item in parsed] == [0, 1, 2, 3]
+        assert api.aborted
+
+    def test_max_items_option_limits_reads(self):
+        api = FakeAsyncRunApi(total_items=20, items_per_poll=10)
+
+        async def scenario():
+            client = self.make_async_client(api, page_size=3)
+            data = await client.call_actor("voyager~fast-booking-scraper", {}, {"maxItems": 5})
+            await client.close()
+            return data
+
+        assert len(asyncio.run(scenario())) == 5
+        assert api.aborted
+
+
+class TestStreamDecodeMode:
+    """Sync responses should be decoded incrementally and read only as far as needed"""
+
+    def test_parser_limit_stops_reading(self):
+        from utils.data_parser import parse_pages
+        body = json.dumps([{"id": i, "rooms": [{"options": [{"price": i}]}]} for i in range(500)]).encode()
+        sent = []
+
+        async def body_stream():
+            for i in range(0, len(body), 1024):
+                sent.append(i)
+                yield body[i:i + 1024]
+
+        def handler(request):
+            return httpx.Response(200, content=body_stream())
+
+        async def scenario():
+            client = make_client(handler, stream_decode=True)
+            parsed = await parse_pages(
+                client.iter_actor_pages("voyager~fast-booking-scraper", {}),
+                lambda page: page,
+                max_raw_items=50
+            )
+            await client.close()
+            return parsed
+
+        parsed = asyncio.run(scenario())
+        assert [item["id"] for item in parsed] == list(range(50))
+        assert len(sent) * 1024 < len(body) / 2, "Reading should stop long before the body ends"
+
+    def test_full_stream_is_cached(self):
+        from utils.cache import TwoTierCache
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(200, json=[{"id": 1}, {"id": 2}])
+
+        async def scenario():
+            client = make_client(handler, stream_decode=True, cache=TwoTierCache())
+            first = [page async for page in client.iter_actor_pages("jupri~skyscanner-flight", {})]
+            second = [page async for page in client.iter_actor_pages("jupri~skyscanner-flight", {})]
+            await client.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert sum(first, []) == sum(second, []) == [{"id": 1}, {"id": 2}]
+        assert len(calls) == 1
+
+
+
+class TestFieldProjection:
+    """Only the requested dataset fields should be transferred and returned"""
+
+    def test_fields_are_requested_and_nested_paths_projected(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=[{
+                "name": "Hotel A",
+                "address": {"full": "Main St 1", "geo": {"lat": 1.0}},
+                "rooms": [{"options": [{"price": 90, "policies": ["x"]}], "images": ["a.jpg"]}]
+            }])
+
+        async def scenario():
+            client = make_client(handler)
+            data = await client.call_actor(
+                "voyager~fast-booking-scraper", {}, fields=["name", "address.full", "rooms.options.price"]
+            )
+            await client.close()
+            return data
+
+        data = asyncio.run(scenario())
+        assert requests[0].url.params["fields"] == "address,name,rooms"
+        assert data == [{"name": "Hotel A", "address": {"full": "Main St 1"}, "rooms": [{"options": [{"price": 90}]}]}]
+
+    def test_async_run_pages_request_fields(self):
+        api = FakeAsyncRunApi(total_items=3, items_per_poll=3)
+        params = []
+        handler = api.handler
+
+        def recording_handler(request):
+            if request.url.path.endswith("/items"):
+                params.append(request.url.params.get("fields"))
+            return handler(request)
+
+        async def scenario():
+            from utils.api_client import AsyncRunConfig
+            client = make_client(recording_handler, run_config=AsyncRunConfig(page_size=5, poll_interval=0.0))
+            data = await client.call_actor("voyager~fast-booking-scraper", {}, fields=["id"])
+            await client.close()
+            return data
+
+        assert asyncio.run(scenario()) == [{"id": 0}, {"id": 1}, {"id": 2}]
+        assert params and all(value == "id" for value in params)
+
+    def test_projected_and_full_results_are_cached_apart(self):
+        from utils.cache import TwoTierCache
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.params.get("fields"))
+            return httpx.Response(200, json=[{"id": 1, "name": "A"}])
+
+        async def scenario():
+            client = make_client(handler, cache=TwoTierCache())
+            projected = await client.call_actor("jupri~skyscanner-flight", {}, fields=["id"])
+            full = await client.call_actor("jupri~skyscanner-flight", {})
+            await client.close()
+            return projected, full
+
+        projected, full = asyncio.run(scenario())
+        assert projected == [{"id": 1}]
+        assert full == [{"id": 1, "name": "A"}]
+        assert calls == ["id", None]
+
+class TestAdaptiveConcurrency:
+    """Throttling responses should shrink the per-actor limit and be retried after Retry-After"""
+
+    def test_429_with_retry_after_lowers_limit(self):
+        from utils.concurrency import ConcurrencyConfig
+        responses = [
+            httpx.Response(429, headers={"Retry-After": "0.05"}, text="rate limited"),
+            httpx.Response(200, json=[{"id": 1}])
+        ]
+        seen_at = []
+
+        def handler(request):
+            seen_at.append(time.monotonic())
+            return responses.pop(0)
+
+        async def scenario():
+            client = make_client(handler, concurrency_config=ConcurrencyConfig(initial_limit=8.0))
+            data = await client.call_actor("jupri~skyscanner-flight", {})
+            await client.close()
+            return data, client.get_stats()["concurrency"]["jupri~skyscanner-flight"]
+
+        data, stats = asyncio.run(scenario())
+        assert data == [{"id": 1}]
+        assert stats["limit"] == 4
+        assert stats["overloads"] == 1
+        assert seen_at[1] - seen_at[0] >= 0.04, "Retry should wait for Retry-After"
+
+    def test_non_retryable_error_is_not_retried(self):
+        from utils.api_client import ApiClientError
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(400, text="bad input")
+
+        async def scenario():
+            client = make_client(handler)
+            try:
+                await client.call_actor("jupri~skyscanner-flight", {})
+            except ApiClientError as e:
+                return str(e)
+            finally:
+                await client.close()
+
+        assert "Non-retryable" in asyncio.run(scenario())
+        assert len(calls) == 1
+
+    def test_retry_after_http_date_is_parsed(self):
+        from email.utils import formatdate
+        from utils.api_client import ApifyClient
+        seconds = ApifyClient._parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+        assert 25 <= seconds <= 31
+        assert ApifyClient._parse_retry_after("garbage") is None
@@ -0,0 +1,184 @@
+# test_cache.py - Tests for the two-tier response cache
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+from utils.cache import TwoTierCache, CacheConfig
+
+
+class TestTwoTierCache:
+    """Memory LRU + SQLite behaviour"""
+
+    def test_memory_lru_evicts_least_recently_used(self):
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(memory_max_entries=2))
+            await cache.set("a", [1])
+            await cache.set("b", [2])
+            await cache.get("a")  # a is now most recently used
+            await cache.set("c", [3])
+            return [await cache.get(k) for k in ("a", "b", "c")]
+
+        a, b, c = asyncio.run(scenario())
+        assert a.value == [1] and b is None and c.value == [3]
+
+    def test_memory_tier_is_bounded_by_size(self):
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(memory_max_bytes=40))
+            await cache.set("a", ["x" * 20])
+            await cache.set("b", ["y" * 20])
+            return cache.get_stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["memory_entries"] == 1
+        assert stats["memory_bytes"] <= 40
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+
+        async def write():
+            cache = TwoTierCache(CacheConfig(disk_path=path))
+            await cache.set("flights", [{"price": 99}])
+            cache.close()
+
+        async def read():
+            cache = TwoTierCache(CacheConfig(disk_path=path))
+            entry = await cache.get("flights")
+            stats = cache.get_stats()
+            cache.close()
+            return entry, stats
+
+        asyncio.run(write())
+        entry, stats = asyncio.run(read())
+        assert entry.value == [{"price": 99}]
+        assert stats["disk_hits"] == 1
+
+    def test_warm_loads_recent_entries(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+
+        async def scenario():
+            writer = TwoTierCache(CacheConfig(disk_path=path, stale_ttl=0.0))
+            for key in ("a", "b", "c"):
+                await writer.set(key, [key])
+            await writer.set("dead", ["x"], ttl=-1.0)
+            writer.close()
+
+            cache = TwoTierCache(CacheConfig(disk_path=path, stale_ttl=0.0, memory_max_entries=2))
+            loaded = await cache.warm()
+            entry = await cache.get("c")
+            return loaded, list(cache._memory), entry, cache.get_stats()
+
+        loaded, keys, entry, stats = asyncio.run(scenario())
+        assert loaded == 2 and keys == ["b", "c"]
+        assert entry.value == ["c"] and stats["memory_hits"] == 1
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+
+        async def scenario():
+            first = TwoTierCache(CacheConfig(disk_path=path), namespace="one")
+            second = TwoTierCache(CacheConfig(disk_path=path), namespace="two")
+            await first.set("k", [1])
+            return await second.get("k")
+
+        assert asyncio.run(scenario()) is None
+
+    def test_expired_entries_are_stale_then_gone(self):
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(stale_ttl=0.05))
+            await cache.set("k", [1], ttl=0.0)
+            stale = await cache.get("k")
+            await asyncio.sleep(0.06)
+            gone = await cache.get("k")
+            return stale, gone
+
+        stale, gone = asyncio.run(scenario())
+        assert stale is not None and not stale.is_fresh
+        assert gone is None
+
+    def test_disk_tier_evicts_by_size(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(disk_path=path, disk_max_bytes=100, memory_max_entries=1))
+            for i in range(10):
+                await cache.set(f"k{i}", ["x" * 30])
+            rows = cache._disk_execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM cache_entries")
+            return rows[0], await cache.get("k9")
+
+        (total, count), newest = asyncio.run(scenario())
+        assert total <= 100 and count < 10
+        assert newest is not None
+
+    def test_disk_sweeps_are_batched(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        sweeps = []
+
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(disk_path=path))
+            original = cache._disk_evict
+            cache._disk_evict = lambda: (sweeps.append(1), original())
+            for i in range(TwoTierCache.SWEEP_EVERY + 1):
+                await cache.set(f"k{i}", [i])
+            indexes = cache._disk_execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            return {name for name, in indexes}
+
+        indexes = asyncio.run(scenario())
+        assert len(sweeps) == 1  # Under the size limit: only the periodic sweep
+        assert "idx_cache_stale_until" in indexes
+
+
+class TestCachedActorCalls:
+    """ApifyClient should serve repeated calls from the cache"""
+
+    def make_client(self, handler, cache):
+        return ApifyClient(
+            "test-token",
+            RetryConfig(max_retries=1),
+            PoolConfig(http2=False),
+            transport=httpx.MockTransport(handler),
+            cache=cache,
+            cache_ttls={"jupri~skyscanner-flight": 0.0}
+        )
+
+    def test_repeated_call_hits_cache(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(200, json=[{"price": 100}])
+
+        async def scenario():
+            client = self.make_client(handler, TwoTierCache())
+            first = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            second = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            await client.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == [{"price": 100}]
+        assert len(calls) == 1
+
+    def test_stale_entry_is_served_and_revalidated(self):
+        prices = iter([100, 120])
+
+        def handler(request):
+            return httpx.Response(200, json=[{"price": next(prices)}])
+
+        async def scenario():
+            client = self.make_client(handler, TwoTierCache())
+            await client.call_actor("jupri~skyscanner-flight", {"origin.0": "VIE"})  # TTL 0 -> stale at once
+            stale = await client.call_actor("jupri~skyscanner-flight", {"origin.0": "VIE"})
+            await asyncio.gather(*client._revalidations.values())
+            entry = await client.cache.get(next(iter(client.cache._memory)))
+            await client.close()
+            return stale, entry.value
+
+        stale, refreshed = asyncio.run(scenario())
+        assert stale == [{"price": 100}]
+        assert refreshed == [{"price": 120}]
@@ -0,0 +1,171 @@
+# test_circuit_breaker.py - Tests for circuit breakers and fast-fail of actor calls
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, ApiClientError, CircuitOpenError, PoolConfig, RetryConfig
+from utils.cache import TwoTierCache, CacheConfig
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitBreakerRegistry
+
+
+class TestCircuitBreaker:
+    """Closed -> open -> half-open -> closed/open state machine"""
+
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("actor", CircuitBreakerConfig(failure_threshold=3))
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()  # Resets the count
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow_request()
+        assert breaker.get_stats()["rejected"] == 1
+
+    def test_half_open_allows_one_probe(self):
+        breaker = CircuitBreaker("actor", CircuitBreakerConfig(failure_threshold=1, recovery_timeout=0.01))
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow_request()
+        assert breaker.state == "half_open"
+        assert not breaker.allow_request(), "Only one probe at a time"
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.get_stats()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("actor", CircuitBreakerConfig(failure_threshold=1, recovery_timeout=0.01))
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert breaker.retry_in > 0
+
+    def test_released_probe_can_be_taken_again(self):
+        breaker = CircuitBreaker("actor", CircuitBreakerConfig(failure_threshold=1, recovery_timeout=0.01))
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow_request()
+        breaker.release_probe()
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+    def test_registry_reports_open_circuits(self):
+        registry = CircuitBreakerRegistry(CircuitBreakerConfig(failure_threshold=1))
+        registry.get("reddit").record_failure()
+        registry.get("nominatim").record_success()
+        assert registry.open_circuits() == ["reddit"]
+        assert registry.get("reddit") is registry.get("reddit")
+
+
+class TestActorFastFail:
+    """An open actor breaker should fail calls without touching the network"""
+
+    def make_client(self, handler, **kwargs):
+        return ApifyClient(
+            "test-token",
+            RetryConfig(max_retries=3, base_delay=0.0),
+            PoolConfig(http2=False),
+            transport=httpx.MockTransport(handler),
+            breakers=CircuitBreakerRegistry(CircuitBreakerConfig(failure_threshold=3, recovery_timeout=60.0)),
+            **kwargs
+        )
+
+    def test_open_circuit_fails_fast(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(500, text="actor crashed")
+
+        async def scenario():
+            client = self.make_client(handler)
+            errors = []
+            for _ in range(2):
+                try:
+                    await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+                except ApiClientError as e:
+                    errors.append(e)
+            await client.close()
+            return errors, client.get_stats()["circuit_breakers"]
+
+        errors, breakers = asyncio.run(scenario())
+        assert len(calls) == 3, "Second call must not reach the API"
+        assert isinstance(errors[1], CircuitOpenError)
+        assert breakers["voyager~fast-booking-scraper"]["state"] == "open"
+        assert breakers["apify"]["state"] == "closed", "A failing actor must not open the host breaker"
+
+    def test_gateway_errors_open_host_breaker(self):
+        def handler(request):
+            return httpx.Response(503, text="unavailable")
+
+        async def scenario():
+            client = self.make_client(handler)
+            try:
+                await client.call_actor("jupri~skyscanner-flight", {})
+            except ApiClientError:
+                pass
+            try:
+                await client.call_actor("voyager~fast-booking-scraper", {})
+            except CircuitOpenError as e:
+                return str(e)
+            finally:
+                await client.close()
+
+        assert "apify" in asyncio.run(scenario())
+
+    def test_open_actor_does_not_take_the_host_probe(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json=[{"id": 1}])
+
+        async def scenario():
+            client = self.make_client(handler)
+            host = client.breakers.get("apify")
+            for _ in range(3):
+                host.record_failure()
+                client.breakers.get("jupri~skyscanner-flight").record_failure()
+            host._opened_at -= 61  # Recovery timeout passed: the next call probes the host
+            try:
+                await client.call_actor("jupri~skyscanner-flight", {})
+            except CircuitOpenError as e:
+                rejected = str(e)
+            result = await client.call_actor("voyager~fast-booking-scraper", {})
+            await client.close()
+            return rejected, result, host.state
+
+        rejected, result, host_state = asyncio.run(scenario())
+        assert "jupri~skyscanner-flight" in rejected
+        assert result == [{"id": 1}], "A healthy actor must get the host's probe"
+        assert host_state == "closed"
+        assert len(calls) == 1
+
+    def test_open_circuit_falls_back_to_expired_cache(self):
+        responses = [httpx.Response(200, json=[{"price": 100}])] + [httpx.Response(500) for _ in range(3)]
+
+        def handler(request):
+            return responses.pop(0)
+
+        async def scenario():
+            cache = TwoTierCache(CacheConfig(stale_ttl=0.0))
+            client = self.make_client(handler, cache=cache, cache_ttls={"voyager~fast-booking-scraper": 0.0})
+            first = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            await asyncio.sleep(0.01)  # Entry is now past its stale window
+            fallback = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            fast = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            await client.close()
+            return first, fallback, fast, cache.get_stats()
+
+        first, fallback, fast, stats = asyncio.run(scenario())
+        assert first == fallback == fast == [{"price": 100}]
+        assert stats["fallback_hits"] == 2
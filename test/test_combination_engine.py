@@ -0,0 +1,237 @@
+# test_combination_engine.py - Tests for the vectorized combination engine
+import os
+import random
+import sys
+from dataclasses import replace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import TravelCombinationEngine
+from utils.records import AirbnbListing, Flight, Hotel
+
+
+def flights(rng: random.Random, count: int) -> list:
+    return [
+        Flight(airline="Austrian", price=rng.randint(40, 400), time="08:30", duration="2h 05m",
+               stops=0, source="Skyscanner", url="", date="2026-07-01")
+        for _ in range(count)
+    ]
+
+
+def accommodations(rng: random.Random, count: int) -> list:
+    hotels = [
+        Hotel(name=f"Hotel {i}", price=rng.randint(40, 300), rating=round(rng.uniform(6, 9.8), 1),
+              location="", type="hotel", source="Booking.com", url="", checkin="", checkout="")
+        for i in range(count)
+    ]
+    listings = [
+        AirbnbListing(name=f"Flat {i}", price=rng.randint(40, 300), rating=round(rng.uniform(3.5, 5), 1),
+                      review_count=0, location="", property_type="Entire home", person_capacity=2,
+                      badges=(), url="", source="Airbnb", type="airbnb")
+        for i in range(count)
+    ]
+    return hotels + listings
+
+
+def selection(combinations, outbound, back, stays) -> list:
+    """(outbound, return, accommodation) indices of each combination, matched by identity"""
+    def index(items, item):
+        return next(i for i, candidate in enumerate(items) if candidate is item)
+    return [
+        (index(outbound, c.outbound_flight), index(back, c.return_flight), index(stays, c.accommodation))
+        for c in combinations
+    ]
+
+
+class TestVectorizedEngine:
+    """The vectorized path must return exactly what the scalar path returns over the same candidates"""
+
+    @pytest.mark.parametrize("budget", [None, 900, 1500, 2500])
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_matches_scalar_path(self, budget, seed):
+        rng = random.Random(seed)
+        outbound, back, stays = flights(rng, 12), flights(rng, 9), accommodations(rng, 15)
+        engine = TravelCombinationEngine(max_combinations=5)
+
+        scalar = engine._scalar_combinations(outbound, back, stays, 4, 2, budget)
+        vectorized = engine._vectorized_combinations(outbound, back, stays, 4, 2, budget)
+
+        assert vectorized == scalar
+        assert selection(vectorized, outbound, back, stays) == selection(scalar, outbound, back, stays)
+
+    def test_ties_match_across_blocks(self):
+        rng = random.Random(7)
+        outbound, back, stays = flights(rng, 10), flights(rng, 10), accommodations(rng, 10)
+        engine = TravelCombinationEngine(max_combinations=20)
+        engine.CHUNK_SIZE = 50  # Several blocks
+
+        # A generous budget gives many equal scores
+        scalar = engine._scalar_combinations(outbound, back, stays, 2, 1, 100000)
+        vectorized = engine._vectorized_combinations(outbound, back, stays, 2, 1, 100000)
+        pruned = engine._branch_and_bound_combinations(outbound, back, stays, 2, 1, 100000)
+        assert len({c.score for c in scalar}) < len(scalar)  # Ties are actually exercised
+        assert selection(vectorized, outbound, back, stays) == selection(scalar, outbound, back, stays)
+        assert selection(pruned, outbound, back, stays) == selection(scalar, outbound, back, stays)
+
+    def test_considers_candidates_beyond_top_three(self):
+        rng = random.Random(5)
+        outbound = flights(rng, 5)
+        cheapest = Flight(airline="Vueling", price=10, time="06:00", duration="2h 00m",
+                          stops=0, source="Skyscanner", url="", date="2026-07-01")
+        combinations = TravelCombinationEngine().create_combinations(
+            outbound + [cheapest], flights(rng, 3), accommodations(rng, 3), [],
+            {"nights": 2, "persons": 2, "budget": None}
+        )
+        assert combinations[0].outbound_flight is cheapest
+
+    def test_nothing_within_budget(self):
+        rng = random.Random(1)
+        engine = TravelCombinationEngine()
+        assert engine._vectorized_combinations(flights(rng, 3), flights(rng, 3), accommodations(rng, 3), 7, 4, 100) == []
+
+
+class TestScalarEngine:
+    """The scalar path scores index tuples and only materializes the winners"""
+
+    @pytest.mark.parametrize("budget", [None, 900, 2500])
+    def test_matches_materializing_every_combination(self, budget):
+        rng = random.Random(3)
+        outbound, back, stays = flights(rng, 6), flights(rng, 5), accommodations(rng, 6)
+        engine = TravelCombinationEngine(max_combinations=8)
+
+        everything = [
+            engine._create_single_combination(o, r, a, 5, 2, budget)
+            for o in outbound for r in back for a in stays
+        ]
+        expected = sorted((c for c in everything if c), key=lambda c: (-c.score, c.total_cost))[:8]
+        assert engine._scalar_combinations(outbound, back, stays, 5, 2, budget) == expected
+
+    def test_only_winners_are_materialized(self, monkeypatch):
+        rng = random.Random(4)
+        engine = TravelCombinationEngine(max_combinations=5)
+        built = []
+        create = engine._create_single_combination
+        monkeypatch.setattr(engine, "_create_single_combination", lambda *args: built.append(args) or create(*args))
+
+        result = engine._scalar_combinations(flights(rng, 10), flights(rng, 10), accommodations(rng, 10), 7, 2, None)
+        assert len(result) == len(built) == 5
+
+
+def brute_force(engine, outbound, back, stays, nights, persons, budget):
+    """All valid combinations ordered by score, then total cost, then loop order"""
+    ranked = []
+    for o, outbound_flight in enumerate(outbound):
+        for r, return_flight in enumerate(back):
+            for a, stay in enumerate(stays):
+                combination = engine._create_single_combination(outbound_flight, return_flight, stay, nights, persons, budget)
+                if combination:
+                    ranked.append(((-combination.score, combination.total_cost, o, r, a), combination))
+    ranked.sort(key=lambda entry: entry[0])
+    return [combination for _, combination in ranked[:engine.max_combinations]]
+
+
+class TestBranchAndBound:
+    """Best-first search must find the same top combinations as brute force"""
+
+    @pytest.mark.parametrize("budget", [None, 700, 900, 1500, 2500])
+    @pytest.mark.parametrize("seed", [1, 2, 3, 4])
+    def test_matches_brute_force(self, budget, seed):
+        rng = random.Random(seed)
+        outbound, back, stays = flights(rng, 11), flights(rng, 8), accommodations(rng, 14)
+        engine = TravelCombinationEngine(max_combinations=7)
+
+        result = engine._branch_and_bound_combinations(outbound, back, stays, 4, 2, budget)
+        assert result == brute_force(engine, outbound, back, stays, 4, 2, budget)
+
+        scalar = engine._scalar_combinations(outbound, back, stays, 4, 2, budget)
+        assert selection(result, outbound, back, stays) == selection(scalar, outbound, back, stays)
+
+    def test_fewer_valid_combinations_than_requested(self):
+        rng = random.Random(9)
+        outbound, back, stays = flights(rng, 2), flights(rng, 2), accommodations(rng, 1)
+        engine = TravelCombinationEngine(max_combinations=50)
+        result = engine._branch_and_bound_combinations(outbound, back, stays, 1, 1, None)
+        assert len(result) == 2 * 2 * 2
+
+    def test_unknown_strategy_is_rejected(self):
+        with pytest.raises(ValueError):
+            TravelCombinationEngine(strategy="random")
+
+
+def timed_flights(rng: random.Random, count: int) -> list:
+    """Flights with varying duration (some unknown) and stops"""
+    return [
+        Flight(airline="Vueling", price=rng.randint(40, 400), time="08:30", duration="", stops=rng.randint(0, 2),
+               source="Skyscanner", url="", date="2026-07-01",
+               duration_minutes=rng.choice([None, rng.randint(90, 600)]), departure_minutes=510)
+        for _ in range(count)
+    ]
+
+
+def brute_force_frontier(engine, outbound, back, stays, nights, persons, budget):
+    """Every valid combination that no other valid combination dominates, by pairwise comparison"""
+    def criteria(c):
+        minutes = c.flight_minutes if c.flight_minutes is not None else float("inf")
+        return (c.total_cost, -c.accommodation.rating, minutes, c.stops)
+
+    valid = [
+        engine._create_single_combination(o, r, a, nights, persons, budget)
+        for o in outbound for r in back for a in stays
+    ]
+    keys = [criteria(c) for c in valid if c]
+    return sorted(
+        key for key in keys
+        if not any(other != key and all(x <= y for x, y in zip(other, key)) for other in keys)
+    )
+
+
+class TestParetoFrontier:
+    """The staged skyline must find exactly the non-dominated combinations"""
+
+    @pytest.mark.parametrize("budget", [None, 900, 1500])
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_matches_pairwise_dominance(self, budget, seed):
+        rng = random.Random(seed)
+        outbound, back, stays = timed_flights(rng, 9), timed_flights(rng, 7), accommodations(rng, 8)
+        hotels, listings = stays[:8], stays[8:]
+        engine = TravelCombinationEngine()
+
+        frontier = engine.pareto_frontier(outbound, back, hotels, listings, {"nights": 3, "persons": 2, "budget": budget})
+
+        criteria = [
+            (c.total_cost, -c.accommodation.rating, c.flight_minutes if c.flight_minutes is not None else float("inf"), c.stops)
+            for c in frontier
+        ]
+        assert criteria == brute_force_frontier(engine, outbound, back, stays, 3, 2, budget)
+        assert [c.total_cost for c in frontier] == sorted(c.total_cost for c in frontier)
+
+    def test_combination_carries_flight_minutes_and_stops(self):
+        rng = random.Random(5)
+        outbound = replace(timed_flights(rng, 1)[0], duration_minutes=130, stops=1)
+        back = replace(timed_flights(rng, 1)[0], duration_minutes=145, stops=0)
+        stay = accommodations(rng, 1)[0]
+        engine = TravelCombinationEngine()
+
+        combination = engine._create_single_combination(outbound, back, stay, 2, 1, None)
+        assert (combination.flight_minutes, combination.stops) == (275, 1)
+
+        unknown = engine._create_single_combination(outbound, replace(back, duration_minutes=None), stay, 2, 1, None)
+        assert unknown.flight_minutes is None
+
+    def test_empty_inputs(self):
+        rng = random.Random(6)
+        assert TravelCombinationEngine().pareto_frontier([], timed_flights(rng, 2), [], [], {"nights": 1, "persons": 1}) == []
+
+
+class TestScoreRounding:
+    """Vectorized scores must round exactly like round(score, 1)"""
+
+    def test_halfway_cases_match_python(self):
+        np = pytest.importorskip("numpy")
+        values = [0.0 + rating * 10 + 50 * (1 - min(total / 2000, 1.0))
+                  for rating in (3.5, 4.1, 8.7, 9.4) for total in range(0, 2500)]
+        values += [i / 40 for i in range(4000)]
+        rounded = TravelCombinationEngine._round_scores(np.array(values))
+        assert rounded.tolist() == [round(value, 1) for value in values]
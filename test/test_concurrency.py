@@ -0,0 +1,80 @@
+# test_concurrency.py - Tests for the adaptive (AIMD) concurrency limiter
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.concurrency import AdaptiveConcurrencyLimiter, ConcurrencyConfig
+
+
+class TestAimd:
+    """The limit should grow additively and shrink multiplicatively"""
+
+    def test_success_grows_limit_by_one_per_window(self):
+        limiter = AdaptiveConcurrencyLimiter("actor", ConcurrencyConfig(initial_limit=4.0))
+        for _ in range(4):
+            limiter.on_success()
+        assert limiter.current_limit == 4  # 4 + 4 * (~1/4) is just below 5
+        for _ in range(2):
+            limiter.on_success()
+        assert limiter.current_limit == 5
+
+    def test_limit_is_capped(self):
+        limiter = AdaptiveConcurrencyLimiter("actor", ConcurrencyConfig(initial_limit=2.0, max_limit=3.0))
+        for _ in range(100):
+            limiter.on_success()
+        assert limiter.current_limit == 3
+
+    def test_overload_halves_limit_once_per_cooldown(self):
+        limiter = AdaptiveConcurrencyLimiter("actor", ConcurrencyConfig(initial_limit=16.0, decrease_cooldown=60.0))
+        limiter.on_overload()
+        limiter.on_overload()
+        limiter.on_overload()
+        assert limiter.current_limit == 8
+        assert limiter.get_stats()["overloads"] == 3
+
+    def test_limit_never_drops_below_minimum(self):
+        limiter = AdaptiveConcurrencyLimiter("actor", ConcurrencyConfig(initial_limit=4.0, min_limit=2.0, decrease_cooldown=0.0))
+        for _ in range(10):
+            limiter.on_overload()
+        assert limiter.current_limit == 2
+
+
+class TestGate:
+    """Calls beyond the limit should queue until a slot frees up"""
+
+    def test_concurrent_calls_are_bounded(self):
+        async def scenario():
+            limiter = AdaptiveConcurrencyLimiter("actor", ConcurrencyConfig(initial_limit=2.0))
+            running = []
+            peak = []
+
+            async def call():
+                async with limiter.slot():
+                    running.append(1)
+                    peak.append(len(running))
+                    await asyncio.sleep(0.01)
+                    running.pop()
+
+            tasks = [asyncio.create_task(call()) for _ in range(6)]
+            await asyncio.sleep(0.001)
+            queued = limiter.get_stats()["queued"]
+            await asyncio.gather(*tasks)
+            return max(peak), queued, limiter.in_flight
+
+        peak, queued, in_flight = asyncio.run(scenario())
+        assert peak == 2
+        assert queued == 4
+        assert in_flight == 0
+
+    def test_retry_after_pauses_new_calls(self):
+        async def scenario():
+            limiter = AdaptiveConcurrencyLimiter("actor")
+            limiter.on_overload(retry_after=0.05)
+            start = time.monotonic()
+            async with limiter.slot():
+                return time.monotonic() - start
+
+        assert asyncio.run(scenario()) >= 0.04
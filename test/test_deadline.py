@@ -0,0 +1,148 @@
+# test_deadline.py - Tests for request deadline propagation
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, AsyncRunConfig, DeadlineExceededError, PoolConfig, RetryConfig
+from utils.deadline import Deadline
+
+
+class TestDeadline:
+    """Budget arithmetic"""
+
+    def test_remaining_and_cap(self):
+        deadline = Deadline(10.0)
+        assert 9.0 < deadline.remaining <= 10.0
+        assert deadline.cap(300.0) <= 10.0
+        assert deadline.cap(1.0) == 1.0
+        assert not deadline.expired
+
+    def test_expired_deadline(self):
+        deadline = Deadline(0.0)
+        assert deadline.expired
+        assert deadline.remaining == 0.0
+
+    def test_wait_for_times_out(self):
+        async def scenario():
+            await Deadline(0.01).wait_for(asyncio.sleep(1))
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(scenario())
+
+
+class TestClientDeadline:
+    """Retries, backoff and streaming should stop at the deadline"""
+
+    def make_client(self, handler, **kwargs):
+        return ApifyClient(
+            "test-token",
+            RetryConfig(max_retries=3, base_delay=5.0, jitter=False),
+            PoolConfig(http2=False),
+            transport=httpx.MockTransport(handler),
+            **kwargs
+        )
+
+    def test_backoff_longer_than_budget_is_skipped(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(500)
+
+        async def scenario():
+            client = self.make_client(handler)
+            start = time.monotonic()
+            try:
+                await client.call_actor("voyager~fast-booking-scraper", {}, deadline=Deadline(1.0))
+            except DeadlineExceededError as e:
+                return str(e), time.monotonic() - start
+            finally:
+                await client.close()
+
+        error, elapsed = asyncio.run(scenario())
+        assert len(calls) == 1, "A 10s backoff does not fit into a 1s budget"
+        assert elapsed < 0.5
+        assert "API returned status 500" in error
+
+    def test_slow_request_is_cut_at_deadline(self):
+        async def handler(request):
+            await asyncio.sleep(5)
+            return httpx.Response(200, json=[])
+
+        async def scenario():
+            client = self.make_client(handler)
+            start = time.monotonic()
+            try:
+                await client.call_actor("voyager~fast-booking-scraper", {}, deadline=Deadline(0.1))
+            except DeadlineExceededError:
+                return time.monotonic() - start
+            finally:
+                await client.close()
+
+        assert asyncio.run(scenario()) < 1.0
+
+    def test_async_run_returns_partial_pages(self):
+        aborted = []
+
+        def handler(request):
+            path = request.url.path
+            if path.endswith("/runs"):
+                return httpx.Response(201, json={"data": {"id": "run1", "defaultDatasetId": "ds1"}})
+            if path.endswith("/abort"):
+                aborted.append(1)
+                return httpx.Response(200, json={})
+            if path.endswith("/actor-runs/run1"):
+                return httpx.Response(200, json={"data": {"status": "RUNNING"}})
+            offset = int(request.url.params["offset"])
+            return httpx.Response(200, json=[{"id": 1}] if offset == 0 else [])
+
+        async def scenario():
+            client = self.make_client(handler, run_config=AsyncRunConfig(page_size=10, poll_interval=0.05))
+            pages = [page async for page in client.iter_actor_pages("voyager~fast-booking-scraper", {}, deadline=Deadline(0.3))]
+            await client.close()
+            return pages
+
+        assert asyncio.run(scenario()) == [[{"id": 1}]]
+        assert aborted, "The unfinished run should be aborted"
+
+    def test_coalesced_run_follows_the_latest_deadline(self):
+        calls = []
+        cached = []
+
+        class RecordingCache:
+            async def get(self, key, include_expired=False):
+                return None
+
+            async def set(self, key, value, ttl=None):
+                cached.append(key)
+
+        async def handler(request):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return httpx.Response(500) if len(calls) == 1 else httpx.Response(200, json=[{"id": 1}])
+
+        async def scenario():
+            client = ApifyClient(
+                "test-token", RetryConfig(max_retries=3, base_delay=0.3, jitter=False), PoolConfig(http2=False),
+                transport=httpx.MockTransport(handler), cache=RecordingCache()
+            )
+            results = await asyncio.gather(
+                client.call_actor("voyager~fast-booking-scraper", {}, deadline=Deadline(0.15)),
+                client.call_actor("voyager~fast-booking-scraper", {}, deadline=Deadline(2.0)),
+                client.call_actor("voyager~fast-booking-scraper", {}, deadline=Deadline(2.0)),
+                return_exceptions=True
+            )
+            await client.close()
+            return results, client._run_deadlines
+
+        (first, second, third), run_deadlines = asyncio.run(scenario())
+        assert isinstance(first, DeadlineExceededError)
+        assert second == third == [{"id": 1}], "The first caller's budget must not end the shared run"
+        assert len(calls) == 2 and len(cached) == 1
+        assert run_deadlines == {}
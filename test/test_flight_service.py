@@ -0,0 +1,104 @@
+# test_flight_service.py - Tests for batched multi-leg flight searches
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.flight_service import FlightService
+
+
+def skyscanner_item(origin, destination, date, price, carrier="Austrian"):
+    """Minimal raw item in the jupri~skyscanner-flight output format"""
+    return {
+        "_carriers": {"1": {"name": carrier}},
+        "legs": [{
+            "origin": {"display_code": origin},
+            "destination": {"display_code": destination},
+            "departure": f"{date}T08:30:00",
+            "duration": 150,
+            "stop_count": 0,
+            "marketing_carrier_ids": [1]
+        }],
+        "pricing_options": [{"price": {"amount": price}, "items": [{"url": "/transport_deeplink/x"}]}]
+    }
+
+
+class FakeApifyClient:
+    """Records actor inputs and answers from a per-call list of results"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.inputs = []
+
+    async def iter_actor_pages(self, actor_name, input_data, options=None, deadline=None, fields=None):
+        self.inputs.append(input_data)
+        self.fields = fields
+        data = self.responses.pop(0)
+        if data:
+            yield data
+
+
+class TestBatchedRoundTrip:
+    """Round trips should be requested as one run and demultiplexed per leg"""
+
+    def test_round_trip_uses_one_run(self):
+        client = FakeApifyClient([[
+            skyscanner_item("VIE", "BCN", "2030-08-15", 120),
+            skyscanner_item("BCN", "VIE", "2030-08-20", 90),
+            skyscanner_item("VIE", "BCN", "2030-08-15", 80),
+        ]])
+        service = FlightService(client)
+
+        result = asyncio.run(service.search_round_trip("VIE", "BCN", "2030-08-15", "2030-08-20"))
+
+        assert len(client.inputs) == 1
+        assert client.inputs[0]["origin.1"] == "BCN" and client.inputs[0]["depart.1"] == "2030-08-20"
+        assert [f["price"] for f in result["outbound"]] == [80, 120]
+        assert [f["price"] for f in result["return"]] == [90]
+
+    def test_missing_leg_falls_back_to_separate_run(self):
+        client = FakeApifyClient([
+            [skyscanner_item("VIE", "BCN", "2030-08-15", 120)],
+            [skyscanner_item("BCN", "VIE", "2030-08-20", 95)],
+        ])
+        service = FlightService(client)
+
+        result = asyncio.run(service.search_round_trip("VIE", "BCN", "2030-08-15", "2030-08-20"))
+
+        assert len(client.inputs) == 2
+        assert "origin.1" not in client.inputs[1]
+        assert [f["price"] for f in result["outbound"]] == [120]
+        assert [f["price"] for f in result["return"]] == [95]
+
+    def test_batching_can_be_disabled(self):
+        client = FakeApifyClient([
+            [skyscanner_item("VIE", "BCN", "2030-08-15", 120)],
+            [skyscanner_item("BCN", "VIE", "2030-08-20", 95)],
+        ])
+        service = FlightService(client, batch_legs=False)
+
+        asyncio.run(service.search_round_trip("VIE", "BCN", "2030-08-15", "2030-08-20"))
+
+        assert all("origin.1" not in actor_input for actor_input in client.inputs)
+
+    def test_items_without_codes_are_matched_by_date(self):
+        item = skyscanner_item("VIE", "BCN", "2030-08-20", 70)
+        del item["legs"][0]["origin"], item["legs"][0]["destination"]
+
+        buckets = FlightService(None).parser.split_by_leg(
+            [item], [("VIE", "BCN", "2030-08-15"), ("BCN", "VIE", "2030-08-20")]
+        )
+        assert [len(b) for b in buckets] == [0, 1]
+
+    def test_multi_leg_and_undated_items_are_dropped(self):
+        outbound = skyscanner_item("VIE", "BCN", "2030-08-15", 120)
+        multi_city = skyscanner_item("VIE", "BCN", "2030-08-15", 210)
+        multi_city["legs"].append(skyscanner_item("BCN", "VIE", "2030-08-20", 0)["legs"][0])
+        undated = skyscanner_item("VIE", "BCN", "2030-08-15", 50)
+        undated["legs"][0] = {"id": "unknown"}
+
+        buckets = FlightService(None).parser.split_by_leg(
+            [multi_city, undated, outbound], [("VIE", "BCN", "2030-08-15"), ("BCN", "VIE", "2030-08-20")]
+        )
+        assert buckets == [[outbound], []]
@@ -0,0 +1,84 @@
+# test_fuzzy_index.py - Tests for typo-tolerant city suggestions
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from test_gazetteer import AIRPORTS
+from utils.airport_snapshot import AirportTable
+from utils.fuzzy_index import TrigramIndex, similarity, trigrams
+from utils.gazetteer import Gazetteer, Place
+
+
+def typo(rng: random.Random, name: str) -> str:
+    """One dropped, doubled, swapped or replaced character"""
+    i = rng.randrange(len(name) - 1)
+    kind = rng.choice(["drop", "double", "swap", "replace"])
+    if kind == "drop":
+        return name[:i] + name[i + 1:]
+    if kind == "double":
+        return name[:i] + name[i] + name[i:]
+    if kind == "swap":
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice("aeiouknrst") + name[i + 1:]
+
+
+class TestTrigramIndex:
+    """Shortlisting by shared trigrams must find what a full similarity scan finds"""
+
+    def test_trigrams(self):
+        assert trigrams("rom") == {"  r", " ro", "rom", "om "}
+        assert trigrams("graz") & trigrams("gratz") == {"  g", " gr", "gra"}
+
+    def test_finds_best_match_of_full_scan(self):
+        rng = random.Random(7)
+        syllables = ["ber", "lin", "wa", "graz", "san", "ta", "mar", "ia", "ko", "burg", "dorf", "no"]
+        names = sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(1200)})
+        index = TrigramIndex(names)
+
+        hits = 0
+        for name in rng.sample(names, 80):
+            query = typo(rng, name)
+            best = max(similarity(query, other) for other in names)
+            found = index.search(query, limit=5)
+            assert found and all(score == similarity(query, names[p]) for score, p in found), query
+            hits += found[0][0] == best
+        assert hits >= 78  # Shortlisting is approximate; these names share unusually many trigrams
+
+    def test_no_match(self):
+        index = TrigramIndex(["graz", "wien"])
+        assert index.search("xyz") == []
+        assert index.search("linz") == []
+        assert TrigramIndex([]).search("graz") == []
+
+
+class TestSuggestions:
+    """Gazetteer suggestions: misspellings and aliases, one entry per place"""
+
+    def gazetteer(self) -> Gazetteer:
+        gazetteer = Gazetteer()
+        gazetteer.add_airports(AirportTable.from_rows(AIRPORTS))
+        gazetteer.add(Place("Wien", 48.2085, 16.3721, "AT", 1691468, "geonames", 0.89), ["Vienna", "Viena"])
+        gazetteer.add(Place("Barcelona", 41.3888, 2.159, "ES", 1620343, "geonames", 0.88))
+        gazetteer.add(Place("Barcelos", 41.5388, -8.6151, "PT", 20625, "geonames", 0.6))
+        return gazetteer
+
+    def test_typos_and_aliases(self):
+        gazetteer = self.gazetteer()
+        assert [p.name for p in gazetteer.suggest("Barcelna")][0] == "Barcelona"
+        assert [p.name for p in gazetteer.suggest("Viena")] == ["Wien"]  # Not the airport's "Vienna" as well
+        assert [p.name for p in gazetteer.suggest("Munhc")] == ["Munich"]
+        assert gazetteer.suggest("Qqqq") == []
+        assert gazetteer.suggest("") == []
+
+    def test_indexes_follow_bulk_loads(self):
+        gazetteer = Gazetteer()
+        gazetteer.add(Place("Graz", 47.0707, 15.4395, "AT", 291072, "geonames", 0.78))
+        assert [p.name for p in gazetteer.suggest("Salzbrug")] == []
+
+        gazetteer.add_airports(AirportTable.from_rows(AIRPORTS))
+        assert [p.name for p in gazetteer.suggest("Salzbrug")] == ["Salzburg"]
+
+        gazetteer.learn("Salzburg Stadt", "Salzburg Stadt", 47.8, 13.04, "AT")  # Learned after the build: not suggested
+        assert [p.name for p in gazetteer.suggest("Salzbrug")] == ["Salzburg"]
@@ -0,0 +1,252 @@
+# test_gazetteer.py - Tests for offline geocoding, the rate-limited Nominatim fallback and the resolution cache
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.city_resolver import CityResolverService
+from utils.airport_snapshot import AirportRow, AirportTable
+from utils.cache import CacheConfig, TwoTierCache
+from utils.gazetteer import Gazetteer, Place, fold, name_keys
+from utils.rate_limiter import RateLimiter
+
+# geonameid, name, asciiname, alternatenames, lat, lon, feature class, feature code, country, cc2,
+# admin1-4, population, elevation, dem, timezone, modified
+GEONAMES = [
+    ("2761369", "Vienna", "Vienna", "Bech,Viena,Vienne,Wien,Вена,ウィーン", "48.20849", "16.37208", "P", "PPLC", "AT",
+     "", "09", "900", "", "", "1691468", "", "193", "Europe/Vienna", "2023-01-01"),
+    ("2988507", "Paris", "Paris", "Lutetia,Parigi,Париж", "48.85341", "2.3488", "P", "PPLC", "FR",
+     "", "11", "75", "751", "75056", "2138551", "", "42", "Europe/Paris", "2023-01-01"),
+    ("4717560", "Paris", "Paris", "", "33.66094", "-95.55551", "P", "PPLA2", "US",
+     "", "TX", "277", "", "", "24782", "", "183", "America/Chicago", "2023-01-01"),
+    ("2867714", "München", "Munchen", "Monaco di Baviera,Munich", "48.13743", "11.57549", "P", "PPLA", "DE",
+     "", "02", "091", "09162", "09162000", "1260391", "", "524", "Europe/Berlin", "2023-01-01"),
+    ("2780741", "Deutschlandsberg", "Deutschlandsberg", "", "46.81472", "15.21528", "P", "PPLA2", "AT",
+     "", "06", "603", "", "", "8000", "", "372", "Europe/Vienna", "2023-01-01"),
+    ("7873305", "Wiener Wald", "Wiener Wald", "", "48.1", "16.1", "L", "FRST", "AT",
+     "", "", "", "", "", "0", "", "", "Europe/Vienna", "2023-01-01"),
+]
+
+AIRPORTS = [
+    AirportRow("GRZ", "Graz Airport", "Graz", "AT", "medium_airport", 46.9911, 15.4396),
+    AirportRow("VIE", "Vienna International Airport", "Vienna", "AT", "large_airport", 48.1103, 16.5697),
+    AirportRow("CDG", "Charles de Gaulle Airport", "Paris", "FR", "large_airport", 49.0097, 2.5479),
+    AirportRow("MUC", "Munich Airport", "Munich", "DE", "large_airport", 48.3538, 11.7861),
+    AirportRow("SZG", "Salzburg Airport", "Salzburg", "AT", "medium_airport", 47.7933, 13.0043),
+]
+
+
+@pytest.fixture
+def geonames_file(tmp_path):
+    path = tmp_path / "cities.txt"
+    path.write_text("".join("\t".join(row) + "\n" for row in GEONAMES), encoding="utf-8")
+    return str(path)
+
+
+class FakeGeolocator:
+    """Stands in for geopy's Nominatim and counts calls"""
+
+    def __init__(self, places=None):
+        self.places = places or {}
+        self.calls = []
+
+    def geocode(self, query, timeout=None, addressdetails=False):
+        self.calls.append(query)
+        if query in self.places:
+            lat, lon, *raw = self.places[query]
+            return SimpleNamespace(latitude=lat, longitude=lon, address=query, raw=raw[0] if raw else {})
+        return None
+
+
+def resolver_with(gazetteer: Gazetteer, geolocator: FakeGeolocator, limiter: RateLimiter = None,
+                  **options) -> CityResolverService:
+    resolver = CityResolverService(gazetteer=gazetteer, nominatim_limiter=limiter or RateLimiter("nominatim", 0.0),
+                                   **options)
+    resolver.airports = AirportTable.from_rows(AIRPORTS)
+    resolver._index_airports()
+    resolver.gazetteer.add_airports(resolver.airports)
+    resolver.geolocator = geolocator
+    return resolver
+
+
+class TestGazetteer:
+    """Folded names, alternate spellings and population ranking"""
+
+    def test_name_folding(self):
+        assert fold("Saint-Étienne") == "saint etienne"
+        assert name_keys("München") == ["muenchen", "munchen"]
+        assert name_keys("  Graz ") == ["graz"]
+
+    def test_geonames_import(self, geonames_file):
+        gazetteer = Gazetteer()
+        assert gazetteer.load_geonames(geonames_file) == 5  # Forest skipped
+
+        assert gazetteer.lookup("wien").name == "Vienna"
+        assert gazetteer.lookup("Muenchen") == gazetteer.lookup("MUNCHEN") == gazetteer.lookup("Munich")
+        assert gazetteer.lookup("Paris").country == "FR"
+        assert gazetteer.lookup("Paris, US").country == "US"
+        assert gazetteer.lookup("Deutschlandsberg, Austria").name == "Deutschlandsberg"
+        assert gazetteer.lookup("Вена") is None  # Non-Latin alternates are not indexed
+        assert gazetteer.lookup("Wiener Wald") is None
+
+        small = Gazetteer()
+        assert small.load_geonames(geonames_file, min_population=100000) == 3
+
+    def test_airport_municipalities_rank_below_geonames(self, geonames_file):
+        gazetteer = Gazetteer()
+        gazetteer.add_airports(AirportTable.from_rows(AIRPORTS))
+        assert gazetteer.lookup("Paris") == Place("Paris", 49.0097, 2.5479, "FR", 0, "airports", 0.75)
+
+        gazetteer.load_geonames(geonames_file)
+        assert gazetteer.lookup("Paris").source == "geonames"
+        assert gazetteer.lookup("Salzburg").source == "airports"
+
+    def test_learned_places_persist(self, tmp_path):
+        path = str(tmp_path / "cache" / "learned.tsv")
+        gazetteer = Gazetteer(learned_path=path)
+        gazetteer.learn("port de soller", "Port de Sóller", 39.7944, 2.6847, "es", 0.42)
+        gazetteer.learn("Port de Soller", "Port de Sóller", 39.7944, 2.6847, "es", 0.42)  # Known: not written again
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("Half a line\t39.")
+
+        reloaded = Gazetteer(learned_path=path)
+        assert len(reloaded) == 1
+        assert reloaded.lookup("port de soller") == Place("Port de Sóller", 39.7944, 2.6847, "ES", 0, "nominatim", 0.42)
+        with open(path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 2  # The half line included
+
+    def test_queries_are_lookup_only_aliases(self):
+        gazetteer = Gazetteer()
+        gazetteer.add(Place("Wien", 48.2085, 16.3721, "AT", 1691468, "geonames", 0.89))
+        gazetteer.build_search_indexes()
+
+        leibnitz = gazetteer.learn("Leibnitz Stiermark", "Leibnitz", 46.7833, 15.5333, "at", 0.45)
+        assert gazetteer.lookup("leibnitz stiermark") == leibnitz == gazetteer.lookup("Leibnitz")
+        assert [p.name for p in gazetteer.complete("leib")] == ["Leibnitz"]
+        assert gazetteer.complete("leibnitz s") == []
+
+        gazetteer.build_search_indexes()
+        assert "leibnitz stiermark" not in gazetteer._fuzzy_index.names
+
+        # A known place under Nominatim's name is reused, not duplicated
+        assert gazetteer.learn("Wien Innere Stadt", "Wien", 48.2084, 16.3725, "at").source == "geonames"
+        assert len(gazetteer) == 2
+        assert gazetteer.complete("wien i") == []
+
+    def test_learned_places_file_is_capped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("utils.gazetteer.LEARNED_MAX_BYTES", 40)
+        path = str(tmp_path / "learned.tsv")
+        gazetteer = Gazetteer(learned_path=path)
+        gazetteer.learn("Leibnitz", "Leibnitz", 46.7833, 15.5333, "AT")
+        gazetteer.learn("Feldbach", "Feldbach", 46.95, 15.8833, "AT")
+
+        assert gazetteer.lookup("Feldbach") is not None  # Kept in memory
+        assert [p.name for p in Gazetteer(learned_path=path).places] == ["Leibnitz"]
+
+
+class TestRateLimiter:
+    """Calls are spaced by the interval; callers beyond max_wait are turned away"""
+
+    def test_spacing_and_rejection(self):
+        async def scenario():
+            limiter = RateLimiter("test", interval=0.05, max_wait=0.12)
+            start = time.monotonic()
+            granted = await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+            return granted, time.monotonic() - start, limiter.get_stats()
+
+        granted, elapsed, stats = asyncio.run(scenario())
+        assert granted == [True, True, True, False, False]
+        assert 0.1 <= elapsed < 0.5
+        assert (stats["granted"], stats["rejected"]) == (3, 2)
+
+
+class TestOfflineResolution:
+    """The resolver geocodes in-process and only falls back to Nominatim for unknown places"""
+
+    def test_gazetteer_hit_skips_nominatim(self, geonames_file):
+        gazetteer = Gazetteer()
+        gazetteer.load_geonames(geonames_file)
+        geolocator = FakeGeolocator()
+        resolver = resolver_with(gazetteer, geolocator)
+
+        assert asyncio.run(resolver.resolve_to_iata("Deutschlandsberg"))[0] == "GRZ"
+        assert asyncio.run(resolver.resolve_to_iata("Salzburg"))[0] == "SZG"
+        assert geolocator.calls == []
+
+    def test_nominatim_answers_are_learned(self, tmp_path):
+        learned_path = str(tmp_path / "learned.tsv")
+        nominatim = {"name": "Leibnitz", "importance": 0.45, "address": {"town": "Leibnitz", "country_code": "at"}}
+        geolocator = FakeGeolocator({"Leibnitz Steiermark": (46.7833, 15.5333, nominatim)})
+        resolver = resolver_with(Gazetteer(learned_path=learned_path), geolocator)
+        running_worker = resolver_with(Gazetteer(learned_path=learned_path), FakeGeolocator())
+
+        assert asyncio.run(resolver._geocode_location("Leibnitz Steiermark"))["lat"] == 46.7833
+        assert asyncio.run(resolver._geocode_location("leibnitz steiermark"))["lat"] == 46.7833
+        assert asyncio.run(resolver._geocode_location("Nowhere")) is None
+        assert geolocator.calls == ["Leibnitz Steiermark", "Nowhere"]
+        assert resolver.gazetteer.lookup("Leibnitz") == Place("Leibnitz", 46.7833, 15.5333, "AT", 0, "nominatim", 0.45)
+
+        new_worker = resolver_with(Gazetteer(learned_path=learned_path), FakeGeolocator())
+        for worker in (running_worker, new_worker):
+            assert asyncio.run(worker.resolve_to_iata("Leibnitz Steiermark"))[0] == "GRZ"
+            assert worker.geolocator.calls == []
+
+    def test_rate_limited_fallback(self):
+        geolocator = FakeGeolocator({"Leibnitz": (46.7833, 15.5333), "Feldbach": (46.95, 15.8833)})
+        resolver = resolver_with(Gazetteer(), geolocator, RateLimiter("nominatim", interval=10.0, max_wait=1.0))
+
+        async def scenario():
+            return await asyncio.gather(resolver._geocode_location("Leibnitz"), resolver._geocode_location("Feldbach"))
+
+        first, second = asyncio.run(scenario())
+        assert first is not None and second is None
+        assert geolocator.calls == ["Leibnitz"]
+        assert resolver.get_cache_stats()["nominatim_rate_limit"]["rejected"] == 1
+
+
+class TestResolutionCache:
+    """Geocoded resolutions persist across workers; only definitive failures are cached"""
+
+    def test_shared_and_warm_loaded(self, tmp_path):
+        config = CacheConfig(default_ttl=3600, stale_ttl=0, fallback_ttl=0, disk_path=str(tmp_path / "cities.sqlite3"))
+        first = resolver_with(Gazetteer(), FakeGeolocator({"Leibnitz": (46.7833, 15.5333)}),
+                              cache=TwoTierCache(config, namespace="city_resolution"))
+        assert asyncio.run(first.resolve_to_iata("Leibnitz")) == ("GRZ", "Graz", [])
+        asyncio.run(first.resolve_to_iata("graz"))  # Common city: not cached
+        first.cache.close()
+
+        restarted = resolver_with(Gazetteer(), FakeGeolocator(), cache=TwoTierCache(config, namespace="city_resolution"))
+        assert asyncio.run(restarted.warm_cache()) == 1
+        assert asyncio.run(restarted.resolve_to_iata("LEIBNITZ ")) == ("GRZ", "Graz", [])
+        assert restarted.geolocator.calls == []
+        stats = restarted.get_cache_stats()
+        assert (stats["cache_size"], stats["cache"]["memory_hits"], stats["cache"]["disk_enabled"]) == (1, 1, True)
+
+    def test_negative_caching(self):
+        geolocator = FakeGeolocator()
+        resolver = resolver_with(Gazetteer(), geolocator)
+        first = asyncio.run(resolver.resolve_to_iata("Nowhereville"))
+        assert asyncio.run(resolver.resolve_to_iata("nowhereville")) == (None, "Nowhereville", first[2])
+        assert geolocator.calls == ["Nowhereville"]
+        assert resolver.get_cache_stats()["cache"]["negative_hits"] == 1
+
+        expiring = resolver_with(Gazetteer(), FakeGeolocator(), negative_ttl=0)
+        asyncio.run(expiring.resolve_to_iata("Nowhereville"))
+        asyncio.run(expiring.resolve_to_iata("Nowhereville"))
+        assert expiring.geolocator.calls == ["Nowhereville", "Nowhereville"]
+
+    def test_throttled_lookups_are_not_cached(self):
+        geolocator = FakeGeolocator({"Leibnitz": (46.7833, 15.5333), "Feldbach": (46.95, 15.8833)})
+        resolver = resolver_with(Gazetteer(), geolocator, RateLimiter("nominatim", interval=10.0, max_wait=0.1))
+
+        assert asyncio.run(resolver.resolve_to_iata("Leibnitz"))[0] == "GRZ"
+        assert asyncio.run(resolver.resolve_to_iata("Feldbach"))[0] is None  # No Nominatim slot
+        assert resolver.get_cache_stats()["cache"]["writes"] == 1
+
+        resolver.nominatim_limiter = RateLimiter("nominatim", 0.0)
+        assert asyncio.run(resolver.resolve_to_iata("Feldbach"))[0] == "GRZ"
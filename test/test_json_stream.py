@@ -0,0 +1,70 @@
+# test_json_stream.py - Tests for the incremental JSON array decoder
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.json_stream import JsonArrayStreamDecoder
+
+
+def decode_in_chunks(text, chunk_size):
+    decoder = JsonArrayStreamDecoder()
+    items = []
+    for i in range(0, len(text), chunk_size):
+        items.extend(decoder.feed(text[i:i + chunk_size]))
+    items.extend(decoder.close())
+    return items
+
+
+class TestJsonArrayStreamDecoder:
+    """Items must be decoded exactly, whatever the chunk boundaries"""
+
+    SAMPLE = [
+        {"name": "Hotel \"Central\"", "price": 120, "rooms": [{"options": [{"price": 99.5}]}]},
+        {"name": "Casa [Sol] {1}", "price": None, "rating": 8.7},
+        12345,
+        "plain string",
+        True
+    ]
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, 10_000])
+    def test_roundtrip_for_any_chunk_size(self, chunk_size):
+        text = json.dumps(self.SAMPLE, indent=2)
+        assert decode_in_chunks(text, chunk_size) == self.SAMPLE
+
+    def test_random_chunking(self):
+        text = json.dumps([{"id": i, "tags": ["a"] * (i % 5)} for i in range(200)])
+        random.seed(7)
+        decoder = JsonArrayStreamDecoder()
+        items, pos = [], 0
+        while pos < len(text):
+            step = random.randint(1, 50)
+            items.extend(decoder.feed(text[pos:pos + step]))
+            pos += step
+        items.extend(decoder.close())
+        assert [item["id"] for item in items] == list(range(200))
+
+    def test_items_are_available_before_stream_ends(self):
+        decoder = JsonArrayStreamDecoder()
+        assert decoder.feed('[{"id": 1}, {"id"') == [{"id": 1}]
+        assert decoder.feed(': 2}, {"id": 3}') == [{"id": 2}, {"id": 3}]
+        assert not decoder.finished
+        assert decoder.feed("]") == []
+        assert decoder.finished
+
+    def test_empty_array(self):
+        assert decode_in_chunks("  [ ]  ", 1) == []
+
+    def test_truncated_stream_raises(self):
+        decoder = JsonArrayStreamDecoder()
+        decoder.feed('[{"id": 1}, {"id": 2')
+        with pytest.raises(ValueError):
+            decoder.close()
+
+    def test_non_array_raises(self):
+        with pytest.raises(ValueError):
+            JsonArrayStreamDecoder().feed('{"error": "not a list"}')
@@ -0,0 +1,106 @@
+# test_prefix_index.py - Tests for the autocomplete prefix index
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from test_gazetteer import AIRPORTS
+from utils.airport_snapshot import AirportTable
+from utils.gazetteer import Gazetteer, Place
+from utils.prefix_index import PrefixIndex
+
+
+def random_entries(rng: random.Random, items: int) -> tuple:
+    """(key, item) entries with shared prefixes and aliases, and a score per item"""
+    stems = ["san", "santa", "st", "new", "port", "bad", "gra", "wi"]
+    entries = []
+    for item in range(items):
+        for _ in range(rng.randint(1, 3)):
+            tail = "".join(rng.choice("abcde ") for _ in range(rng.randint(0, 6))).strip()
+            entries.append((f"{rng.choice(stems)}{tail}", item))
+    scores = [rng.choice([0.0, 0.5, rng.random()]) for _ in range(items)]
+    return entries, scores
+
+
+def brute_force(entries, scores, prefix: str, k: int) -> list:
+    items = {item for key, item in entries if key.startswith(prefix)}
+    return sorted(items, key=lambda item: (-scores[item], item))[:k]
+
+
+class TestPrefixIndex:
+    """Cached and scanned nodes must rank exactly like a full scan"""
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        entries, scores = random_entries(rng, 3000)
+        index = PrefixIndex(entries, scores, top_k=8)
+
+        prefixes = sorted({key[:length] for key, _ in entries for length in range(len(key) + 1)})
+        prefixes = rng.sample(prefixes, 300) + ["", "s", "sa", "san", "x", "sanz", "zzz", "santa aaaaaaaa"]
+        for prefix in prefixes:
+            for k in (1, 8):
+                assert index.top(prefix, k) == brute_force(entries, scores, prefix, k), prefix
+
+    def test_small_and_empty_indexes(self):
+        assert PrefixIndex([], []).top("a") == []
+        index = PrefixIndex([("graz", 0), ("gratwein", 1), ("graz", 2)], [0.5, 0.9, 0.5])
+        assert index.top("gra") == [1, 0, 2]
+        assert index.top("graz", 1) == [0]
+        assert index.top("graz", 100) == [0, 2]
+
+
+class TestAutocomplete:
+    """Gazetteer completions: one entry per city, most important first"""
+
+    @pytest.fixture
+    def gazetteer(self):
+        gazetteer = Gazetteer()
+        gazetteer.add_airports(AirportTable.from_rows(AIRPORTS))
+        gazetteer.add(Place("Graz", 47.0707, 15.4395, "AT", 291072, "geonames", 0.78))
+        gazetteer.add(Place("Gratkorn", 47.1333, 15.35, "AT", 7800, "geonames", 0.56), ["Gratkorn Markt"])
+        gazetteer.add(Place("Wien", 48.2085, 16.3721, "AT", 1691468, "geonames", 0.89), ["Vienna", "Vienne"])
+        return gazetteer
+
+    def test_ranked_and_deduplicated(self, gazetteer):
+        assert [(p.name, p.source) for p in gazetteer.complete("gra")] == [("Graz", "geonames"), ("Gratkorn", "geonames")]
+        assert [(p.name, p.source) for p in gazetteer.complete("VIEN")] == [("Wien", "geonames")]  # Airport's "Vienna" is an alias
+        assert [p.name for p in gazetteer.complete("Mün")] == ["Munich"]
+        assert gazetteer.complete("Linz") == []
+        assert gazetteer.complete("  ") == []
+
+    def test_places_learned_after_build(self, gazetteer):
+        gazetteer.build_search_indexes()
+        gazetteer.learn("Gratwein-Straßengel", "Gratwein-Straßengel", 47.1167, 15.3333, "AT")
+        assert [p.name for p in gazetteer.complete("gratw")] == ["Gratwein-Straßengel"]
+        assert [p.name for p in gazetteer.complete("gra")][-1] == "Gratwein-Straßengel"
+
+
+class TestAutocompleteEndpoint:
+    """/api/cities/autocomplete answers locally and only calls Nominatim without a match"""
+
+    def test_local_then_nominatim(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        import main
+
+        gazetteer = Gazetteer()
+        gazetteer.add_airports(AirportTable.from_rows(AIRPORTS))
+        calls = []
+
+        async def nominatim(query):
+            calls.append(query)
+            return []
+
+        monkeypatch.setattr(main, "gazetteer", gazetteer)
+        monkeypatch.setattr(main, "_fetch_city_suggestions", nominatim)
+        client = TestClient(main.app)
+
+        suggestions = client.get("/api/cities/autocomplete", params={"q": "sal"}).json()["suggestions"]
+        assert [s["city"] for s in suggestions] == ["Salzburg"]
+        assert suggestions[0]["country_code"] == "AT" and suggestions[0]["lat"] == 47.7933
+        assert calls == []
+
+        assert client.get("/api/cities/autocomplete", params={"q": "Leibn"}).json() == {"suggestions": []}
+        assert calls == ["Leibn"]
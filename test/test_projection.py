@@ -0,0 +1,85 @@
+# test_projection.py - Tests for dataset field projection
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.data_parser import AirbnbParser, FlightParser, HotelParser
+from utils.projection import FieldProjection
+
+
+class TestFieldProjection:
+    """Nested paths should keep exactly the fields the parsers read"""
+
+    def test_top_level_fields_for_query_param(self):
+        projection = FieldProjection(["rating.average", "name", "rating.reviewsCount", "url"])
+        assert projection.top_level == ["name", "rating", "url"]
+        assert projection.query_param == "name,rating,url"
+
+    def test_lists_are_projected_per_element(self):
+        projection = FieldProjection(["legs.departure", "pricing_options.price.amount"])
+        item = {
+            "legs": [{"departure": "2026-07-01T08:30:00", "segments": [1, 2]}],
+            "pricing_options": [{"price": {"amount": 99, "update_status": "current"}, "agent_ids": ["a"]}],
+            "tags": ["x"]
+        }
+        assert projection.apply(item) == {
+            "legs": [{"departure": "2026-07-01T08:30:00"}],
+            "pricing_options": [{"price": {"amount": 99}}]
+        }
+
+    def test_wildcard_matches_every_key(self):
+        projection = FieldProjection(["_carriers.*.name"])
+        item = {"_carriers": {"1": {"name": "Austrian", "logo": "a.png"}, "2": {"name": "Vueling", "alt_id": "VY"}}}
+        assert projection.apply(item) == {"_carriers": {"1": {"name": "Austrian"}, "2": {"name": "Vueling"}}}
+
+    def test_shorter_path_keeps_whole_field(self):
+        projection = FieldProjection(["address.city", "address"])
+        assert projection.apply({"address": {"city": "Rome", "zip": "00100"}}) == {"address": {"city": "Rome", "zip": "00100"}}
+
+    def test_unexpected_shapes_are_kept(self):
+        projection = FieldProjection(["address.full"])
+        assert projection.apply({"address": "Via Roma 1"}) == {"address": "Via Roma 1"}
+        assert projection.apply("not an item") == "not an item"
+
+
+class TestParserFields:
+    """Parsing projected items should give the same results as parsing full items"""
+
+    def test_hotel_parser(self):
+        item = {
+            "name": "Hotel Roma", "price": 0, "rating": 8.7, "stars": 4, "type": "hotel",
+            "url": "https://www.booking.com/hotel/it/roma.html", "description": "Long text " * 50,
+            "images": ["a.jpg"] * 20, "address": {"full": "Via Roma 1", "city": "Rome", "zip": "00100"},
+            "rooms": [{"roomType": "Double", "options": [{"price": 120, "policies": ["Free cancellation"]}]}]
+        }
+        projected = FieldProjection(HotelParser.FIELDS).apply(item)
+        assert HotelParser().parse_hotels([projected]) == HotelParser().parse_hotels([item])
+        assert "images" not in projected and "description" not in projected
+
+    def test_airbnb_parser(self):
+        item = {
+            "name": "Flat", "url": "https://www.airbnb.com/rooms/1", "roomType": "private_room",
+            "pricing": {"price": "€ 80", "breakdown": [{"label": "Cleaning"}]},
+            "rating": {"average": 4.8, "reviewsCount": 12, "cleanliness": 5},
+            "coordinates": {"latitude": 41.9, "longitude": 12.5}, "subtitles": ["2 beds"],
+            "images": [{"url": "b.jpg"}] * 10, "host": {"name": "Ann"}
+        }
+        projected = FieldProjection(AirbnbParser.FIELDS).apply(item)
+        assert AirbnbParser().parse_properties([projected]) == AirbnbParser().parse_properties([item])
+        assert "host" not in projected
+
+    def test_flight_parser(self):
+        item = {
+            "_carriers": {"1": {"name": "Austrian", "alt_id": "OS"}},
+            "legs": [{
+                "origin": {"display_code": "VIE"}, "destination": {"display_code": "FCO"},
+                "departure": "2026-07-01T08:30:00", "arrival": "2026-07-01T10:20:00",
+                "duration": 110, "stop_count": 0, "marketing_carrier_ids": [1], "segments": [{"id": "s"}]
+            }],
+            "pricing_options": [{"price": {"amount": 99}, "agent_ids": ["x"], "items": [{"url": "/transport_deeplink/1", "fares": []}]}],
+            "_agents": {"x": {"name": "Agent"}}
+        }
+        projected = FieldProjection(FlightParser.FIELDS).apply(item)
+        assert FlightParser().parse_flights([projected]) == FlightParser().parse_flights([item])
+        assert "_agents" not in projected
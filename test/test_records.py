@@ -0,0 +1,100 @@
+# test_records.py - Tests for the typed search result records
+import dataclasses
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import TravelCombinationEngine, analyze_combination_statistics
+from utils.data_parser import AirbnbParser, FlightParser, HotelParser
+from utils.records import AirbnbListing, Combination, Flight, Hotel
+
+
+def flight(price: int, airline: str = "Austrian") -> Flight:
+    return Flight(airline=airline, price=price, time="08:30", duration="2h 05m", stops=0,
+                  source="Skyscanner", url="", date="2026-07-01")
+
+
+def hotel(price: int, rating: float = 8.0) -> Hotel:
+    return Hotel(name="Hotel", price=price, rating=rating, location="Center", type="hotel",
+                 source="Booking.com", url="", checkin="2026-07-01", checkout="2026-07-08")
+
+
+class TestRecordAdapter:
+    """Records should keep the dict read API used by the CSV export and templates"""
+
+    def test_item_access_and_get(self):
+        record = flight(99)
+        assert record["price"] == 99
+        assert record.get("airline") == "Austrian"
+        assert record.get("bedrooms", "n/a") == "n/a"
+        with pytest.raises(KeyError):
+            record["bedrooms"]
+        with pytest.raises(KeyError):
+            record["get"]
+
+    def test_records_are_frozen_and_slotted(self):
+        record = hotel(100)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            record.price = 1
+        assert not hasattr(record, "__dict__")
+
+    def test_to_dict_flattens_nested_records(self):
+        combination = TravelCombinationEngine()._create_single_combination(
+            flight(100), flight(80), hotel(120), nights=2, persons=2, budget=None
+        )
+        plain = combination.to_dict()
+        assert plain["outbound_flight"] == flight(100).to_dict()
+        assert plain["accommodation_type"] == "hotel"
+        assert plain["total_cost"] == (100 + 80) * 2 + 120 * 2
+
+
+class TestParsersEmitRecords:
+    """Parsers should produce records with interned repeated strings"""
+
+    def test_flight_strings_are_shared(self):
+        items = [{
+            "_carriers": {"1": {"name": "Austrian"}},
+            "legs": [{"departure": "2026-07-01T08:30:00", "duration": 125, "stop_count": 0, "marketing_carrier_ids": [1]}],
+            "pricing_options": [{"price": {"amount": 100 + i}, "items": [{"url": "/x"}]}]
+        } for i in range(2)]
+        first, second = FlightParser().parse_flights(items)
+        assert isinstance(first, Flight)
+        assert first.airline is second.airline
+        assert first.time is second.time and first.date is second.date
+        assert (first.duration_minutes, first.departure_minutes, first.duration) == (125, 510, "2h 05m")
+
+    def test_flight_without_duration_or_departure(self):
+        items = [{"legs": [{"stop_count": 1}], "pricing_options": [{"price": {"amount": 90}}]}]
+        flight = FlightParser().parse_flights(items)[0]
+        assert flight.duration_minutes is None and flight.departure_minutes is None
+        assert flight.duration == "Unknown"
+
+    def test_hotel_and_airbnb_records(self):
+        hotels = HotelParser().parse_hotels([{"name": "A", "price": 100, "rating": 8.5, "type": "hotel"}])
+        listings = AirbnbParser().parse_properties([{"name": "B", "pricing": {"price": "€ 80"}, "badges": ["Superhost"]}])
+        assert isinstance(hotels[0], Hotel) and hotels[0].accommodation_type == "hotel"
+        assert isinstance(listings[0], AirbnbListing) and listings[0].badges == ("Superhost",)
+
+
+class TestCombinations:
+    """Combinations should reference the parsed records instead of copying them"""
+
+    def test_combination_references_records(self):
+        outbound, back, stay = flight(100), flight(90), hotel(80)
+        combinations = TravelCombinationEngine().create_combinations(
+            [outbound], [back], [stay], [], {"nights": 3, "persons": 2, "budget": None}
+        )
+        assert isinstance(combinations[0], Combination)
+        assert combinations[0].accommodation is stay
+        assert combinations[0].outbound_flight is outbound
+
+    def test_statistics_accept_records(self):
+        combinations = TravelCombinationEngine().create_combinations(
+            [flight(100)], [flight(90)], [hotel(80)], [], {"nights": 3, "persons": 2, "budget": None}
+        )
+        stats = analyze_combination_statistics(combinations)
+        assert stats["accommodation_breakdown"] == {"hotels": 1, "airbnb": 0}
+        assert stats["best_combination"]["total_cost"] == combinations[0].total_cost
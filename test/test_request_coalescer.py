@@ -0,0 +1,113 @@
+# test_request_coalescer.py - Tests for single-flight request coalescing
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.request_coalescer import RequestCoalescer, make_request_key
+
+
+class TestRequestKey:
+    """Keys must be canonical across dict ordering"""
+
+    def test_key_ignores_dict_order(self):
+        a = make_request_key("jupri~skyscanner-flight", {"origin.0": "VIE", "target.0": "BCN"})
+        b = make_request_key("jupri~skyscanner-flight", {"target.0": "BCN", "origin.0": "VIE"})
+        assert a == b
+
+    def test_key_depends_on_actor_and_payload(self):
+        base = make_request_key("jupri~skyscanner-flight", {"origin.0": "VIE"})
+        assert base != make_request_key("voyager~fast-booking-scraper", {"origin.0": "VIE"})
+        assert base != make_request_key("jupri~skyscanner-flight", {"origin.0": "GRZ"})
+
+
+class TestRequestCoalescer:
+    """Concurrent identical calls should share one upstream call"""
+
+    def test_concurrent_calls_share_one_upstream_call(self):
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["result"]
+
+        async def scenario():
+            coalescer = RequestCoalescer()
+            results = await asyncio.gather(*(coalescer.run("k", upstream) for _ in range(5)))
+            return coalescer, results
+
+        coalescer, results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert results == [["result"]] * 5
+        assert coalescer.get_stats() == {"upstream_calls": 1, "coalesced_calls": 4, "in_flight": 0}
+
+    def test_errors_propagate_to_all_waiters(self):
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def scenario():
+            coalescer = RequestCoalescer()
+            return await asyncio.gather(
+                *(coalescer.run("k", upstream) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        async def upstream():
+            return 1
+
+        async def scenario():
+            coalescer = RequestCoalescer()
+            await coalescer.run("k", upstream)
+            await coalescer.run("k", upstream)
+            return coalescer.get_stats()
+
+        assert asyncio.run(scenario())["upstream_calls"] == 2
+
+    def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        async def upstream():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def scenario():
+            coalescer = RequestCoalescer()
+            first = asyncio.ensure_future(coalescer.run("k", upstream))
+            second = asyncio.ensure_future(coalescer.run("k", upstream))
+            await asyncio.sleep(0)
+            first.cancel()
+            result = await second
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return result
+
+        assert asyncio.run(scenario()) == "done"
+
+    def test_upstream_cancelled_when_all_waiters_leave(self):
+        cancelled = []
+
+        async def upstream():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        async def scenario():
+            coalescer = RequestCoalescer()
+            waiter = asyncio.ensure_future(coalescer.run("k", upstream))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            await asyncio.sleep(0)
+            return coalescer.get_stats()
+
+        stats = asyncio.run(scenario())
+        assert cancelled == [True]
+        assert stats["in_flight"] == 0
@@ -0,0 +1,112 @@
+# test_search_filters.py - Tests for pushing search constraints into actor inputs
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.hotel_service import AccommodationService
+from business_logic import TravelCombinationEngine
+from config.search_limits import ACCOMMODATIONS_PER_SOURCE
+from services.search_filters import SearchFilters, max_items
+from utils.data_parser import AirbnbParser, HotelParser
+from utils.records import Flight
+
+
+class FakeApifyClient:
+    """Records actor inputs and options and returns no items"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def iter_actor_pages(self, actor_name, input_data, options=None, deadline=None, fields=None):
+        self.calls[actor_name] = (input_data, options)
+        return
+        yield
+
+
+class ListingsApifyClient(FakeApifyClient):
+    """Returns the given items, honouring maxItems like the actors"""
+
+    def __init__(self, items):
+        super().__init__()
+        self.items = items
+
+    async def iter_actor_pages(self, actor_name, input_data, options=None, deadline=None, fields=None):
+        self.calls[actor_name] = (input_data, options)
+        yield self.items[:options["maxItems"]]
+
+
+class TestSearchFilters:
+    """Budget and nights should become a nightly price cap"""
+
+    def test_price_cap_allows_budget_tolerance(self):
+        filters = SearchFilters(persons=2, nights=4, budget=1000)
+        # 1000 * 1.2 / 4 = 300
+        assert filters.max_price_per_night == 300
+
+    def test_price_cap_is_rounded_up_to_step(self):
+        assert SearchFilters(nights=7, budget=1000).max_price_per_night == 175  # 171.4 -> 175
+
+    def test_no_budget_means_no_cap(self):
+        filters = SearchFilters(persons=3, nights=2)
+        assert filters.max_price_per_night is None
+        assert filters.booking_input() == {"adults": 3}
+        assert filters.airbnb_input() == {"adults": 3}
+
+    def test_from_search_params(self):
+        filters = SearchFilters.from_search_params({"persons": 4, "nights": 0, "budget": 600})
+        assert (filters.persons, filters.nights, filters.budget) == (4, 1, 600)
+
+    def test_max_items_covers_the_parser_window(self):
+        assert max_items(200, 50) == 50
+        assert max_items(200, 20) == 20
+        assert max_items(10, 50) == 10
+
+        engine = TravelCombinationEngine()
+        kept = engine._prepare_accommodations(list(range(100)), list(range(100)), engine.ACCOMMODATIONS_PER_SOURCE)
+        assert kept == list(range(ACCOMMODATIONS_PER_SOURCE)) * 2
+
+
+class TestAccommodationPushdown:
+    """The accommodation searches should pass the filters to both actors"""
+
+    def test_filters_reach_actor_inputs(self):
+        client = FakeApifyClient()
+        service = AccommodationService(client)
+        filters = SearchFilters(persons=4, nights=3, budget=1500)
+
+        asyncio.run(service.search_all_accommodations(
+            "Rome", "2026-07-01", "2026-07-04", max_hotels=200, max_airbnb=100, filters=filters
+        ))
+
+        booking_input, booking_options = client.calls["voyager~fast-booking-scraper"]
+        airbnb_input, airbnb_options = client.calls["tri_angle~new-fast-airbnb-scraper"]
+        assert booking_input["adults"] == 4
+        assert booking_input["minMaxPrice"] == "0-600"
+        assert booking_options["maxItems"] == HotelParser.MAX_RAW_ITEMS
+        assert airbnb_input["adults"] == 4
+        assert airbnb_input["priceMax"] == 600
+        assert airbnb_options["maxItems"] == AirbnbParser.MAX_RAW_ITEMS
+
+    def test_best_value_beyond_engine_cap_is_combined(self):
+        items = [{"name": f"Hotel {i}", "price": 200, "rating": 7.0} for i in range(HotelParser.MAX_RAW_ITEMS)]
+        items[40] = {"name": "Hidden Gem", "price": 60, "rating": 9.5}  # The actor ranks it 41st
+        assert 40 >= ACCOMMODATIONS_PER_SOURCE
+        hotels = asyncio.run(AccommodationService(ListingsApifyClient(items)).search_hotels(
+            "Rome", "2026-07-01", "2026-07-04", max_results=200
+        ))
+
+        flight = Flight(airline="Austrian", price=100, time="08:30", duration="2h 05m",
+                        stops=0, source="Skyscanner", url="", date="2026-07-01")
+        combinations = TravelCombinationEngine().create_combinations(
+            [flight], [flight], hotels, [], {"nights": 3, "persons": 2}
+        )
+        assert combinations[0].accommodation.name == "Hidden Gem"
+
+    def test_without_filters_defaults_are_kept(self):
+        client = FakeApifyClient()
+        asyncio.run(AccommodationService(client).search_airbnb("Rome", "2026-07-01", "2026-07-04", guests=3))
+        airbnb_input, _ = client.calls["tri_angle~new-fast-airbnb-scraper"]
+        assert airbnb_input["adults"] == 3
+        assert airbnb_input["priceMax"] == 999
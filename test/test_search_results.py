@@ -0,0 +1,126 @@
+# test_search_results.py - Tests for stored search results and the refine endpoint
+import asyncio
+import math
+import os
+import random
+import sys
+from dataclasses import replace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from business_logic import ScoringWeights, TravelCombinationEngine
+from services.search_results import SearchResultStore
+from test_combination_engine import accommodations, flights, timed_flights
+from utils.cache import CacheConfig, TwoTierCache
+
+SEARCH_PARAMS = {"origin": "Vienna", "destination": "Barcelona", "departure": "2026-07-01",
+                 "return_date": "2026-07-08", "budget": 2500, "persons": 2, "nights": 7}
+
+
+def search_results(seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    stays = accommodations(rng, 6)
+    stays[6:] = [replace(listing, badges=("Superhost",)) for listing in stays[6:]]
+    return {
+        "flights": {"outbound": timed_flights(rng, 5), "return": timed_flights(rng, 4)},
+        "accommodations": {"hotels": stays[:6], "airbnb": stays[6:]}
+    }
+
+
+class TestSearchResultStore:
+    """Stored searches come back as equal records until they expire"""
+
+    @pytest.mark.parametrize("on_disk", [False, True])
+    def test_round_trip(self, tmp_path, on_disk):
+        async def scenario():
+            config = CacheConfig(disk_path=str(tmp_path / "results.sqlite3") if on_disk else None)
+            store = SearchResultStore(TwoTierCache(config, namespace="search_results"))
+            search_id = await store.save(SEARCH_PARAMS, search_results())
+            if on_disk:
+                store.cache._memory.clear()  # Force the disk tier
+            return await store.load(search_id)
+
+        stored = asyncio.run(scenario())
+        expected = search_results()
+        assert stored.search_params == SEARCH_PARAMS
+        assert stored.outbound_flights == expected["flights"]["outbound"]
+        assert stored.return_flights == expected["flights"]["return"]
+        assert stored.hotels == expected["accommodations"]["hotels"]
+        assert stored.airbnb_properties == expected["accommodations"]["airbnb"]
+
+    def test_unknown_and_expired_searches(self):
+        async def scenario():
+            store = SearchResultStore(TwoTierCache(CacheConfig(stale_ttl=0)), ttl=-1)
+            search_id = await store.save(SEARCH_PARAMS, search_results())
+            return await store.load(search_id), await store.load("missing")
+
+        assert asyncio.run(scenario()) == (None, None)
+
+
+class TestScoringWeights:
+    """Weights scale the score components in every strategy"""
+
+    @pytest.mark.parametrize("budget", [None, 1500])
+    def test_strategies_agree_with_weights(self, budget):
+        pytest.importorskip("numpy")
+        rng = random.Random(8)
+        outbound, back, stays = flights(rng, 7), flights(rng, 6), accommodations(rng, 9)
+        weights = ScoringWeights(rating=0.4, cost=1.6)
+
+        results = [
+            TravelCombinationEngine(max_combinations=6, strategy=strategy, weights=weights)
+            for strategy in ("scalar", "vectorized", "branch_and_bound")
+        ]
+        scores = [[c.score for c in getattr(engine, f"_{engine.strategy}_combinations")(outbound, back, stays, 3, 2, budget)]
+                  for engine in results]
+        assert scores[0] == scores[1] == scores[2]
+
+    def test_default_weights_keep_scores(self):
+        engine = TravelCombinationEngine()
+        assert engine._calculate_combination_score(1234, 8.7, None) == round(8.7 * 10 + 50 * (1 - 1234 / 2000), 1)
+
+    def test_negative_weights_are_rejected(self):
+        with pytest.raises(ValueError):
+            TravelCombinationEngine(weights=ScoringWeights(rating=-1))
+
+    @pytest.mark.parametrize("weight", [math.nan, math.inf])
+    def test_non_finite_weights_are_rejected(self, weight):
+        with pytest.raises(ValueError):
+            TravelCombinationEngine(weights=ScoringWeights(cost=weight))
+
+
+class TestRefineEndpoint:
+    """/api/search/{id}/refine reruns only the combination engine"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        from fastapi.testclient import TestClient
+        import main
+
+        store = SearchResultStore(TwoTierCache(namespace="search_results"))
+        monkeypatch.setattr(main, "search_result_store", store)
+        search_id = asyncio.run(store.save(SEARCH_PARAMS, search_results()))
+        return TestClient(main.app), search_id
+
+    def test_refine_with_new_budget_and_type(self, client):
+        client, search_id = client
+        response = client.post(f"/api/search/{search_id}/refine",
+                               data={"budget": "", "accommodation_type": "hotel", "sort": "price"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["budget"] is None
+        assert body["combinations"] and all(c["accommodation_type"] == "hotel" for c in body["combinations"])
+        costs = [c["total_cost"] for c in body["combinations"]]
+        assert costs == sorted(costs)
+        assert body["pareto_frontier"]
+
+    def test_unknown_search_and_bad_input(self, client):
+        client, search_id = client
+        assert client.post("/api/search/missing/refine", data={}).status_code == 404
+        assert client.post(f"/api/search/{search_id}/refine", data={"sort": "random"}).status_code == 400
+        assert client.post(f"/api/search/{search_id}/refine", data={"budget": "10"}).status_code == 400
+        assert client.post(f"/api/search/{search_id}/refine", data={"rating_weight": "-1"}).status_code == 400
+        assert client.post(f"/api/search/{search_id}/refine", data={"rating_weight": "nan"}).status_code == 400
+        assert client.post(f"/api/search/{search_id}/refine", data={"cost_weight": "inf"}).status_code == 400
@@ -0,0 +1,109 @@
+# test_spatial_index.py - Tests for the airport spatial index
+import math
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from services.city_resolver import CityResolverService
+from utils.spatial_index import SphericalIndex, chord_to_km, to_unit_vector
+
+AIRPORTS = [  # iata, name, lat, lon
+    ("GRZ", "Graz Airport", 46.9911, 15.4396),
+    ("VIE", "Vienna International Airport", 48.1103, 16.5697),
+    ("LJU", "Ljubljana Airport", 46.2237, 14.4576),
+    ("ZAG", "Zagreb Airport", 45.7429, 16.0688),
+    ("KLU", "Klagenfurt Airport", 46.6425, 14.3376),
+    ("PMI", "Palma de Mallorca Airport", 39.5517, 2.7388),
+    ("BCN", "Barcelona El Prat Airport", 41.2974, 2.0833),
+    ("IBZ", "Ibiza Airport", 38.8728, 1.3731),
+    ("VLC", "Valencia Airport", 39.4893, -0.4816),
+    ("MAH", "Menorca Airport", 39.8626, 4.2186),
+]
+
+
+def airports_frame(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["iata_code", "name", "latitude_deg", "longitude_deg"])
+
+
+def random_airports(rng: random.Random, count: int) -> list:
+    rows = [(f"X{i:04d}", f"Airport {i}", math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180))
+            for i in range(count)]
+    rows[7] = ("BAD", "No coordinates", float("nan"), 12.0)
+    return rows
+
+
+def resolver_with(rows) -> CityResolverService:
+    resolver = CityResolverService()
+    resolver.airports_df = airports_frame(rows)
+    resolver._index_airports()
+    return resolver
+
+
+def brute_force(rows, lat, lon) -> list:
+    """(km, iata) of every airport by geodesic distance, as the resolver computed it row by row"""
+    distances = []
+    for iata, _, airport_lat, airport_lon in rows:
+        try:
+            distances.append((geodesic((lat, lon), (airport_lat, airport_lon)).kilometers, iata))
+        except ValueError:
+            continue
+    return sorted(distances)
+
+
+class TestSphericalIndex:
+    """k-d tree answers must equal a linear scan of great-circle distances"""
+
+    def test_nearest_and_within_match_linear_scan(self):
+        rng = random.Random(1)
+        points = [(math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)) for _ in range(2000)]
+        index = SphericalIndex(points)
+
+        for _ in range(100):
+            lat, lon = math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+            query = to_unit_vector(lat, lon)
+            scan = sorted((chord_to_km(math.dist(query, to_unit_vector(*p))), i) for i, p in enumerate(points))
+
+            assert [i for _, i in index.nearest(lat, lon, k=5)] == [i for _, i in scan[:5]]
+            radius = rng.uniform(50, 2000)
+            assert [i for _, i in index.within(lat, lon, radius)] == [i for km, i in scan if km <= radius]
+
+    def test_poles_antimeridian_and_invalid_points(self):
+        index = SphericalIndex([(0.0, 179.9), (0.0, -179.9), (89.9, 0.0), (None, 1.0), (float("nan"), 0.0)])
+        assert len(index) == 3
+        assert sorted(i for _, i in index.nearest(0.0, 180.0, k=2)) == [0, 1]
+        assert index.nearest(89.95, 120.0)[0][1] == 2
+        assert SphericalIndex([]).nearest(0.0, 0.0) == []
+
+
+class TestNearestAirport:
+    """The resolver must pick the same airport as the geodesic scan it replaced"""
+
+    @pytest.mark.parametrize("place, coords, expected", [
+        ("Deutschlandsberg", (46.8133, 15.2167), "GRZ"),
+        ("Port de Soller", (39.7944, 2.6847), "PMI"),
+    ])
+    def test_known_places(self, place, coords, expected):
+        resolver = resolver_with(AIRPORTS)
+        assert resolver._find_nearest_airport_from_coords(*coords) == expected
+        assert brute_force(AIRPORTS, *coords)[0][1] == expected
+
+    def test_matches_geodesic_scan(self):
+        rng = random.Random(2)
+        rows = random_airports(rng, 1000)
+        resolver = resolver_with(rows)
+
+        for _ in range(40):
+            lat, lon = math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+            scan = brute_force(rows, lat, lon)
+
+            assert [iata for iata, _ in resolver.nearest_airports(lat, lon, k=3)] == [iata for _, iata in scan[:3]]
+            assert [iata for iata, _ in resolver.airports_within(lat, lon, 400)] == [iata for km, iata in scan if km <= 400]
+
+            expected = scan[0][1] if scan[0][0] <= 300 else None
+            assert resolver._find_nearest_airport_from_coords(lat, lon) == expected
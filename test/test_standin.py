@@ -0,0 +1,123 @@
+# test_standin.py - Tests for the record/replay upstream stand-in
+import asyncio
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.api_client import ApifyClient, PoolConfig, RetryConfig
+from utils.standin import CassetteStore, UpstreamProfile, UpstreamStandin, parse_profile
+
+
+def standin_client(standin: UpstreamStandin) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=standin.create_app()), base_url="http://standin")
+
+
+def apify_client(standin: UpstreamStandin) -> ApifyClient:
+    """ApifyClient pointed at the stand-in, as APIFY_API_URL would do"""
+    return ApifyClient(
+        "test-token",
+        RetryConfig(max_retries=1),
+        PoolConfig(http2=False),
+        api_url="http://standin/apify/v2",
+        transport=httpx.ASGITransport(app=standin.create_app())
+    )
+
+
+class TestRecordReplay:
+    """Recorded responses should be replayed without the real upstream"""
+
+    def test_record_then_replay(self, tmp_path):
+        upstream_calls = []
+
+        def real_apify(request):
+            upstream_calls.append(str(request.url))
+            return httpx.Response(200, json=[{"name": "Hotel Roma", "price": 120}])
+
+        async def scenario():
+            recorder = UpstreamStandin(
+                CassetteStore(str(tmp_path)), mode="record", upstream_transport=httpx.MockTransport(real_apify)
+            )
+            client = apify_client(recorder)
+            recorded = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            await client.close()
+            await recorder.close()
+
+            replayer = UpstreamStandin(CassetteStore(str(tmp_path)))
+            client = apify_client(replayer)
+            replayed = await client.call_actor("voyager~fast-booking-scraper", {"search": "Rome"})
+            other_city = await client.call_actor("voyager~fast-booking-scraper", {"search": "Paris"})
+            await client.close()
+            return recorded, replayed, other_city, replayer.stats
+
+        recorded, replayed, other_city, stats = asyncio.run(scenario())
+        assert upstream_calls == ["https://api.apify.com/v2/acts/voyager~fast-booking-scraper/run-sync-get-dataset-items"]
+        assert recorded == replayed == other_city, "Unrecorded inputs fall back to a recording of the same path"
+        assert stats["replayed"] == 2 and stats["misses"] == 0
+        assert len(os.listdir(tmp_path / "apify")) == 1
+
+    def test_unknown_path_is_a_miss(self, tmp_path):
+        async def scenario():
+            standin = UpstreamStandin(CassetteStore(str(tmp_path)))
+            async with standin_client(standin) as client:
+                response = await client.get("/nominatim/search", params={"q": "Graz"})
+            return response.status_code, standin.stats["misses"]
+
+        assert asyncio.run(scenario()) == (404, 1)
+
+
+class TestProfiles:
+    """Latency, error rate and payload size should be configurable per upstream"""
+
+    def make_store(self, tmp_path) -> CassetteStore:
+        from utils.standin import Cassette
+        store = CassetteStore(str(tmp_path))
+        store.save(Cassette("reddit", "GET", "r/travel/search.json", "q=Rome", "", 200, "application/json", '{"data": {"children": []}}'))
+        store.save(Cassette("apify", "POST", "v2/acts/a/run-sync-get-dataset-items", "", "", 200, "application/json", '[{"id": 1}, {"id": 2}]'))
+        return store
+
+    def test_error_injection_is_deterministic(self, tmp_path):
+        store = self.make_store(tmp_path)
+
+        async def run_once():
+            standin = UpstreamStandin(store, profiles={"reddit": UpstreamProfile(error_rate=0.5)}, seed=7)
+            async with standin_client(standin) as client:
+                return [
+                    (await client.get("/reddit/r/travel/search.json", params={"q": "Rome"})).status_code
+                    for _ in range(20)
+                ]
+
+        first, second = asyncio.run(run_once()), asyncio.run(run_once())
+        assert first == second
+        assert 503 in first and 200 in first
+
+    def test_payload_is_resized(self, tmp_path):
+        store = self.make_store(tmp_path)
+
+        async def scenario():
+            standin = UpstreamStandin(store, profiles={"apify": UpstreamProfile(payload_items=5)})
+            async with standin_client(standin) as client:
+                response = await client.post("/apify/v2/acts/a/run-sync-get-dataset-items", json={})
+            return response.json()
+
+        assert [item["id"] for item in asyncio.run(scenario())] == [1, 2, 1, 2, 1]
+
+    def test_latency_is_added(self, tmp_path):
+        import time
+        store = self.make_store(tmp_path)
+
+        async def scenario():
+            standin = UpstreamStandin(store, profiles={"reddit": UpstreamProfile(latency=0.05)})
+            async with standin_client(standin) as client:
+                start = time.monotonic()
+                await client.get("/reddit/r/travel/search.json", params={"q": "Rome"})
+                return time.monotonic() - start
+
+        assert asyncio.run(scenario()) >= 0.05
+
+    def test_parse_profile(self):
+        upstream, profile = parse_profile("apify:latency=2.5,error_rate=0.1,payload_items=300")
+        assert upstream == "apify"
+        assert (profile.latency, profile.error_rate, profile.payload_items) == (2.5, 0.1, 300)
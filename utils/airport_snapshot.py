@@ -0,0 +1,323 @@
+# utils/airport_snapshot.py - Compiled, Memory-Mapped Airport Database
+"""
+Build step and loader for the airport snapshot
+
+The filtered passenger airports of airports.csv are compiled into one binary
+file: columnar coordinate and type arrays, a deduplicated string table and
+an IATA index sorted by code. Workers memory-map it read-only, so the pages
+are shared by every process on the host, and startup needs neither
+pandas.read_csv nor a DataFrame. The snapshot records the size, mtime and
+SHA-256 of the CSV it was built from and is rebuilt when the CSV changes.
+
+Build explicitly (e.g. in a deploy step):
+    python -m utils.airport_snapshot [airports.csv] [cache/airports.snapshot]
+"""
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Tuple
+from array import array
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AIRPORTS"
+VERSION = 1
+# magic, version, airports, strings, string bytes, source mtime (ns), source size, source SHA-256
+HEADER = struct.Struct("=8sIIIIqQ32s")
+
+PASSENGER_TYPES = ("large_airport", "medium_airport", "small_airport")
+UNKNOWN_TYPE = 255
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, truncated or from another format version"""
+    pass
+
+class AirportRow(NamedTuple):
+    iata_code: str
+    name: str
+    municipality: str
+    iso_country: str
+    type: str
+    latitude_deg: float
+    longitude_deg: float
+
+class SourceSignature(NamedTuple):
+    """Identity of the CSV a snapshot was compiled from"""
+    mtime_ns: int = 0
+    size: int = 0
+    sha256: bytes = b"\0" * 32
+
+    @classmethod
+    def of(cls, path: str) -> "SourceSignature":
+        stat = os.stat(path)
+        return cls(stat.st_mtime_ns, stat.st_size, _file_sha256(path))
+
+def _file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+def _layout(count: int, string_count: int) -> Dict[str, Tuple[int, int]]:
+    """Byte (start, end) of each section, 8-byte aligned, for the given sizes"""
+    sizes = [
+        ("latitudes", 8 * count),
+        ("longitudes", 8 * count),
+        ("strings_of", 4 * 4 * count),  # iata, name, municipality, country per airport
+        ("iata_order", 4 * count),  # Airport positions sorted by IATA code
+        ("types", count),
+        ("string_offsets", 4 * (string_count + 1)),
+    ]
+    layout = {}
+    offset = HEADER.size
+    for name, size in sizes:
+        offset = _align(offset)
+        layout[name] = (offset, offset + size)
+        offset += size
+    layout["blob"] = (_align(offset), _align(offset))
+    return layout
+
+def encode(rows: List[AirportRow], source: SourceSignature = SourceSignature()) -> bytes:
+    """Serialize airports into the snapshot format"""
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    string_refs = array("I")
+    for row in rows:
+        string_refs.extend(intern(value) for value in (row.iata_code, row.name, row.municipality, row.iso_country))
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = array("I", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+    blob = b"".join(encoded)
+
+    sections = {
+        "latitudes": array("d", (row.latitude_deg for row in rows)).tobytes(),
+        "longitudes": array("d", (row.longitude_deg for row in rows)).tobytes(),
+        "strings_of": string_refs.tobytes(),
+        # Stable sort: of rows sharing a code, find() returns the first
+        "iata_order": array("I", sorted(range(len(rows)), key=lambda i: rows[i].iata_code)).tobytes(),
+        "types": bytes(
+            PASSENGER_TYPES.index(row.type) if row.type in PASSENGER_TYPES else UNKNOWN_TYPE for row in rows
+        ),
+        "string_offsets": string_offsets.tobytes(),
+    }
+    layout = _layout(len(rows), len(strings))
+
+    buffer = bytearray(layout["blob"][0] + len(blob))
+    buffer[:HEADER.size] = HEADER.pack(
+        MAGIC, VERSION, len(rows), len(strings), len(blob), source.mtime_ns, source.size, source.sha256
+    )
+    for name, data in sections.items():
+        start, _ = layout[name]
+        buffer[start:start + len(data)] = data
+    buffer[layout["blob"][0]:] = blob
+    return bytes(buffer)
+
+class AirportTable:
+    """
+    Read-only airport columns over a snapshot buffer (mmap or bytes)
+
+    Rows are addressed by position. Strings are decoded on access; the
+    coordinate columns are memoryviews of doubles straight from the buffer.
+    """
+
+    def __init__(self, buffer: Any):
+        self._buffer = buffer
+        if len(buffer) < HEADER.size:
+            raise SnapshotError("Snapshot is truncated")
+
+        magic, version, count, string_count, blob_size, mtime_ns, size, sha256 = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"Not an airport snapshot of version {VERSION}")
+
+        layout = _layout(count, string_count)
+        blob_start = layout["blob"][0]
+        if len(buffer) < blob_start + blob_size:
+            raise SnapshotError("Snapshot is truncated")
+
+        view = memoryview(buffer)
+        self.source = SourceSignature(mtime_ns, size, sha256)
+        self._count = count
+        self.latitudes = view[slice(*layout["latitudes"])].cast("d")
+        self.longitudes = view[slice(*layout["longitudes"])].cast("d")
+        self._strings_of = view[slice(*layout["strings_of"])].cast("I")
+        self._iata_order = view[slice(*layout["iata_order"])].cast("I")
+        self._types = view[slice(*layout["types"])]
+        self._string_offsets = view[slice(*layout["string_offsets"])].cast("I")
+        self._blob = view[blob_start:blob_start + blob_size]
+
+    @classmethod
+    def open(cls, path: str) -> "AirportTable":
+        """Memory-map a snapshot file read-only"""
+        with open(path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise SnapshotError(f"Snapshot {path} is empty")
+        try:
+            return cls(mapped)
+        except SnapshotError:
+            mapped.close()
+            raise
+
+    @classmethod
+    def from_rows(cls, rows: List[AirportRow], source: SourceSignature = SourceSignature()) -> "AirportTable":
+        """In-memory table (no file)"""
+        return cls(encode(rows, source))
+
+    @classmethod
+    def from_dataframe(cls, frame: Any) -> "AirportTable":
+        """In-memory table from a DataFrame with airports.csv columns (missing columns stay empty)"""
+        return cls.from_rows(list(_frame_rows(frame)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def iata(self, position: int) -> str:
+        return self._string(self._strings_of[4 * position])
+
+    def name(self, position: int) -> str:
+        return self._string(self._strings_of[4 * position + 1])
+
+    def municipality(self, position: int) -> str:
+        return self._string(self._strings_of[4 * position + 2])
+
+    def country(self, position: int) -> str:
+        return self._string(self._strings_of[4 * position + 3])
+
+    def airport_type(self, position: int) -> str:
+        code = self._types[position]
+        return PASSENGER_TYPES[code] if code < len(PASSENGER_TYPES) else ""
+
+    def find(self, iata_code: str) -> Optional[int]:
+        """Position of the airport with this IATA code (binary search on the IATA index)"""
+        order = self._iata_order
+        i = bisect.bisect_left(range(self._count), iata_code, key=lambda k: self.iata(order[k]))
+        if i < self._count and self.iata(order[i]) == iata_code:
+            return order[i]
+        return None
+
+    def row(self, position: int) -> AirportRow:
+        return AirportRow(
+            self.iata(position), self.name(position), self.municipality(position), self.country(position),
+            self.airport_type(position), self.latitudes[position], self.longitudes[position]
+        )
+
+    def to_dataframe(self) -> Any:
+        """pandas DataFrame of all airports (empty strings become None, as missing CSV values)"""
+        import pandas as pd
+        rows = [self.row(i) for i in range(self._count)]
+        frame = pd.DataFrame(rows, columns=AirportRow._fields)
+        return frame.replace("", None)
+
+    def matches(self, csv_path: str) -> bool:
+        """Whether this snapshot was compiled from the current content of csv_path"""
+        stat = os.stat(csv_path)
+        if (stat.st_mtime_ns, stat.st_size) == (self.source.mtime_ns, self.source.size):
+            return True
+        # Touched (e.g. by a checkout) but maybe unchanged
+        return stat.st_size == self.source.size and _file_sha256(csv_path) == self.source.sha256
+
+    def close(self) -> None:
+        for view in (self.latitudes, self.longitudes, self._strings_of, self._iata_order,
+                     self._types, self._string_offsets, self._blob):
+            view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def _string(self, index: int) -> str:
+        return str(self._blob[self._string_offsets[index]:self._string_offsets[index + 1]], "utf-8")
+
+def _frame_rows(frame: Any) -> Iterable[AirportRow]:
+    missing = float("nan")
+    columns = {name: frame[name].tolist() if name in frame else [missing] * len(frame) for name in AirportRow._fields}
+    for values in zip(*(columns[name] for name in AirportRow._fields)):
+        *strings, lat, lon = values
+        yield AirportRow(*(value if isinstance(value, str) else "" for value in strings), float(lat), float(lon))
+
+def read_passenger_airports(csv_path: str) -> List[AirportRow]:
+    """Scheduled passenger airports with an IATA code from airports.csv (OurAirports format)"""
+    import pandas as pd
+
+    frame = pd.read_csv(csv_path, usecols=[
+        "type", "name", "latitude_deg", "longitude_deg", "iso_country",
+        "municipality", "scheduled_service", "iata_code"
+    ], dtype={"iata_code": str, "municipality": str, "name": str, "iso_country": str})
+    logger.info(f"Loaded {len(frame)} total airports from CSV")
+
+    frame = frame[
+        frame['type'].isin(PASSENGER_TYPES) &
+        frame['scheduled_service'].eq('yes') &
+        frame['iata_code'].notna()  # Must have IATA code
+    ].copy()
+    frame['iata_code'] = frame['iata_code'].str.upper()
+
+    logger.info(f"Filtered to {len(frame)} passenger airports with IATA codes")
+    return list(_frame_rows(frame))
+
+def compile_snapshot(csv_path: str, snapshot_path: str) -> None:
+    """Compile airports.csv into a snapshot file (written atomically)"""
+    source = SourceSignature.of(csv_path)
+    data = encode(read_passenger_airports(csv_path), source)
+
+    directory = os.path.dirname(snapshot_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{snapshot_path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, snapshot_path)  # Workers mapping the old file keep their pages
+    logger.info(f"Compiled airport snapshot {snapshot_path} ({len(data) / 1024:.0f} KB)")
+
+def load_airport_table(csv_path: Optional[str], snapshot_path: Optional[str]) -> Optional[AirportTable]:
+    """
+    The airport table, from the snapshot if it is current
+
+    The snapshot is (re)compiled when it is missing, unreadable or older
+    than the CSV. Without a CSV an existing snapshot is used as is; without
+    a snapshot path the CSV is compiled in memory.
+
+    Returns:
+        The table, or None if neither source is available
+    """
+    if snapshot_path and os.path.exists(snapshot_path):
+        try:
+            table = AirportTable.open(snapshot_path)
+            if csv_path is None or table.matches(csv_path):
+                logger.info(f"Mapped airport snapshot {snapshot_path} ({len(table)} airports)")
+                return table
+            table.close()
+            logger.info(f"{csv_path} changed since the airport snapshot was built - recompiling")
+        except (SnapshotError, OSError) as e:
+            logger.warning(f"Ignoring airport snapshot {snapshot_path}: {e}")
+
+    if csv_path is None:
+        return None
+
+    if snapshot_path:
+        try:
+            compile_snapshot(csv_path, snapshot_path)
+            return AirportTable.open(snapshot_path)
+        except (SnapshotError, OSError) as e:
+            logger.warning(f"Could not write airport snapshot {snapshot_path}: {e} - using the CSV in memory")
+    return AirportTable.from_rows(read_passenger_airports(csv_path), SourceSignature.of(csv_path))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    source_csv = sys.argv[1] if len(sys.argv) > 1 else "airports.csv"
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.join("cache", "airports.snapshot")
+    compile_snapshot(source_csv, target)
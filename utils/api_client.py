@@ -1,12 +1,32 @@
 # utils/api_client.py - Unified API Client with Retry Logic
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
+from contextlib import aclosing, nullcontext
+from email.utils import parsedate_to_datetime
 import asyncio
+import copy
 import httpx
 import logging
+import random
+import time
 from dataclasses import dataclass
 
+from utils.cache import TwoTierCache
+from utils.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from utils.concurrency import AdaptiveConcurrencyLimiter, ConcurrencyConfig
+from utils.deadline import Deadline
+from utils.json_stream import JsonArrayStreamDecoder
+from utils.projection import FieldProjection
+from utils.request_coalescer import RequestCoalescer, make_request_key
+
 logger = logging.getLogger(__name__)
 
+# HTTP/2 support in httpx needs the optional 'h2' package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 @dataclass
 class RetryConfig:
     """Configuration for retry behavior"""
@@ -14,35 +34,143 @@ class RetryConfig:
     base_delay: float = 2.0  # Base delay in seconds
     max_delay: float = 60.0  # Maximum delay in seconds
     exponential_backoff: bool = True
+    jitter: bool = True  # Randomize backoff so throttled callers don't retry in lockstep
     timeout: float = 300.0  # Request timeout in seconds
 
+@dataclass
+class PoolConfig:
+    """Configuration for the shared HTTP connection pool"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0  # Seconds an idle connection stays open
+    http2: bool = True  # Only used when the 'h2' package is installed
+
+@dataclass
+class AsyncRunConfig:
+    """Configuration for asynchronous actor runs with paginated dataset reads"""
+    page_size: int = 50  # Dataset items fetched per page
+    poll_interval: float = 2.0  # Seconds between run status checks
+    run_timeout: float = 600.0  # Stop reading (and abort) after this many seconds
+
+# Apify run statuses after which no more dataset items will be written
+TERMINAL_RUN_STATUSES = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
+
+# Circuit breaker shared by all actors for failures of the Apify API itself
+APIFY_HOST_BREAKER = "apify"
+GATEWAY_ERROR_CODES = {502, 503, 504}
+
 class ApifyClient:
     """Unified Apify API Client with robust retry logic"""
     
-    def __init__(self, api_token: str, retry_config: Optional[RetryConfig] = None):
+    def __init__(
+        self,
+        api_token: str,
+        retry_config: Optional[RetryConfig] = None,
+        pool_config: Optional[PoolConfig] = None,
+        api_url: str = "https://api.apify.com/v2",
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        coalesce_requests: bool = True,
+        cache: Optional[TwoTierCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        run_config: Optional[AsyncRunConfig] = None,
+        stream_decode: bool = False,
+        concurrency_config: Optional[ConcurrencyConfig] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None
+    ):
         self.api_token = api_token
         self.retry_config = retry_config or RetryConfig()
-        self.base_url = "https://api.apify.com/v2/acts"
+        self.pool_config = pool_config or PoolConfig()
+        self.api_url = api_url.rstrip("/")
+        self.base_url = f"{self.api_url}/acts"
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.coalescer = RequestCoalescer() if coalesce_requests else None
+        self.cache = cache
+        self.cache_ttls = cache_ttls or {}  # Per-actor TTL overrides in seconds
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self._run_deadlines: Dict[str, Deadline] = {}  # Coalesced run -> latest deadline of its callers
+        self.run_config = run_config  # None = run-sync-get-dataset-items mode
+        self.stream_decode = stream_decode  # Decode run-sync responses item by item
+        self.concurrency_config = concurrency_config  # None = no per-actor concurrency limit
+        self.limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+        self.breakers = breakers  # None = no circuit breaking
+    
+    async def start(self) -> None:
+        """Open the shared connection pool (called from the FastAPI startup hook)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_http_client()
+    
+    async def close(self) -> None:
+        """Close the shared connection pool (called from the FastAPI shutdown hook)"""
+        for task in list(self._revalidations.values()):
+            task.cancel()
+        
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info("Apify connection pool closed")
+        self._client = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it lazily outside of the app lifecycle"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_http_client()
+        return self._client
+    
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """Create the pooled keep-alive HTTP client shared by all calls"""
+        use_http2 = self.pool_config.http2 and HTTP2_AVAILABLE
+        if self.pool_config.http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but 'h2' is not installed - falling back to HTTP/1.1")
+        
+        limits = httpx.Limits(
+            max_connections=self.pool_config.max_connections,
+            max_keepalive_connections=self.pool_config.max_keepalive_connections,
+            keepalive_expiry=self.pool_config.keepalive_expiry
+        )
+        
+        logger.info(
+            f"Opening Apify connection pool (max {self.pool_config.max_connections} connections, "
+            f"HTTP/2: {'on' if use_http2 else 'off'})"
+        )
+        return httpx.AsyncClient(
+            timeout=self.retry_config.timeout,
+            limits=limits,
+            http2=use_http2,
+            transport=self._transport
+        )
     
     async def call_actor(
         self, 
         actor_name: str, 
         input_data: Dict[str, Any],
-        options: Optional[Dict[str, Any]] = None
+        options: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        fields: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Call an Apify actor with retry logic
         
+        Results are served from the response cache when available (stale
+        entries trigger a background refresh). Concurrent calls with the same
+        actor and payload share a single upstream run (single-flight). If the
+        actor fails or its circuit breaker is open, expired cached results are
+        returned as a fallback when there are any.
+        
         Args:
             actor_name: Name of the Apify actor (e.g., "jupri~skyscanner-flight")
             input_data: Input data for the actor
             options: Additional options (e.g., maxItems, timeout)
+            deadline: Request deadline; request timeouts, retries and backoff
+                are limited to the remaining budget
+            fields: Dataset fields to return, nested paths in dot notation
+                (e.g. "address.city"); None returns complete items
             
         Returns:
             List of results from the actor
             
         Raises:
             ApiClientError: When all retries are exhausted
+            DeadlineExceededError: When the deadline passes first
         """
         if not self.api_token:
             raise ApiClientError("No APIFY_TOKEN configured")
@@ -52,62 +180,258 @@ class ApifyClient:
         if options:
             payload["options"] = options
         
+        projection = FieldProjection(fields) if fields else None
+        key = self._request_key(actor_name, payload, projection)
+        
+        if self.cache is not None:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                if entry.is_fresh:
+                    logger.info(f"Cache hit for actor {actor_name} ({len(entry.value)} items)")
+                else:
+                    logger.info(f"Serving stale cache for actor {actor_name}, revalidating in background")
+                    self._schedule_revalidation(key, actor_name, payload, projection)
+                return list(entry.value)
+        
+        try:
+            if deadline is None:
+                return await self._fetch_and_store(key, actor_name, payload, projection=projection)
+            try:
+                return await deadline.wait_for(self._fetch_and_store(key, actor_name, payload, deadline, projection))
+            except asyncio.TimeoutError:
+                raise DeadlineExceededError(f"Deadline exceeded waiting for actor {actor_name}")
+        except ApiClientError as e:
+            fallback = await self._cached_fallback(key, actor_name, e)
+            if fallback is None:
+                raise
+            return fallback
+    
+    async def _fetch_and_store(
+        self,
+        key: str,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the actor (coalescing identical calls) and write the result to the cache
+        
+        A coalesced run lasts until the latest deadline of the callers waiting
+        for it (none if one has none), so a caller joining a run is not cut off
+        by an earlier caller's budget. Each caller limits its own wait.
+        """
+        if self.coalescer is None:
+            data = await self._call_and_store(key, actor_name, payload, deadline, projection)
+        else:
+            run_deadline = self._run_deadlines.get(key)
+            if run_deadline is not None:
+                run_deadline.extend(deadline)
+            
+            def start() -> "asyncio.Task":
+                shared = copy.copy(deadline)
+                task = asyncio.ensure_future(self._call_and_store(key, actor_name, payload, shared, projection))
+                if shared is not None:
+                    self._run_deadlines[key] = shared
+                    task.add_done_callback(lambda _task: self._forget_run_deadline(key, shared))
+                return task
+            
+            data = await self.coalescer.run(key, start)
+        
+        # Each caller gets its own list; the items themselves are shared read-only
+        return list(data)
+    
+    async def _call_and_store(
+        self,
+        key: str,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> List[Dict[str, Any]]:
+        """Run the actor and cache the result (once per run, however many callers share it)"""
+        data = await self._call_actor_with_retries(actor_name, payload, deadline, projection)
+        
+        # Only cache non-empty results; empty runs are usually transient scraper failures
+        if self.cache is not None and data:
+            await self.cache.set(key, data, ttl=self.cache_ttls.get(actor_name))
+        return data
+    
+    def _forget_run_deadline(self, key: str, deadline: Deadline) -> None:
+        if self._run_deadlines.get(key) is deadline:
+            del self._run_deadlines[key]
+    
+    async def _cached_fallback(
+        self,
+        key: str,
+        actor_name: str,
+        error: Exception
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return expired cached results for a failed call, if the cache still has them"""
+        if self.cache is None:
+            return None
+        
+        entry = await self.cache.get(key, include_expired=True)
+        if entry is None:
+            return None
+        
+        logger.warning(f"Actor {actor_name} unavailable ({error}) - serving {len(entry.value)} cached items")
+        return list(entry.value)
+    
+    def _schedule_revalidation(
+        self,
+        key: str,
+        actor_name: str,
+        payload: Dict[str, Any],
+        projection: Optional[FieldProjection] = None
+    ) -> None:
+        """Refresh a stale cache entry in the background (at most once per key)"""
+        if key in self._revalidations:
+            return
+        
+        async def revalidate():
+            try:
+                await self._fetch_and_store(key, actor_name, payload, projection=projection)
+                logger.info(f"Revalidated cache for actor {actor_name}")
+            except Exception as e:
+                logger.warning(f"Background revalidation failed for actor {actor_name}: {e}")
+            finally:
+                self._revalidations.pop(key, None)
+        
+        self._revalidations[key] = asyncio.ensure_future(revalidate())
+    
+    async def _call_actor_with_retries(
+        self,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> List[Dict[str, Any]]:
+        """Perform the actual actor run, retrying on transient failures"""
+        if self.run_config is not None:
+            # Async-run mode: collect all dataset pages of a polled run
+            data = []
+            async with aclosing(self._stream_async_run(actor_name, payload, deadline, projection)) as pages:
+                async for page in pages:
+                    data.extend(page)
+            logger.info(f"Actor {actor_name} returned {len(data)} items")
+            return data
+        
         url = f"{self.base_url}/{actor_name}/run-sync-get-dataset-items"
-        headers = {"Authorization": f"Bearer {self.api_token}"}
         
         logger.info(f"Calling actor: {actor_name}")
-        logger.debug(f"Input data: {input_data}")
+        logger.debug(f"Input data: {payload}")
+        
+        data = await self._request_with_retries(
+            "POST", url, actor_name, deadline=deadline, json=payload, params=self._dataset_params(projection)
+        )
+        logger.info(f"Actor {actor_name} returned {len(data)} items")
+        if projection is not None:
+            data = projection.apply_all(data)
+        return data
+    
+    async def _request_with_retries(
+        self,
+        method: str,
+        url: str,
+        actor_name: str,
+        limited: bool = True,
+        deadline: Optional[Deadline] = None,
+        **request_kwargs
+    ) -> Any:
+        """
+        Send an authenticated Apify API request with retry logic
+        
+        Args:
+            limited: Hold one of the actor's concurrency slots for the request.
+                Polling and paging calls of an async run pass False because
+                the run already holds a slot.
+            deadline: Caps each attempt's timeout; no retry is started whose
+                backoff would not leave time for the request
         
+        Returns:
+            Decoded JSON body of the first successful response
+            
+        Raises:
+            ApiClientError: When all retries are exhausted
+            DeadlineExceededError: When the deadline leaves no time for (another) attempt
+        """
+        headers = {"Authorization": f"Bearer {self.api_token}"}
         last_exception = None
+        retry_after = None
         
         for attempt in range(self.retry_config.max_retries):
             try:
+                # Fail fast (without sleeping) while the actor or API is known to be down
+                self._check_circuits(actor_name)
+                
                 # Calculate delay for this attempt
                 if attempt > 0:
-                    delay = self._calculate_delay(attempt)
+                    delay = self._calculate_delay(attempt, retry_after)
+                    self._check_deadline(deadline, actor_name, delay, last_exception)
                     logger.info(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{self.retry_config.max_retries})")
                     await asyncio.sleep(delay)
                 
-                # Make the API call
-                async with httpx.AsyncClient(timeout=self.retry_config.timeout) as client:
-                    logger.debug(f"Making API request to {url}")
-                    response = await client.post(url, headers=headers, json=payload)
-                    
-                    # Log response status
-                    logger.debug(f"Response status: {response.status_code}")
-                    
-                    # Check for success
-                    if response.status_code in [200, 201]:
-                        data = response.json()
-                        logger.info(f"Actor {actor_name} returned {len(data)} items")
-                        return data
-                    
-                    # Handle API errors
-                    error_msg = f"API returned status {response.status_code}"
-                    if response.text:
-                        error_msg += f": {response.text[:200]}"
-                    
-                    logger.warning(f"API error on attempt {attempt + 1}: {error_msg}")
-                    
-                    # Decide whether to retry based on status code
-                    if not self._should_retry(response.status_code):
-                        raise ApiClientError(f"Non-retryable error: {error_msg}")
-                    
-                    last_exception = ApiClientError(error_msg)
-                    
-            except asyncio.TimeoutError as e:
+                # Make the API call over the shared connection pool
+                client = self._get_client()
+                logger.debug(f"Making API request: {method} {url}")
+                async with self._concurrency_slot(actor_name, limited):
+                    self._check_deadline(deadline, actor_name, 0.0, last_exception)
+                    if deadline is not None:
+                        request_kwargs["timeout"] = deadline.cap(self.retry_config.timeout)
+                    response = await client.request(method, url, headers=headers, **request_kwargs)
+                
+                # Log response status
+                logger.debug(f"Response status: {response.status_code} ({response.http_version})")
+                
+                # Check for success
+                if response.status_code in [200, 201]:
+                    self._record_success(actor_name, limited)
+                    self._record_circuit_success(actor_name)
+                    return response.json()
+                
+                # Handle API errors
+                error_msg = f"API returned status {response.status_code}"
+                if response.text:
+                    error_msg += f": {response.text[:200]}"
+                
+                logger.warning(f"API error on attempt {attempt + 1}: {error_msg}")
+                
+                # Decide whether to retry based on status code
+                if not self._should_retry(response.status_code):
+                    self._record_circuit_success(actor_name)  # The upstream is up; the request was bad
+                    raise ApiClientError(f"Non-retryable error: {error_msg}")
+                
+                retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                self._record_overload(actor_name, retry_after)
+                self._record_circuit_failure(actor_name, response.status_code)
+                last_exception = ApiClientError(error_msg)
+                
+            except ApiClientError:
+                raise
+                
+            except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+                if deadline is not None and deadline.expired:
+                    # Cut short by our own budget - not a sign of an overloaded upstream
+                    raise DeadlineExceededError(f"Deadline exceeded during request to actor {actor_name}")
                 error_msg = f"Request timeout after {self.retry_config.timeout}s"
                 logger.warning(f"Timeout on attempt {attempt + 1}: {error_msg}")
+                retry_after = None
+                self._record_overload(actor_name, None)
+                self._record_circuit_failure(actor_name)
                 last_exception = ApiClientError(error_msg)
                 
             except httpx.RequestError as e:
                 error_msg = f"Request error: {str(e)}"
                 logger.warning(f"Request error on attempt {attempt + 1}: {error_msg}")
+                retry_after = None
+                self._record_circuit_failure(actor_name, host_failure=True)
                 last_exception = ApiClientError(error_msg)
                 
             except Exception as e:
                 error_msg = f"Unexpected error: {str(e)}"
                 logger.error(f"Unexpected error on attempt {attempt + 1}: {error_msg}")
+                retry_after = None
                 last_exception = ApiClientError(error_msg)
         
         # All retries exhausted
@@ -118,14 +442,437 @@ class ApifyClient:
         logger.error(final_error)
         raise ApiClientError(final_error)
     
-    def _calculate_delay(self, attempt: int) -> float:
-        """Calculate delay for exponential backoff"""
+    # ------------------------------------------------------------------
+    # Streaming: async runs with paged datasets, incremental decoding
+    # ------------------------------------------------------------------
+    
+    async def iter_actor_pages(
+        self,
+        actor_name: str,
+        input_data: Dict[str, Any],
+        options: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        fields: Optional[List[str]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield actor results page by page
+        
+        In async-run mode the run is started in the background and dataset pages
+        are yielded while the actor is still scraping, so callers can parse and
+        rank early results and stop reading (which aborts the run) once they have
+        enough. With stream decoding, the run-sync response body is decoded
+        incrementally and items are yielded as they arrive. Otherwise the whole
+        result of call_actor is yielded as one page.
+        
+        When the deadline passes while streaming, iteration ends quietly after
+        the pages received so far (partial results are not cached). With
+        fields, only those (possibly nested) fields of each item are returned.
+        
+        Consume with contextlib.aclosing() so an early exit aborts the run promptly.
+        """
+        if self.run_config is None and not self.stream_decode:
+            data = await self.call_actor(actor_name, input_data, options, deadline, fields)
+            if data:
+                yield data
+            return
+        
+        if not self.api_token:
+            raise ApiClientError("No APIFY_TOKEN configured")
+        
+        payload = input_data.copy()
+        if options:
+            payload["options"] = options
+        
+        projection = FieldProjection(fields) if fields else None
+        key = self._request_key(actor_name, payload, projection)
+        
+        if self.cache is not None:
+            entry = await self.cache.get(key)
+            if entry is not None:
+                if not entry.is_fresh:
+                    self._schedule_revalidation(key, actor_name, payload, projection)
+                yield list(entry.value)
+                return
+        
+        # Stream pages; only a completely read dataset is written to the cache
+        if self.run_config is not None:
+            stream = self._stream_async_run(actor_name, payload, deadline, projection)
+        else:
+            stream = self._stream_sync_run(actor_name, payload, deadline, projection)
+        
+        collected = []
+        try:
+            async with aclosing(stream) as pages:
+                async for page in pages:
+                    collected.extend(page)
+                    yield page
+        except ApiClientError as e:
+            if collected and isinstance(e, DeadlineExceededError):
+                logger.warning(f"Deadline reached - returning {len(collected)} items from actor {actor_name}")
+                return
+            fallback = None if collected else await self._cached_fallback(key, actor_name, e)
+            if fallback is None:
+                raise
+            yield fallback
+            return
+        
+        if self.cache is not None and collected:
+            await self.cache.set(key, collected, ttl=self.cache_ttls.get(actor_name))
+    
+    async def _stream_sync_run(
+        self,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Call run-sync-get-dataset-items and decode the response body incrementally
+        
+        Items are yielded in the batches completed by each received chunk, so the
+        full JSON list is never materialized. Failed attempts are retried only
+        until the first item has been yielded.
+        """
+        url = f"{self.base_url}/{actor_name}/run-sync-get-dataset-items"
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+        last_exception = None
+        retry_after = None
+        
+        logger.info(f"Calling actor (streaming): {actor_name}")
+        
+        for attempt in range(self.retry_config.max_retries):
+            yielded = False
+            try:
+                self._check_circuits(actor_name)
+                
+                if attempt > 0:
+                    delay = self._calculate_delay(attempt, retry_after)
+                    self._check_deadline(deadline, actor_name, delay, last_exception)
+                    logger.info(f"Retrying in {delay:.1f}s (attempt {attempt + 1}/{self.retry_config.max_retries})")
+                    await asyncio.sleep(delay)
+                
+                client = self._get_client()
+                async with self._concurrency_slot(actor_name, True):
+                    self._check_deadline(deadline, actor_name, 0.0, last_exception)
+                    timeout = deadline.cap(self.retry_config.timeout) if deadline else self.retry_config.timeout
+                    async with client.stream(
+                        "POST", url, headers=headers, json=payload,
+                        params=self._dataset_params(projection), timeout=timeout
+                    ) as response:
+                        if response.status_code not in [200, 201]:
+                            body = (await response.aread()).decode("utf-8", errors="replace")
+                            error_msg = f"API returned status {response.status_code}"
+                            if body:
+                                error_msg += f": {body[:200]}"
+                            logger.warning(f"API error on attempt {attempt + 1}: {error_msg}")
+                            if not self._should_retry(response.status_code):
+                                self._record_circuit_success(actor_name)
+                                raise ApiClientError(f"Non-retryable error: {error_msg}")
+                            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                            self._record_overload(actor_name, retry_after)
+                            self._record_circuit_failure(actor_name, response.status_code)
+                            last_exception = ApiClientError(error_msg)
+                            continue
+                        
+                        self._record_success(actor_name, True)
+                        self._record_circuit_success(actor_name)
+                        decoder = JsonArrayStreamDecoder()
+                        async for chunk in response.aiter_text():
+                            items = decoder.feed(chunk)
+                            if items:
+                                yielded = True
+                                yield projection.apply_all(items) if projection else items
+                            if deadline is not None and deadline.expired:
+                                raise DeadlineExceededError(
+                                    f"Deadline exceeded after {decoder.items_decoded} items from actor {actor_name}"
+                                )
+                        
+                        items = decoder.close()
+                        if items:
+                            yield projection.apply_all(items) if projection else items
+                        
+                        logger.info(f"Actor {actor_name} streamed {decoder.items_decoded} items")
+                        return
+                
+            except ApiClientError:
+                raise
+            except httpx.TimeoutException as e:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceededError(f"Deadline exceeded during request to actor {actor_name}")
+                if yielded:
+                    raise ApiClientError(f"Stream from actor {actor_name} broke off: {e}")
+                logger.warning(f"Timeout on attempt {attempt + 1}: {e}")
+                retry_after = None
+                self._record_overload(actor_name, None)
+                self._record_circuit_failure(actor_name)
+                last_exception = ApiClientError(f"Request timeout after {self.retry_config.timeout}s")
+            except (httpx.RequestError, ValueError) as e:
+                if yielded:
+                    raise ApiClientError(f"Stream from actor {actor_name} broke off: {e}")
+                logger.warning(f"Request error on attempt {attempt + 1}: {e}")
+                if isinstance(e, httpx.RequestError):
+                    self._record_circuit_failure(actor_name, host_failure=True)
+                last_exception = ApiClientError(f"Request error: {str(e)}")
+        
+        final_error = f"All {self.retry_config.max_retries} attempts failed for actor {actor_name}"
+        if last_exception:
+            final_error += f". Last error: {last_exception}"
+        
+        logger.error(final_error)
+        raise ApiClientError(final_error)
+    
+    async def _stream_async_run(
+        self,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Start an actor run and page through its dataset until the run has finished
+        
+        The run holds one of the actor's concurrency slots from start to finish
+        (or abort), so the limit applies to runs rather than to individual polls.
+        """
+        async with self._concurrency_slot(actor_name, True):
+            async with aclosing(self._page_async_run(actor_name, payload, deadline, projection)) as pages:
+                async for page in pages:
+                    yield page
+    
+    async def _page_async_run(
+        self,
+        actor_name: str,
+        payload: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+        projection: Optional[FieldProjection] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Page loop of _stream_async_run (aborts the run if it is left early)"""
+        config = self.run_config
+        max_items = (payload.get("options") or {}).get("maxItems")
+        
+        logger.info(f"Starting async run for actor: {actor_name}")
+        run = await self._request_with_retries(
+            "POST", f"{self.base_url}/{actor_name}/runs", actor_name, limited=False, deadline=deadline, json=payload
+        )
+        run_data = run.get("data", {})
+        run_id = run_data.get("id")
+        dataset_id = run_data.get("defaultDatasetId")
+        if not run_id or not dataset_id:
+            raise ApiClientError(f"Actor {actor_name} did not return a run ID")
+        self._record_success(actor_name, True)  # Run accepted - counts towards the actor's limit
+        
+        items_url = f"{self.api_url}/datasets/{dataset_id}/items"
+        run_url = f"{self.api_url}/actor-runs/{run_id}"
+        offset = 0
+        run_finished = False
+        started = time.monotonic()
+        
+        try:
+            while True:
+                limit = config.page_size
+                if max_items:
+                    limit = min(limit, max_items - offset)
+                
+                page = []
+                if limit > 0:
+                    page = await self._request_with_retries(
+                        "GET", items_url, actor_name, limited=False, deadline=deadline,
+                        params={"offset": offset, "limit": limit, "clean": "true", "format": "json",
+                                **self._dataset_params(projection)}
+                    )
+                
+                if page:
+                    offset += len(page)
+                    logger.debug(f"Actor {actor_name} run {run_id}: page of {len(page)} items (total {offset})")
+                    yield projection.apply_all(page) if projection else page
+                    if len(page) >= limit:
+                        continue  # Full page - more items may already be waiting
+                
+                if run_finished or (max_items and offset >= max_items):
+                    break
+                
+                # Dataset drained for now - check whether the run is still going
+                status = (await self._request_with_retries("GET", run_url, actor_name, limited=False, deadline=deadline)).get("data", {}).get("status")
+                if status in TERMINAL_RUN_STATUSES:
+                    run_finished = True
+                    if status != "SUCCEEDED":
+                        logger.warning(f"Actor {actor_name} run {run_id} ended with status {status}")
+                        if offset == 0:
+                            raise ApiClientError(f"Actor {actor_name} run {run_id} ended with status {status}")
+                    continue  # Drain items written after the last page
+                
+                if time.monotonic() - started > config.run_timeout:
+                    logger.warning(f"Actor {actor_name} run {run_id} exceeded {config.run_timeout}s - stopping")
+                    break
+                
+                if deadline is not None:
+                    if deadline.remaining <= config.poll_interval:
+                        raise DeadlineExceededError(f"Deadline exceeded after {offset} items from actor {actor_name} run {run_id}")
+                await asyncio.sleep(config.poll_interval)
+            
+            logger.info(f"Actor {actor_name} run {run_id} streamed {offset} items")
+            
+        finally:
+            if not run_finished:
+                await self._abort_run(run_id, actor_name)
+    
+    async def _abort_run(self, run_id: str, actor_name: str) -> None:
+        """Abort a run whose results are no longer needed (best effort)"""
+        try:
+            client = self._get_client()
+            await client.post(
+                f"{self.api_url}/actor-runs/{run_id}/abort",
+                headers={"Authorization": f"Bearer {self.api_token}"},
+                timeout=10.0
+            )
+            logger.info(f"Aborted actor {actor_name} run {run_id}")
+        except Exception as e:
+            logger.warning(f"Failed to abort actor {actor_name} run {run_id}: {e}")
+    
+    @staticmethod
+    def _request_key(actor_name: str, payload: Dict[str, Any], projection: Optional[FieldProjection]) -> str:
+        """Cache and coalescing key; projected results never mix with complete ones"""
+        if projection is None:
+            return make_request_key(actor_name, payload)
+        return make_request_key(actor_name, {"input": payload, "fields": projection.paths})
+    
+    @staticmethod
+    def _dataset_params(projection: Optional[FieldProjection]) -> Dict[str, str]:
+        """Query parameters selecting the top-level dataset fields of a projection"""
+        if projection is None:
+            return {}
+        return {"fields": projection.query_param}
+    
+    def _calculate_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Calculate delay for exponential backoff
+        
+        With jitter the delay is drawn from [delay/2, delay] ("equal jitter").
+        A Retry-After hint from the server is honored up to max_delay.
+        """
         if not self.retry_config.exponential_backoff:
-            return self.retry_config.base_delay
+            delay = self.retry_config.base_delay
+        else:
+            # Exponential backoff: base_delay * (2 ^ attempt)
+            delay = min(self.retry_config.base_delay * (2 ** attempt), self.retry_config.max_delay)
+        
+        if self.retry_config.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
         
-        # Exponential backoff: base_delay * (2 ^ attempt)
-        delay = self.retry_config.base_delay * (2 ** attempt)
-        return min(delay, self.retry_config.max_delay)
+        if retry_after:
+            delay = max(delay, min(retry_after, self.retry_config.max_delay))
+        return delay
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header (delta seconds or HTTP date) into seconds"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            logger.debug(f"Ignoring unparseable Retry-After header: {value!r}")
+            return None
+    
+    @staticmethod
+    def _check_deadline(
+        deadline: Optional[Deadline],
+        actor_name: str,
+        needed: float,
+        last_exception: Optional[Exception]
+    ) -> None:
+        """Raise DeadlineExceededError unless more than `needed` seconds of the budget are left"""
+        if deadline is None or deadline.remaining > needed:
+            return
+        error = f"Deadline exceeded for actor {actor_name}"
+        if last_exception:
+            error += f". Last error: {last_exception}"
+        raise DeadlineExceededError(error)
+    
+    # ------------------------------------------------------------------
+    # Circuit breakers (per actor and for the Apify API host)
+    # ------------------------------------------------------------------
+    
+    def _check_circuits(self, actor_name: str) -> None:
+        """
+        Raise CircuitOpenError without any I/O if the API or the actor is down
+        
+        The actor is asked first: a half-open breaker hands out its single
+        probe slot on allow_request(), and a call rejected by the actor's
+        breaker must not use up the host's probe (locking every other actor
+        out). A probe slot of the actor is given back if the host rejects.
+        
+        Raises:
+            CircuitOpenError: When the host or actor breaker is open
+        """
+        if self.breakers is None:
+            return
+        actor = self.breakers.get(actor_name)
+        if not actor.allow_request():
+            raise self._circuit_open(actor_name, actor)
+        host = self.breakers.get(APIFY_HOST_BREAKER)
+        if not host.allow_request():
+            actor.release_probe()
+            raise self._circuit_open(APIFY_HOST_BREAKER, host)
+    
+    @staticmethod
+    def _circuit_open(name: str, breaker: CircuitBreaker) -> "CircuitOpenError":
+        return CircuitOpenError(f"Circuit breaker for {name} is open - failing fast (next probe in {breaker.retry_in:.0f}s)")
+    
+    def _record_circuit_success(self, actor_name: str) -> None:
+        if self.breakers is not None:
+            self.breakers.get(APIFY_HOST_BREAKER).record_success()
+            self.breakers.get(actor_name).record_success()
+    
+    def _record_circuit_failure(
+        self,
+        actor_name: str,
+        status_code: Optional[int] = None,
+        host_failure: bool = False
+    ) -> None:
+        """
+        Count a 5xx, timeout or connection error against the actor
+        
+        Connection errors and gateway errors (502-504) also count against the
+        Apify host breaker. 429 is throttling, handled by the concurrency
+        limiter, and does not count as a failure.
+        """
+        if self.breakers is None or status_code == 429:
+            return
+        self.breakers.get(actor_name).record_failure()
+        if host_failure or status_code in GATEWAY_ERROR_CODES:
+            self.breakers.get(APIFY_HOST_BREAKER).record_failure()
+    
+    # ------------------------------------------------------------------
+    # Per-actor adaptive concurrency
+    # ------------------------------------------------------------------
+    
+    def _get_limiter(self, actor_name: str) -> AdaptiveConcurrencyLimiter:
+        limiter = self.limiters.get(actor_name)
+        if limiter is None:
+            limiter = AdaptiveConcurrencyLimiter(actor_name, self.concurrency_config)
+            self.limiters[actor_name] = limiter
+        return limiter
+    
+    def _concurrency_slot(self, actor_name: str, limited: bool):
+        """Context manager holding one of the actor's slots (no-op when not limited)"""
+        if not limited or self.concurrency_config is None:
+            return nullcontext()
+        return self._get_limiter(actor_name).slot()
+    
+    def _record_success(self, actor_name: str, limited: bool) -> None:
+        # Polls and dataset pages of a run should not grow the run limit
+        if limited and self.concurrency_config is not None:
+            self._get_limiter(actor_name).on_success()
+    
+    def _record_overload(self, actor_name: str, retry_after: Optional[float]) -> None:
+        # Any 429/5xx/timeout is a sign of pushback, whichever call received it
+        if self.concurrency_config is not None:
+            self._get_limiter(actor_name).on_overload(retry_after)
     
     def _should_retry(self, status_code: int) -> bool:
         """Determine if we should retry based on HTTP status code"""
@@ -133,27 +880,38 @@ class ApifyClient:
         retryable_codes = {500, 502, 503, 504, 429}
         return status_code in retryable_codes
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client statistics for the metrics endpoint"""
+        return {
+            "coalescing": self.coalescer.get_stats() if self.coalescer else {"enabled": False},
+            "cache": self.cache.get_stats() if self.cache else {"enabled": False},
+            "revalidating": len(self._revalidations),
+            "concurrency": {name: limiter.get_stats() for name, limiter in self.limiters.items()},
+            "circuit_breakers": self.breakers.get_stats() if self.breakers else {"enabled": False}
+        }
+    
     async def health_check(self) -> Dict[str, Any]:
         """Check if the API is accessible"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    "https://api.apify.com/v2/users/me",
-                    headers={"Authorization": f"Bearer {self.api_token}"}
-                )
-                
-                if response.status_code == 200:
-                    user_data = response.json()
-                    return {
-                        "status": "healthy",
-                        "message": f"Connected as {user_data.get('username', 'Unknown')}",
-                        "user_id": user_data.get('id')
-                    }
-                else:
-                    return {
-                        "status": "error", 
-                        "message": f"API returned {response.status_code}"
-                    }
+            client = self._get_client()
+            response = await client.get(
+                f"{self.api_url}/users/me",
+                headers={"Authorization": f"Bearer {self.api_token}"},
+                timeout=30.0
+            )
+            
+            if response.status_code == 200:
+                user_data = response.json()
+                return {
+                    "status": "healthy",
+                    "message": f"Connected as {user_data.get('username', 'Unknown')}",
+                    "user_id": user_data.get('id')
+                }
+            else:
+                return {
+                    "status": "error", 
+                    "message": f"API returned {response.status_code}"
+                }
                     
         except Exception as e:
             return {
@@ -165,8 +923,40 @@ class ApiClientError(Exception):
     """Custom exception for API client errors"""
     pass
 
+class CircuitOpenError(ApiClientError):
+    """Raised without calling the API while a circuit breaker is open"""
+    pass
+
+class DeadlineExceededError(ApiClientError):
+    """Raised when the caller's deadline leaves no time for the (next) request"""
+    pass
+
 # Factory function for easy client creation
-def create_apify_client(api_token: str, **retry_kwargs) -> ApifyClient:
-    """Create an Apify client with optional retry configuration"""
+def create_apify_client(
+    api_token: str,
+    api_url: str = "https://api.apify.com/v2",
+    pool_config: Optional[PoolConfig] = None,
+    coalesce_requests: bool = True,
+    cache: Optional[TwoTierCache] = None,
+    cache_ttls: Optional[Dict[str, float]] = None,
+    run_config: Optional[AsyncRunConfig] = None,
+    stream_decode: bool = False,
+    concurrency_config: Optional[ConcurrencyConfig] = None,
+    breakers: Optional[CircuitBreakerRegistry] = None,
+    **retry_kwargs
+) -> ApifyClient:
+    """Create an Apify client with optional retry, connection pool and cache configuration"""
     retry_config = RetryConfig(**retry_kwargs) if retry_kwargs else RetryConfig()
-    return ApifyClient(api_token, retry_config)
\ No newline at end of file
+    return ApifyClient(
+        api_token,
+        retry_config,
+        pool_config,
+        api_url=api_url,
+        coalesce_requests=coalesce_requests,
+        cache=cache,
+        cache_ttls=cache_ttls,
+        run_config=run_config,
+        stream_decode=stream_decode,
+        concurrency_config=concurrency_config,
+        breakers=breakers
+    )
\ No newline at end of file
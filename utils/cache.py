@@ -0,0 +1,337 @@
+# utils/cache.py - Two-Tier Cache (In-Memory LRU + SQLite on Disk)
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CacheConfig:
+    """Configuration for the two-tier cache"""
+    default_ttl: float = 300.0  # Seconds an entry is fresh
+    stale_ttl: float = 600.0  # Extra seconds an expired entry may be served while revalidating
+    fallback_ttl: float = 86400.0  # Extra seconds a dead entry is kept as a fallback while the upstream is down
+    memory_max_entries: int = 256
+    memory_max_bytes: int = 64 * 1024 * 1024
+    disk_path: Optional[str] = None  # SQLite file; None disables the disk tier
+    disk_max_bytes: int = 512 * 1024 * 1024
+
+@dataclass
+class CacheEntry:
+    """A cached value with its freshness window (wall-clock timestamps)"""
+    value: Any
+    size: int
+    expires_at: float
+    stale_until: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def is_servable(self) -> bool:
+        """Fresh, or expired but still inside the stale-while-revalidate window"""
+        return time.time() < self.stale_until
+
+class TwoTierCache:
+    """
+    Bounded in-memory LRU in front of a persistent SQLite store
+
+    Values must be JSON-serializable. The memory tier is per process; the SQLite
+    tier (WAL mode) survives restarts and is shared by all workers on the host.
+    Both tiers evict by size: the memory tier least-recently-used first, the
+    disk tier by oldest last access. The disk tier is swept when this
+    process's running byte total passes the limit, and every SWEEP_EVERY
+    writes to catch up with other workers' writes.
+    """
+
+    SWEEP_EVERY = 100  # Disk writes between sweeps (dead entries, size limit)
+
+    def __init__(self, config: Optional[CacheConfig] = None, namespace: str = "default"):
+        self.config = config or CacheConfig()
+        self.namespace = namespace
+
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_bytes = 0  # Estimated store size (exact after each sweep; replaced entries count twice)
+        self._writes_since_sweep = 0
+        self._sweep_lock = threading.Lock()  # Guards the two counters above
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stale_hits": 0, "fallback_hits": 0, "writes": 0, "evictions": 0}
+
+        if self.config.disk_path:
+            self._open_disk_tier(self.config.disk_path)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        """
+        Look up a key in memory, then on disk
+
+        Args:
+            include_expired: Also return entries past their stale window (but
+                inside fallback_ttl), for use while the upstream is unavailable
+
+        Returns:
+            The entry if it is still servable (fresh or stale), otherwise None
+        """
+        entry = self._memory_get(key, include_expired)
+        if entry is not None:
+            self._count_hit("memory_hits", entry)
+            return entry
+
+        if self._db is not None:
+            entry = await asyncio.to_thread(self._disk_get, key, include_expired)
+            if entry is not None:
+                self._memory_set(key, entry)
+                self._count_hit("disk_hits", entry)
+                return entry
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value in both tiers"""
+        ttl = self.config.default_ttl if ttl is None else ttl
+        encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+        now = time.time()
+        entry = CacheEntry(
+            value=value,
+            size=len(encoded),
+            expires_at=now + ttl,
+            stale_until=now + ttl + self.config.stale_ttl
+        )
+
+        self._memory_set(key, entry)
+        self.stats["writes"] += 1
+
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, encoded, entry)
+
+    async def warm(self, limit: Optional[int] = None) -> int:
+        """
+        Load the most recently used servable entries of this namespace from disk into memory
+
+        Lets a restarted worker answer its first requests from memory instead of one SQLite read each.
+
+        Args:
+            limit: Most entries to load (at most memory_max_entries)
+
+        Returns:
+            Number of entries loaded
+        """
+        if self._db is None:
+            return 0
+        limit = self.config.memory_max_entries if limit is None else min(limit, self.config.memory_max_entries)
+        rows = await asyncio.to_thread(
+            self._disk_execute,
+            "SELECT key, value, size, expires_at, stale_until FROM cache_entries "
+            "WHERE namespace = ? AND stale_until > ? ORDER BY last_access DESC LIMIT ?",
+            (self.namespace, time.time(), limit)
+        )
+
+        loaded = 0
+        for key, value, size, expires_at, stale_until in reversed(rows):  # Most recently used ends up last in the LRU
+            if key in self._memory:
+                continue
+            try:
+                decoded = json.loads(value)
+            except ValueError:
+                continue
+            self._memory_set(key, CacheEntry(value=decoded, size=size, expires_at=expires_at, stale_until=stale_until))
+            loaded += 1
+        return loaded
+
+    async def delete(self, key: str) -> None:
+        """Remove a key from both tiers"""
+        self._memory_pop(key)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_execute, "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    async def clear(self) -> None:
+        """Remove all entries of this namespace from both tiers"""
+        self._memory.clear()
+        self._memory_bytes = 0
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_execute, "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_enabled": self._db is not None
+        }
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _count_hit(self, counter: str, entry: CacheEntry) -> None:
+        self.stats[counter] += 1
+        if not entry.is_servable:
+            self.stats["fallback_hits"] += 1
+        elif not entry.is_fresh:
+            self.stats["stale_hits"] += 1
+
+    def _memory_get(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry.stale_until + self.config.fallback_ttl:
+            self._memory_pop(key)
+            return None
+        if not entry.is_servable and not include_expired:
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _memory_set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.config.memory_max_bytes:
+            return  # Too large for the memory tier; disk only
+
+        self._memory_pop(key)
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+
+        while self._memory and (
+            len(self._memory) > self.config.memory_max_entries or
+            self._memory_bytes > self.config.memory_max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+            self.stats["evictions"] += 1
+
+    def _memory_pop(self, key: str) -> None:
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+
+    # ------------------------------------------------------------------
+    # Disk tier (SQLite)
+    # ------------------------------------------------------------------
+
+    def _open_disk_tier(self, path: str) -> None:
+        """Open (and create) the SQLite store shared between worker processes"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    stale_until REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_stale_until ON cache_entries (stale_until)")
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            logger.info(f"Cache '{self.namespace}' using SQLite store: {os.path.abspath(path)}")
+
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open cache database {path}: {e} - using memory tier only")
+            self._db = None
+
+    def _disk_execute(self, sql: str, params: tuple = ()) -> list:
+        with self._db_lock:
+            if self._db is None:
+                return []
+            try:
+                return self._db.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache database error: {e}")
+                return []
+
+    def _disk_get(self, key: str, include_expired: bool = False) -> Optional[CacheEntry]:
+        now = time.time()
+        oldest = now - self.config.fallback_ttl if include_expired else now
+        rows = self._disk_execute(
+            "SELECT value, size, expires_at, stale_until FROM cache_entries "
+            "WHERE namespace = ? AND key = ? AND stale_until > ?",
+            (self.namespace, key, oldest)
+        )
+        if not rows:
+            return None
+
+        value, size, expires_at, stale_until = rows[0]
+        self._disk_execute(
+            "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+            (now, self.namespace, key)
+        )
+
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return None
+        return CacheEntry(value=decoded, size=size, expires_at=expires_at, stale_until=stale_until)
+
+    def _disk_set(self, key: str, encoded: bytes, entry: CacheEntry) -> None:
+        self._disk_execute(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(namespace, key, value, size, expires_at, stale_until, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, encoded, entry.size, entry.expires_at, entry.stale_until, time.time())
+        )
+        with self._sweep_lock:
+            self._disk_bytes += entry.size
+            self._writes_since_sweep += 1
+            sweep = self._disk_bytes > self.config.disk_max_bytes or self._writes_since_sweep >= self.SWEEP_EVERY
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """Drop dead entries, then least recently used ones until under the size limit"""
+        self._disk_execute("DELETE FROM cache_entries WHERE stale_until <= ?", (time.time() - self.config.fallback_ttl,))
+
+        rows = self._disk_execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries")
+        total = rows[0][0] if rows else 0
+        self._disk_bytes = total
+        if total <= self.config.disk_max_bytes:
+            return
+
+        # Evict down to 90% to avoid evicting on every write
+        target = int(self.config.disk_max_bytes * 0.9)
+        for namespace, key, size in self._disk_execute(
+            "SELECT namespace, key, size FROM cache_entries ORDER BY last_access ASC"
+        ):
+            if total <= target:
+                break
+            self._disk_execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            total -= size
+            self.stats["evictions"] += 1
+        self._disk_bytes = total
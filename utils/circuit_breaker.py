@@ -0,0 +1,135 @@
+# utils/circuit_breaker.py - Circuit Breakers for Upstream Actors and Hosts
+from typing import Dict, Any, Optional
+from collections import deque
+from dataclasses import dataclass
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = "closed"  # Calls pass through; consecutive failures are counted
+OPEN = "open"  # Calls fail immediately until the recovery timeout has passed
+HALF_OPEN = "half_open"  # One probe call is let through to test the upstream
+
+@dataclass
+class CircuitBreakerConfig:
+    """Configuration for circuit breakers"""
+    failure_threshold: int = 5  # Consecutive failures that open the breaker
+    recovery_timeout: float = 30.0  # Seconds before an open breaker lets a probe through
+    history_size: int = 20  # State transitions kept for the health endpoint
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker for one upstream
+
+    Callers ask allow_request() before calling the upstream and report the
+    outcome with record_success() / record_failure(). While open, requests are
+    rejected without any I/O. After recovery_timeout a single probe is allowed
+    (half-open): success closes the breaker, failure opens it again. A probe
+    that never reports back is replaced by a new one after another timeout.
+    """
+
+    def __init__(self, name: str, config: Optional[CircuitBreakerConfig] = None):
+        self.name = name
+        self.config = config or CircuitBreakerConfig()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self.history = deque(maxlen=self.config.history_size)
+        self._opened_at = 0.0
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets the next probe through"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.config.recovery_timeout - time.monotonic())
+
+    def allow_request(self) -> bool:
+        """Return True if a call to the upstream may be made now"""
+        if self.state == CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.config.recovery_timeout:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+
+        # Half-open: exactly one probe at a time
+        if self._probe_started_at is None or now - self._probe_started_at >= self.config.recovery_timeout:
+            self._probe_started_at = now
+            return True
+
+        self.rejected += 1
+        return False
+
+    def release_probe(self) -> None:
+        """Give back a half-open probe slot from allow_request() when the call is not made after all"""
+        if self.state == HALF_OPEN:
+            self._probe_started_at = None
+
+    def record_success(self) -> None:
+        """Report a successful call"""
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Report a failed call (5xx, timeout, connection error)"""
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or (
+            self.state == CLOSED and self.consecutive_failures >= self.config.failure_threshold
+        ):
+            self._transition(OPEN)
+
+    def _transition(self, new_state: str) -> None:
+        old_state = self.state
+        self.state = new_state
+        self._probe_started_at = None
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+
+        transition = f"{old_state}->{new_state}"
+        self.transitions[transition] = self.transitions.get(transition, 0) + 1
+        self.history.append({"transition": transition, "at": time.time()})
+
+        log = logger.warning if new_state == OPEN else logger.info
+        log(f"Circuit breaker {self.name}: {old_state} → {new_state} ({self.consecutive_failures} consecutive failures)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and transition counts for the health/metrics endpoints"""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "retry_in": round(self.retry_in, 1),
+            "transitions": dict(self.transitions),
+            "recent_transitions": list(self.history)
+        }
+
+class CircuitBreakerRegistry:
+    """Named circuit breakers (per actor and per external host) sharing one configuration"""
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        self.config = config or CircuitBreakerConfig()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Return the breaker for an upstream, creating it on first use"""
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, self.config)
+            self.breakers[name] = breaker
+        return breaker
+
+    def open_circuits(self) -> list:
+        """Names of all breakers that are currently not closed"""
+        return [name for name, breaker in self.breakers.items() if breaker.state != CLOSED]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: breaker.get_stats() for name, breaker in self.breakers.items()}
@@ -0,0 +1,112 @@
+# utils/concurrency.py - Adaptive (AIMD) Concurrency Limiter for Upstream Calls
+from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ConcurrencyConfig:
+    """Configuration for the per-actor adaptive concurrency limit"""
+    initial_limit: float = 4.0
+    min_limit: float = 1.0
+    max_limit: float = 32.0
+    increase_step: float = 1.0  # Added per full window of successful calls
+    decrease_factor: float = 0.5  # Multiplied on 429, 5xx or timeout
+    decrease_cooldown: float = 1.0  # Seconds; one burst of failures only halves once
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency gate whose limit adapts with AIMD (like TCP congestion control)
+
+    Every success raises the limit by increase_step / limit, i.e. by roughly
+    increase_step per window of successful calls. An overload signal (429, 5xx,
+    timeout) multiplies it by decrease_factor. A Retry-After hint additionally
+    pauses new calls until the upstream is willing to accept them again.
+    """
+
+    def __init__(self, name: str, config: Optional[ConcurrencyConfig] = None):
+        self.name = name
+        self.config = config or ConcurrencyConfig()
+        self.limit = self.config.initial_limit
+        self.in_flight = 0
+        self.queued = 0
+        self.successes = 0
+        self.overloads = 0
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        """Number of calls allowed to run at the same time"""
+        return max(1, int(self.limit))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            await self.release()
+
+    async def acquire(self) -> None:
+        """Wait for a free slot (and for any Retry-After pause to pass)"""
+        async with self._condition:
+            self.queued += 1
+            try:
+                while True:
+                    pause = self._blocked_until - time.monotonic()
+                    if pause > 0:
+                        try:
+                            await asyncio.wait_for(self._condition.wait(), timeout=pause)
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    if self.in_flight < self.current_limit:
+                        break
+                    await self._condition.wait()
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        """Free a slot and wake up waiting callers"""
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Additive increase"""
+        self.successes += 1
+        self.limit = min(self.config.max_limit, self.limit + self.config.increase_step / self.limit)
+
+    def on_overload(self, retry_after: Optional[float] = None) -> None:
+        """Multiplicative decrease, optionally pausing new calls for retry_after seconds"""
+        self.overloads += 1
+        now = time.monotonic()
+
+        if now - self._last_decrease >= self.config.decrease_cooldown:
+            old_limit = self.current_limit
+            self.limit = max(self.config.min_limit, self.limit * self.config.decrease_factor)
+            self._last_decrease = now
+            logger.warning(f"Concurrency limit for {self.name}: {old_limit} → {self.current_limit}")
+
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.warning(f"Pausing new calls to {self.name} for {retry_after:.1f}s (Retry-After)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter state for the metrics endpoint"""
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "paused_for": round(max(0.0, self._blocked_until - time.monotonic()), 1)
+        }
@@ -1,14 +1,66 @@
 # utils/data_parser.py - Clean Data Parsers
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Tuple
+from contextlib import aclosing
 from datetime import datetime
 import logging
+import sys
+
+from utils.records import Flight, Hotel, AirbnbListing
 
 logger = logging.getLogger(__name__)
 
+async def parse_pages(
+    pages: AsyncIterator[List[Dict[str, Any]]],
+    parse: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+    max_raw_items: Optional[int] = None,
+    max_results: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Parse actor result pages as they arrive
+    
+    Stops reading (which closes the page iterator and aborts a running actor)
+    once max_raw_items raw items were consumed or max_results were parsed.
+    
+    Args:
+        pages: Async iterator of raw item pages (e.g. ApifyClient.iter_actor_pages)
+        parse: Parser method turning a list of raw items into parsed results
+        max_raw_items: Maximum number of raw items the parser looks at
+        max_results: Stop once this many results have been parsed
+        
+    Returns:
+        Parsed results of all consumed pages, in page order
+    """
+    results = []
+    consumed = 0
+    
+    async with aclosing(pages):
+        async for page in pages:
+            if max_raw_items is not None:
+                page = page[:max_raw_items - consumed]
+            consumed += len(page)
+            results.extend(parse(page))
+            
+            if max_raw_items is not None and consumed >= max_raw_items:
+                break
+            if max_results is not None and len(results) >= max_results:
+                break
+    
+    return results
+
 class FlightParser:
     """Parser for Skyscanner flight data"""
     
-    def parse_flights(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    MAX_FLIGHTS = 10  # Stop parsing after this many flights
+    
+    # Dataset fields read by this parser (requested from the actor, see FieldProjection)
+    FIELDS = [
+        "_carriers.*.name",
+        "legs.departure", "legs.duration", "legs.stop_count", "legs.marketing_carrier_ids",
+        "legs.origin", "legs.destination", "legs.origin_place_id", "legs.destination_place_id",
+        "pricing_options.price.amount", "pricing_options.items.url"
+    ]
+    
+    def parse_flights(self, raw_data: List[Dict[str, Any]]) -> List[Flight]:
         """
         Parse Skyscanner flight data from Apify
         
@@ -16,7 +68,7 @@ class FlightParser:
             raw_data: Raw response from jupri/skyscanner-flight actor
             
         Returns:
-            List of parsed flight dictionaries
+            List of parsed Flight records
         """
         flights = []
         
@@ -36,11 +88,11 @@ class FlightParser:
                 # Process each pricing option
                 for pricing_option in pricing_options[:5]:  # Limit to 5 per item
                     flight = self._parse_single_flight(pricing_option, legs[0], carriers)
-                    if flight and flight['price'] > 0:
+                    if flight and flight.price > 0:
                         flights.append(flight)
                 
                 # Stop after enough flights
-                if len(flights) >= 10:
+                if len(flights) >= self.MAX_FLIGHTS:
                     break
             
             logger.info(f"Parsed {len(flights)} flights from {len(raw_data)} raw items")
@@ -50,12 +102,80 @@ class FlightParser:
             logger.error(f"Flight parsing error: {e}")
             return []
     
+    def split_by_leg(
+        self,
+        raw_data: List[Dict[str, Any]],
+        legs: List[Tuple[str, str, str]]
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Demultiplex raw items of a batched multi-leg run back to their legs
+        
+        An item is assigned to the first requested leg whose departure date and
+        (when the item carries them) origin/destination codes match its leg.
+        Items with several legs (multi-city itineraries priced as a whole) and
+        items with neither a date nor place codes belong to no single leg and
+        are dropped.
+        
+        Args:
+            raw_data: Raw items from a run with indexed leg inputs
+            legs: Requested (origin IATA, destination IATA, YYYY-MM-DD date) tuples
+            
+        Returns:
+            One list of raw items per requested leg
+        """
+        buckets: List[List[Dict[str, Any]]] = [[] for _ in legs]
+        unmatched = multi_leg = unidentified = 0
+        
+        for item in raw_data:
+            if not isinstance(item, dict) or not item.get('legs'):
+                continue
+            if len(item['legs']) > 1:
+                multi_leg += 1
+                continue
+            
+            leg = item['legs'][0]
+            departure = str(leg.get('departure', ''))
+            date = departure.split('T')[0] if 'T' in departure else ''
+            origin = self._place_code(leg.get('origin', leg.get('origin_place_id')))
+            destination = self._place_code(leg.get('destination', leg.get('destination_place_id')))
+            if not (date or origin or destination):
+                unidentified += 1
+                continue
+            
+            for index, (leg_origin, leg_destination, leg_date) in enumerate(legs):
+                if date and date != leg_date:
+                    continue
+                if origin and origin != leg_origin.upper():
+                    continue
+                if destination and destination != leg_destination.upper():
+                    continue
+                buckets[index].append(item)
+                break
+            else:
+                unmatched += 1
+        
+        if unmatched or multi_leg or unidentified:
+            logger.warning(
+                f"Dropped {unmatched + multi_leg + unidentified} batched flight items: "
+                f"{unmatched} matched no requested leg, {multi_leg} multi-leg, {unidentified} without date or codes"
+            )
+        
+        return buckets
+    
+    def _place_code(self, place: Any) -> Optional[str]:
+        """Extract an IATA code from a leg origin/destination field, if present"""
+        if isinstance(place, dict):
+            place = place.get('display_code') or place.get('iata') or place.get('code')
+        if isinstance(place, str) and len(place) == 3 and place.isalpha():
+            return place.upper()
+        return None
+    
     def _parse_single_flight(
         self, 
         pricing_option: Dict[str, Any], 
         leg: Dict[str, Any], 
         carriers: Dict[str, Any]
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Flight]:
         """Parse a single flight from pricing option and leg data"""
         try:
             # Extract price
@@ -69,7 +189,7 @@ class FlightParser:
             departure_time = leg.get('departure', 'Unknown')
             formatted_time = self._format_time(departure_time)
             
-            duration_minutes = leg.get('duration', 0)
+            duration_minutes = self._positive_minutes(leg.get('duration', 0))
             formatted_duration = self._format_duration(duration_minutes)
             
             # Extract stops
@@ -78,16 +198,19 @@ class FlightParser:
             # Extract booking URL
             booking_url = self._extract_booking_url(pricing_option)
             
-            return {
-                'airline': airline,
-                'price': int(price) if price else 0,
-                'time': formatted_time,
-                'duration': formatted_duration,
-                'stops': stop_count,
-                'source': 'Skyscanner',
-                'url': booking_url,
-                'date': departure_time.split('T')[0] if 'T' in str(departure_time) else ''
-            }
+            # Airline, time, duration and date repeat across flights - share one string each
+            return Flight(
+                airline=sys.intern(airline),
+                price=int(price) if price else 0,
+                time=sys.intern(formatted_time),
+                duration=sys.intern(formatted_duration),
+                stops=stop_count,
+                source='Skyscanner',
+                url=booking_url,
+                date=sys.intern(departure_time.split('T')[0]) if 'T' in str(departure_time) else '',
+                duration_minutes=duration_minutes,
+                departure_minutes=self._clock_minutes(formatted_time)
+            )
             
         except Exception as e:
             logger.warning(f"Error parsing single flight: {e}")
@@ -143,7 +266,23 @@ class FlightParser:
         except Exception:
             return 'Unknown'
     
-    def _format_duration(self, minutes: int) -> str:
+    def _positive_minutes(self, value: Any) -> Optional[int]:
+        """Duration in whole minutes, None if missing or not positive"""
+        try:
+            minutes = int(value)
+            return minutes if minutes > 0 else None
+        except (TypeError, ValueError):
+            return None
+    
+    def _clock_minutes(self, formatted_time: str) -> Optional[int]:
+        """Minutes after midnight of an HH:MM time, None if unknown"""
+        try:
+            hours, minutes = formatted_time.split(':')
+            return int(hours) * 60 + int(minutes)
+        except (AttributeError, ValueError):
+            return None
+    
+    def _format_duration(self, minutes: Optional[int]) -> str:
         """Convert minutes to h:mm format"""
         try:
             if not minutes or minutes <= 0:
@@ -159,7 +298,20 @@ class FlightParser:
 class HotelParser:
     """Parser for Booking.com hotel data"""
     
-    def parse_hotels(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    MAX_RAW_ITEMS = 50  # Raw items looked at per search
+    
+    # Dataset fields read by this parser (requested from the actor, see FieldProjection)
+    FIELDS = [
+        "name", "price", "rating", "stars", "type", "url", "checkInDate", "checkOutDate",
+        "address.full", "address.city", "location", "rooms.options.price"
+    ]
+    
+    @staticmethod
+    def value_key(hotel: Hotel) -> float:
+        """Sort key: price-to-rating ratio (best value first)"""
+        return hotel.price / max(hotel.rating, 1)
+    
+    def parse_hotels(self, raw_data: List[Dict[str, Any]]) -> List[Hotel]:
         """
         Parse hotel data from Booking.com via Apify
         
@@ -167,18 +319,18 @@ class HotelParser:
             raw_data: Raw response from voyager/fast-booking-scraper actor
             
         Returns:
-            List of parsed hotel dictionaries
+            List of parsed Hotel records
         """
         hotels = []
         
         try:
-            for item in raw_data[:50]:  # Process up to 50 hotels
+            for item in raw_data[:self.MAX_RAW_ITEMS]:  # Process up to 50 hotels
                 hotel = self._parse_single_hotel(item)
-                if hotel and hotel['price'] > 0:
+                if hotel and hotel.price > 0:
                     hotels.append(hotel)
             
             # Sort by price-to-rating ratio (best value first)
-            hotels.sort(key=lambda h: h['price'] / max(h['rating'], 1))
+            hotels.sort(key=self.value_key)
             
             logger.info(f"Parsed {len(hotels)} hotels from {len(raw_data)} raw items")
             return hotels
@@ -187,7 +339,7 @@ class HotelParser:
             logger.error(f"Hotel parsing error: {e}")
             return []
     
-    def _parse_single_hotel(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _parse_single_hotel(self, item: Dict[str, Any]) -> Optional[Hotel]:
         """Parse a single hotel from raw data"""
         try:
             # Extract basic info with safe type conversion
@@ -210,17 +362,17 @@ class HotelParser:
             if price <= 0:
                 price = self._extract_room_price(item)
             
-            return {
-                'name': str(name)[:60] if name else 'Unknown Hotel',
-                'price': int(price) if price > 0 else 0,
-                'rating': round(float(final_rating), 1),
-                'location': str(location)[:50] if location else "City Center",
-                'type': str(property_type) if property_type else 'hotel',
-                'source': 'Booking.com',
-                'url': str(url)[:200] if url else '',
-                'checkin': item.get('checkInDate', ''),
-                'checkout': item.get('checkOutDate', ''),
-            }
+            return Hotel(
+                name=str(name)[:60] if name else 'Unknown Hotel',
+                price=int(price) if price > 0 else 0,
+                rating=round(float(final_rating), 1),
+                location=str(location)[:50] if location else "City Center",
+                type=sys.intern(str(property_type)) if property_type else 'hotel',
+                source='Booking.com',
+                url=str(url)[:200] if url else '',
+                checkin=sys.intern(str(item.get('checkInDate') or '')),
+                checkout=sys.intern(str(item.get('checkOutDate') or ''))
+            )
             
         except Exception as e:
             logger.warning(f"Error parsing hotel: {e}")
@@ -268,7 +420,20 @@ class HotelParser:
 class AirbnbParser:
     """Parser for Airbnb property data"""
     
-    def parse_properties(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    MAX_RAW_ITEMS = 100  # Raw items looked at per search
+    
+    # Dataset fields read by this parser (requested from the actor, see FieldProjection)
+    FIELDS = [
+        "name", "title", "url", "roomType", "badges", "subtitles", "pricing.price",
+        "rating.average", "rating.reviewsCount", "coordinates.latitude", "coordinates.longitude"
+    ]
+    
+    @staticmethod
+    def value_key(property_obj: AirbnbListing) -> float:
+        """Sort key: price-to-rating ratio (best value first)"""
+        return property_obj.price / max(property_obj.rating, 1)
+    
+    def parse_properties(self, raw_data: List[Dict[str, Any]]) -> List[AirbnbListing]:
         """
         Parse Airbnb properties from raw data
         
@@ -276,18 +441,18 @@ class AirbnbParser:
             raw_data: Raw response from Airbnb scraper actor
             
         Returns:
-            List of parsed property dictionaries
+            List of parsed AirbnbListing records
         """
         properties = []
         
         try:
-            for item in raw_data[:100]:  # Process up to 100 properties
+            for item in raw_data[:self.MAX_RAW_ITEMS]:  # Process up to 100 properties
                 property_obj = self._parse_single_property(item)
-                if property_obj and property_obj['price'] > 0:
+                if property_obj and property_obj.price > 0:
                     properties.append(property_obj)
             
             # Sort by price-to-rating ratio
-            properties.sort(key=lambda p: p['price'] / max(p['rating'], 1))
+            properties.sort(key=self.value_key)
             
             logger.info(f"Parsed {len(properties)} Airbnb properties from {len(raw_data)} raw items")
             return properties
@@ -296,7 +461,7 @@ class AirbnbParser:
             logger.error(f"Airbnb parsing error: {e}")
             return []
     
-    def _parse_single_property(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def _parse_single_property(self, item: Dict[str, Any]) -> Optional[AirbnbListing]:
         """Parse a single Airbnb property"""
         try:
             # Extract name and price
@@ -318,19 +483,19 @@ class AirbnbParser:
             url = item.get('url', '')
             badges = item.get('badges', [])
             
-            return {
-                'name': str(name)[:60] if name else 'Unknown Property',
-                'price': int(price_per_night) if price_per_night > 0 else 0,
-                'rating': round(float(rating), 1),
-                'review_count': review_count,
-                'location': location[:50],
-                'property_type': str(property_type)[:30],
-                'person_capacity': min(person_capacity, 12),
-                'badges': badges,
-                'url': str(url)[:300] if url else '',
-                'source': 'Airbnb',
-                'type': 'airbnb'
-            }
+            return AirbnbListing(
+                name=str(name)[:60] if name else 'Unknown Property',
+                price=int(price_per_night) if price_per_night > 0 else 0,
+                rating=round(float(rating), 1),
+                review_count=review_count,
+                location=location[:50],
+                property_type=property_type,
+                person_capacity=min(person_capacity, 12),
+                badges=tuple(sys.intern(str(badge)) for badge in badges or ()),
+                url=str(url)[:300] if url else '',
+                source='Airbnb',
+                type='airbnb'
+            )
             
         except Exception as e:
             logger.warning(f"Error parsing Airbnb property: {e}")
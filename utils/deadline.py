@@ -0,0 +1,56 @@
+# utils/deadline.py - Per-Request Latency Budget
+from typing import Optional, Awaitable, TypeVar
+import asyncio
+import math
+import time
+
+T = TypeVar("T")
+
+class Deadline:
+    """
+    Absolute point in time by which a request must be answered
+
+    Created once per request and passed down explicitly to every service and
+    upstream call, which cap their timeouts, retries and backoff sleeps to
+    the remaining budget.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left (0.0 once expired)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """Limit a timeout to the remaining budget"""
+        if timeout is None:
+            return self.remaining
+        return min(timeout, self.remaining)
+
+    async def wait_for(self, awaitable: Awaitable[T], grace: float = 0.0) -> T:
+        """
+        Await with the remaining budget (plus grace) as timeout
+
+        Raises:
+            asyncio.TimeoutError: If the deadline passes first
+        """
+        return await asyncio.wait_for(awaitable, timeout=self.remaining + grace)
+
+    def extend(self, other: Optional["Deadline"]) -> None:
+        """Move the expiry out to other's if that is later (None: never expires)"""
+        self.expires_at = max(self.expires_at, other.expires_at if other is not None else math.inf)
+
+    def __repr__(self) -> str:
+        return f"Deadline(budget={self.budget}s, remaining={self.remaining:.1f}s)"
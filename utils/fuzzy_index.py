@@ -0,0 +1,107 @@
+# utils/fuzzy_index.py - Trigram Index for Typo-Tolerant Name Matching
+from typing import Dict, List, Sequence, Set, Tuple
+from array import array
+from collections import Counter
+from difflib import SequenceMatcher
+from itertools import chain
+import heapq
+
+# NumPy is installed with pandas (used by the city resolver); without it the scalar path is used
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a (folded) name, padded so short names and word starts count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(query: str, name: str) -> float:
+    """
+    SequenceMatcher ratio, raised to 0.7 when one string contains the other
+
+    The scoring the resolver has always used for suggestions.
+    """
+    score = SequenceMatcher(None, query, name).ratio()
+    if query in name or name in query:
+        score = max(score, 0.7)
+    return score
+
+class TrigramIndex:
+    """
+    Names similar to a query, found through shared trigrams
+
+    Every name is listed under each of its trigrams (posting lists). A query
+    counts the trigrams every name shares with it, ranks names by Dice
+    coefficient and only scores the best handful with the full
+    similarity(). Typos leave most trigrams intact, so misspelled names
+    still share enough to be found. With NumPy the counting is one
+    bincount over the concatenated posting lists; without it, only the
+    SHORTLIST names sharing the most trigrams are ranked by Dice.
+    """
+
+    SHORTLIST = 200  # Names kept by shared-trigram count
+    RESCORE_FACTOR = 3  # Names per requested result scored with similarity()
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        postings: Dict[str, List[int]] = {}
+        sizes = array("H")
+        for position, name in enumerate(self.names):
+            grams = trigrams(name)
+            sizes.append(min(len(grams), 65535))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self._postings = {gram: array("I", positions) for gram, positions in postings.items()}
+        self._sizes = sizes
+        self._sizes_np = None  # Float copy of _sizes for the NumPy path, made on first search
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str, limit: int = 5, min_similarity: float = 0.5) -> List[Tuple[float, int]]:
+        """
+        The most similar names
+
+        Returns:
+            (similarity, name position) pairs above min_similarity, most similar first
+        """
+        grams = trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return []
+
+        candidates = limit * self.RESCORE_FACTOR
+        if NUMPY_AVAILABLE:
+            positions = self._dice_top(lists, len(grams), candidates)
+        else:
+            shared = Counter(chain.from_iterable(lists)).most_common(self.SHORTLIST)
+            sizes, size = self._sizes, len(grams)
+            positions = [position for position, _ in heapq.nlargest(
+                candidates, shared,
+                key=lambda item: (2 * item[1] / (size + sizes[item[0]]), -item[0])
+            )]
+
+        names = self.names
+        scored = [(similarity(query, names[position]), position) for position in positions]
+        scored = [(score, position) for score, position in scored if score > min_similarity]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:limit]
+
+    def _dice_top(self, lists: List[array], size: int, count: int) -> List[int]:
+        """Positions of the count names with the highest Dice coefficient (vectorized)"""
+        if self._sizes_np is None:
+            self._sizes_np = np.frombuffer(self._sizes, dtype=np.uint16).astype(np.float64)
+        shared = np.bincount(
+            np.concatenate([np.frombuffer(positions, dtype=np.uint32) for positions in lists]),
+            minlength=len(self.names)
+        )
+        dice = 2 * shared / (size + self._sizes_np)
+        if count < len(dice):
+            top = np.argpartition(-dice, count)[:count]
+        else:
+            top = np.arange(len(dice))
+        top = top[dice[top] > 0]
+        return top[np.lexsort((top, -dice[top]))].tolist()
@@ -0,0 +1,399 @@
+# utils/gazetteer.py - Offline Gazetteer: Place Names to Coordinates without Network Calls
+"""
+In-process place name lookup for the city resolver
+
+Sources, all optional:
+  * airports.csv municipalities, located at their airport
+  * a GeoNames cities dump (e.g. cities15000.txt from
+    https://download.geonames.org/export/dump/) with alternate spellings
+    and populations
+  * places learned from Nominatim answers, appended to a TSV file so every
+    worker and restart knows them. A place is learned under Nominatim's
+    name for it; the query that found it is only a lookup alias, so typos
+    never show up in autocomplete or suggestions
+
+Names are matched after folding case, accents and punctuation. Both the
+German transliteration ("muenchen") and the plain accent-stripped form
+("munchen") are indexed. Ambiguous names resolve to the most populous place.
+Name prefixes complete to places ranked by importance (autocomplete), and
+misspelled names find similar ones through a trigram index (suggestions).
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+import math
+import os
+import re
+import unicodedata
+
+from utils.fuzzy_index import TrigramIndex
+from utils.prefix_index import PrefixIndex
+
+logger = logging.getLogger(__name__)
+
+GERMAN_TRANSLITERATION = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+NON_WORD = re.compile(r"[\W_]+")
+TYPE_RANK = {"large_airport": 0, "medium_airport": 1, "small_airport": 2}
+# Autocomplete importance (0..1, like Nominatim's) of a municipality known only from its airport
+AIRPORT_IMPORTANCE = {"large_airport": 0.75, "medium_airport": 0.6, "small_airport": 0.45}
+LEARNED_MAX_BYTES = 1 << 20  # About 15,000 learned lines; later places are kept in memory only
+NEARBY_DEGREES = 0.1  # A learned place this close to a known one of its name and country is that place
+
+class Place(NamedTuple):
+    name: str
+    latitude: float
+    longitude: float
+    country: str = ""  # ISO 3166-1 alpha-2, when known
+    population: int = 0
+    source: str = ""  # airports, geonames or nominatim
+    importance: float = 0.0  # Autocomplete rank, 0..1
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.country}" if self.country else self.name
+
+def fold(name: str) -> str:
+    """Lowercase ASCII form of a name: accents stripped, punctuation as spaces"""
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return NON_WORD.sub(" ", name.lower()).strip()
+
+def population_importance(population: int) -> float:
+    """0..1 on a log scale: 1,000 inhabitants -> 0.43, 1 million -> 0.86, 10 million and more -> 1"""
+    return round(min(1.0, math.log10(population + 1) / 7), 3)
+
+def name_keys(name: str) -> List[str]:
+    """Index keys of a name: German transliteration first, then the plain folded form"""
+    folded = fold(name)
+    if name.isascii():
+        return [folded] if folded else []
+    german = fold(name.lower().translate(GERMAN_TRANSLITERATION))
+    return [key for key in dict.fromkeys((german, folded)) if key]
+
+class Gazetteer:
+    """Place names (with alternate spellings) to coordinates"""
+
+    def __init__(self, learned_path: Optional[str] = None):
+        self.places: List[Place] = []
+        self._index: Dict[str, List[int]] = {}  # Folded name -> places, most populous first
+        self._aliases: Dict[str, int] = {}  # Folded query -> learned place; lookup only, never completed or suggested
+        self.learned_path = learned_path
+        self._learned_offset = 0  # Bytes of the learned places file read so far
+        self._learned_full = False
+        self._prefix_index: Optional[PrefixIndex] = None
+        self._fuzzy_index: Optional[TrigramIndex] = None  # Over the keys of _index
+        self._representative: List[int] = []  # Most important place of each place's group (_representatives)
+        self._prefix_indexed = 0  # Places covered by the search indexes; later ones are scanned
+        if learned_path:
+            self.load_learned()
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def add(self, place: Place, alternate_names: Iterable[str] = ()) -> None:
+        """Index a place under its name and alternate names"""
+        for key in self._append(place, alternate_names):
+            self._rank(key)
+
+    def lookup(self, query: str) -> Optional[Place]:
+        """
+        The best place for a query, or None
+
+        "Paris" matches the most populous Paris; "Paris, US" or
+        "Paris, France" first tries the whole query as a name, then the
+        part before the comma, restricted to the country if it is a
+        two-letter code.
+        """
+        candidates = self.candidates(query)
+        if candidates:
+            return candidates[0]
+
+        name, _, qualifier = query.partition(",")
+        if not qualifier:
+            return None
+        candidates = self.candidates(name)
+        country = fold(qualifier).upper()
+        if len(country) == 2:
+            candidates = [place for place in candidates if place.country == country]
+        return candidates[0] if candidates else None
+
+    def candidates(self, name: str) -> List[Place]:
+        """All places called name, most populous first"""
+        for key in name_keys(name):
+            if key in self._index:
+                return [self.places[p] for p in self._index[key]]
+            if key in self._aliases:
+                return [self.places[self._aliases[key]]]
+        return []
+
+    def complete(self, prefix: str, limit: int = 6) -> List[Place]:
+        """
+        Places with a name or alternate name starting with prefix
+
+        Places of one country that are known under each other's names (an
+        airport's "Vienna" and GeoNames' "Wien" with alias "Vienna") are
+        listed once, as the more important one. Most important first.
+        """
+        key = fold(prefix)
+        if not key:
+            return []
+        if self._prefix_index is None:
+            self.build_search_indexes()
+
+        learned = [  # Added after the index was built
+            p for p in range(self._prefix_indexed, len(self.places))
+            if any(k.startswith(key) for k in name_keys(self.places[p].name))
+        ]
+        ranked = self._prefix_index.top(key, limit)
+        if learned:
+            ranked = self._distinct(ranked + learned, limit)
+        return [self.places[p] for p in ranked]
+
+    def _distinct(self, positions: List[int], limit: int) -> List[int]:
+        """The first limit positions by importance, skipping the same place under another name"""
+        accepted: List[int] = []
+        for position in sorted(positions, key=lambda p: (-self.places[p].importance, p)):
+            if len(accepted) == limit:
+                break
+            if not any(self._same_place(position, other) for other in accepted):
+                accepted.append(position)
+        return accepted
+
+    def suggest(self, query: str, limit: int = 5) -> List[Place]:
+        """
+        Places with a name or alternate name similar to query (typos, partial names)
+
+        Most similar first; equally similar places by importance. Places
+        learned after the indexes were built are not suggested.
+        """
+        key = fold(query)
+        if not key:
+            return []
+        if self._fuzzy_index is None:
+            self.build_search_indexes()
+
+        best: Dict[int, float] = {}  # Representative place -> best similarity of its names
+        for score, name in self._fuzzy_index.search(key, limit * 2):
+            for position in self._index[self._fuzzy_index.names[name]]:
+                if position >= self._prefix_indexed:  # Learned after the build
+                    continue
+                representative = self._representative[position]
+                best[representative] = max(score, best.get(representative, 0.0))
+        ranked = sorted(best, key=lambda p: (-best[p], -self.places[p].importance, p))
+        return [self.places[p] for p in ranked[:limit]]
+
+    def build_search_indexes(self) -> None:
+        """(Re)build the autocomplete and fuzzy indexes over all current names (done on first use otherwise)"""
+        # Names point at the most important place of their group, so results are distinct places
+        self._representative = representative = self._representatives()
+        self._prefix_index = PrefixIndex(
+            ((key, representative[position]) for key, positions in self._index.items() for position in positions),
+            [place.importance for place in self.places]
+        )
+        self._fuzzy_index = TrigramIndex(list(self._index))
+        self._prefix_indexed = len(self.places)
+        logger.info(f"Gazetteer: prefix and trigram indexes over {len(self._index)} names")
+
+    def learn(self, query: str, name: str, latitude: float, longitude: float, country: str = "",
+              importance: float = 0.0) -> Place:
+        """
+        Add a place resolved elsewhere (Nominatim) and persist it for other workers and restarts
+
+        Args:
+            query: What was looked up; resolves to the place from now on but is never completed or suggested
+            name: The resolver's name for the place, e.g. Nominatim's "Leibnitz" for "leibnitz steiermark"
+            country: ISO 3166-1 alpha-2 code, when known
+            importance: Autocomplete rank, 0..1
+
+        Returns:
+            The place; an already known one of that name and country nearby if there is one
+        """
+        self.load_learned()  # Another worker may have learned it already
+        place, learned = self._remember(query, name.strip(), latitude, longitude, country.upper(), importance)
+        if learned and self.learned_path:
+            self._persist(query, place)
+        return place
+
+    def load_learned(self) -> int:
+        """
+        Read places appended to the learned places file since the last call, by any worker
+
+        Returns:
+            Number of places or aliases new to this gazetteer
+        """
+        if not self.learned_path:
+            return 0
+        try:
+            with open(self.learned_path, "rb") as f:
+                f.seek(self._learned_offset)
+                data = f.read()
+        except OSError:
+            return 0
+        end = data.rfind(b"\n") + 1  # A partially written last line is read once complete
+        self._learned_offset += end
+        learned = 0
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            fields = line.split("\t")
+            try:
+                learned += self._remember(fields[0], fields[1], float(fields[2]), float(fields[3]), fields[4],
+                                          float(fields[5]))[1]
+            except (IndexError, ValueError):
+                continue  # Interleaved partial line
+        if learned:
+            logger.info(f"Gazetteer: {learned} places learned from Nominatim")
+        return learned
+
+    def _remember(self, query: str, name: str, latitude: float, longitude: float, country: str,
+                  importance: float) -> Tuple[Place, bool]:
+        """The place for query, added unless known; whether anything new was learned"""
+        known = self.lookup(query)
+        if known is not None:
+            return known, False
+        position = next((
+            p for key in name_keys(name) for p in self._index.get(key, ())
+            if self.places[p].country == country
+            and abs(self.places[p].latitude - latitude) < NEARBY_DEGREES
+            and abs(self.places[p].longitude - longitude) < NEARBY_DEGREES
+        ), None)
+        if position is None:
+            position = len(self.places)
+            self.add(Place(name, latitude, longitude, country, 0, "nominatim", importance))
+        for key in name_keys(query):
+            if key not in self._index:
+                self._aliases.setdefault(key, position)
+        return self.places[position], True
+
+    def _persist(self, query: str, place: Place) -> None:
+        if self._learned_full:
+            return
+        try:
+            directory = os.path.dirname(self.learned_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # One short line per write: appends from several workers don't interleave
+            with open(self.learned_path, "a", encoding="utf-8") as f:
+                if f.tell() >= LEARNED_MAX_BYTES:
+                    self._learned_full = True
+                    logger.warning(f"Learned places file {self.learned_path} is full; new places are not persisted")
+                    return
+                f.write(f"{_tsv_field(query)}\t{_tsv_field(place.name)}\t{place.latitude!r}\t{place.longitude!r}"
+                        f"\t{place.country}\t{place.importance!r}\n")
+        except OSError as e:
+            logger.warning(f"Could not persist learned place {place.name}: {e}")
+
+    def add_airports(self, airports) -> int:
+        """
+        Index the municipalities of an AirportTable at their airport's coordinates
+
+        A municipality with several airports is placed at its largest one.
+
+        Returns:
+            Number of municipalities added
+        """
+        positions = sorted(range(len(airports)), key=lambda p: TYPE_RANK.get(airports.airport_type(p), len(TYPE_RANK)))
+        seen = set()
+        for position in positions:
+            municipality = airports.municipality(position)
+            key = (municipality.lower(), airports.country(position))
+            if not municipality or key in seen:
+                continue
+            seen.add(key)
+            self.add(Place(municipality, airports.latitudes[position], airports.longitudes[position],
+                           airports.country(position), 0, "airports",
+                           AIRPORT_IMPORTANCE.get(airports.airport_type(position), 0.0)))
+        self._prefix_index = self._fuzzy_index = None  # Rebuilt with the new names on next use
+        logger.info(f"Gazetteer: {len(seen)} airport municipalities")
+        return len(seen)
+
+    def load_geonames(self, path: str, min_population: int = 0) -> int:
+        """
+        Import a GeoNames dump (cities500/1000/5000/15000.txt or a country file)
+
+        Only populated places (feature class P) are used. Alternate names
+        outside the Latin script are skipped; they cannot match typed
+        queries after folding and would only cost memory.
+
+        Returns:
+            Number of places added
+        """
+        added = 0
+        touched = set()  # Keys are ranked once at the end instead of on every insert
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) < 15 or fields[6] != "P":
+                    continue
+                population = int(fields[14] or 0)
+                if population < min_population:
+                    continue
+                alternates = [
+                    name for name in (fields[2], *fields[3].split(","))
+                    if name and (name.isascii() or fold(name).isascii())
+                ]
+                touched.update(self._append(
+                    Place(fields[1], float(fields[4]), float(fields[5]), fields[8], population, "geonames",
+                          population_importance(population)), alternates
+                ))
+                added += 1
+        for key in touched:
+            self._rank(key)
+        self._prefix_index = self._fuzzy_index = None  # Rebuilt with the new names on next use
+        logger.info(f"Gazetteer: {added} places from {path} ({len(self._index)} names indexed)")
+        return added
+
+    def _representatives(self) -> List[int]:
+        """For every place, the most important place of its group of the same place (union-find over _same_place)"""
+        parent = list(range(len(self.places)))
+
+        def root(p: int) -> int:
+            while parent[p] != p:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            return p
+
+        def rank(p: int) -> tuple:
+            return (-self.places[p].importance, p)
+
+        # A place joins every place of its country indexed under its own name
+        named: Dict[str, set] = {}  # Name key -> countries of places with that name
+        for place in self.places:
+            for key in name_keys(place.name)[:1]:
+                named.setdefault(key, set()).add(place.country)
+        for key, countries in named.items():
+            groups: Dict[str, List[int]] = {}
+            for position in self._index[key]:
+                if self.places[position].country in countries:
+                    groups.setdefault(self.places[position].country, []).append(root(position))
+            for roots in groups.values():
+                best = min(roots, key=rank)
+                for r in roots:
+                    parent[r] = best
+        return [root(p) for p in range(len(parent))]
+
+    def _same_place(self, a: int, b: int) -> bool:
+        """Whether two places share a country and either is indexed under the other's name"""
+        first, second = self.places[a], self.places[b]
+        if first.country != second.country:
+            return False
+        return any(
+            other in self._index.get(key, ())
+            for place, other in ((first, b), (second, a))
+            for key in name_keys(place.name)[:1]
+        )
+
+    def _append(self, place: Place, names: Iterable[str]) -> Iterable[str]:
+        """Store a place and list it under its keys (unranked); returns the keys"""
+        position = len(self.places)
+        self.places.append(place)
+        keys = dict.fromkeys(key for name in (place.name, *names) for key in name_keys(name))
+        for key in keys:
+            self._index.setdefault(key, []).append(position)
+        return keys
+
+    def _rank(self, key: str) -> None:
+        positions = self._index[key]
+        if len(positions) > 1:
+            positions.sort(key=lambda p: -self.places[p].population)  # Stable: earlier places win ties
+
+def _tsv_field(value: str) -> str:
+    return value.replace("\t", " ").replace("\n", " ")
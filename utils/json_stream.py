@@ -0,0 +1,116 @@
+# utils/json_stream.py - Incremental Decoder for Streamed JSON Arrays
+from typing import List, Any
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JsonArrayStreamDecoder:
+    """
+    Decode the items of a top-level JSON array while it is still downloading
+
+    Feed text chunks as they arrive; every call returns the items completed so
+    far, so callers can process (and stop reading) before the body is complete.
+    A partially received item is retried only after the buffer has doubled in
+    size, which keeps re-scanning of large items amortized linear.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pending: List[str] = []  # Chunks not yet joined into the buffer
+        self._pending_length = 0
+        self._started = False
+        self._finished = False
+        self._retry_at = 0  # Buffer length before the next decode attempt
+        self._closing = False
+        self.items_decoded = 0
+
+    @property
+    def finished(self) -> bool:
+        """True once the closing bracket of the array has been read"""
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add a chunk of text and return all items completed by it
+
+        Raises:
+            ValueError: If the stream is not a JSON array
+        """
+        if self._finished:
+            return []
+
+        self._pending.append(chunk)
+        self._pending_length += len(chunk)
+        if len(self._buffer) + self._pending_length < self._retry_at:
+            return []
+
+        buffer = self._buffer + "".join(self._pending)
+        self._pending = []
+        self._pending_length = 0
+        items = []
+        pos = 0
+
+        if not self._started:
+            pos = self._skip_whitespace(buffer, pos)
+            if pos >= len(buffer):
+                self._buffer = buffer
+                return []
+            if buffer[pos] != "[":
+                raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+            self._started = True
+            pos += 1
+
+        while True:
+            pos = self._skip_whitespace(buffer, pos)
+            if pos < len(buffer) and buffer[pos] == ",":
+                pos = self._skip_whitespace(buffer, pos + 1)
+            if pos >= len(buffer):
+                break
+
+            if buffer[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item not complete yet - wait until the buffer has grown enough
+                remaining = len(buffer) - pos
+                self._retry_at = pos + 2 * remaining
+                break
+
+            if end == len(buffer) and buffer[end - 1] not in '}]"' and not self._closing:
+                # A bare number at the end of the buffer may continue in the next chunk
+                break
+
+            items.append(item)
+            pos = end
+
+        # Drop consumed text so the buffer only holds the current partial item
+        self._buffer = buffer[pos:]
+        self._retry_at = max(0, self._retry_at - pos)
+        self.items_decoded += len(items)
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Signal the end of the stream and return any remaining items
+
+        Raises:
+            ValueError: If the array was truncated or malformed
+        """
+        self._retry_at = 0
+        self._closing = True
+        items = self.feed("")
+        if not self._finished:
+            raise ValueError(f"Truncated JSON array after {self.items_decoded} items")
+        return items
+
+    @staticmethod
+    def _skip_whitespace(buffer: str, pos: int) -> int:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        return pos
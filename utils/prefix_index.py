@@ -0,0 +1,74 @@
+# utils/prefix_index.py - Ranked Prefix Search over Sorted Keys (Autocomplete)
+from typing import Dict, Iterable, List, Sequence, Tuple
+import bisect
+import heapq
+
+class PrefixIndex:
+    """
+    Top-k items whose key starts with a prefix, best score first
+
+    The (key, item) entries are kept in two parallel arrays sorted by key,
+    so the entries under a prefix are one contiguous range found with
+    bisect. Every trie node whose range holds more than LEAF_SIZE entries
+    stores its precomputed top-k items. Smaller ranges are ranked on the
+    fly, so a query costs two binary searches plus at most LEAF_SIZE
+    comparisons. An item reached through several keys (aliases) is
+    returned once.
+    """
+
+    LEAF_SIZE = 32
+
+    def __init__(self, entries: Iterable[Tuple[str, int]], scores: Sequence[float], top_k: int = 16):
+        """
+        Args:
+            entries: (key, item) pairs; an item may have several keys
+            scores: Score per item (indexed by item); higher ranks first, ties by item
+            top_k: Largest k that queries can ask for
+        """
+        pairs = sorted(entries)
+        self._keys: List[str] = [key for key, _ in pairs]
+        self._items: List[int] = [item for _, item in pairs]
+        self._scores = scores
+        self.top_k = top_k
+        self._top: Dict[str, Tuple[int, ...]] = {}  # Prefix -> top-k items of nodes larger than a leaf
+        if self._keys:
+            self._build(0, len(self._keys), 0)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def top(self, prefix: str, k: int = 10) -> List[int]:
+        """Best k items (at most top_k) with a key starting with prefix"""
+        k = min(k, self.top_k)
+        cached = self._top.get(prefix)
+        if cached is not None:
+            return list(cached[:k])
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, prefix + "\U0010ffff", lo)
+        return self._best(self._items[lo:hi], k)
+
+    def _best(self, items: Iterable[int], k: int) -> List[int]:
+        scores = self._scores
+        return heapq.nsmallest(k, set(items), key=lambda item: (-scores[item], item))
+
+    def _build(self, lo: int, hi: int, depth: int) -> List[int]:
+        """Top items of keys[lo:hi], which share their first depth characters; caches nodes above LEAF_SIZE"""
+        if hi - lo <= self.LEAF_SIZE:
+            return self._best(self._items[lo:hi], self.top_k)
+
+        keys = self._keys
+        prefix = keys[lo][:depth]
+        candidates: List[int] = []
+        i = lo
+        while i < hi and len(keys[i]) == depth:  # The prefix itself is a key (sorts first)
+            candidates.append(self._items[i])
+            i += 1
+        while i < hi:
+            child = keys[i][:depth + 1]
+            j = bisect.bisect_left(keys, child + "\U0010ffff", i, hi)
+            candidates.extend(self._build(i, j, depth + 1))
+            i = j
+
+        top = self._best(candidates, self.top_k)
+        self._top[prefix] = tuple(top)
+        return top
@@ -0,0 +1,77 @@
+# utils/projection.py - Field Projection for Apify Dataset Items
+from typing import Dict, Any, List, Iterable
+
+WILDCARD = "*"  # Path segment matching every key of a dict (e.g. "_carriers.*.name")
+
+class FieldProjection:
+    """
+    Keeps only the listed (possibly nested) fields of dataset items
+
+    Paths use dot notation. Lists along a path are projected element by
+    element, so "legs.departure" keeps the departure of every leg and
+    "rooms.options.price" the price of every option of every room. A path
+    that ends at a value keeps that value whole.
+
+    The Apify dataset API only selects top-level fields (the "fields" query
+    parameter, see query_param); nested paths are applied to the decoded items
+    before they are cached or handed to the parsers.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self.paths = tuple(sorted(set(paths)))
+        self._tree = self._build_tree(self.paths)
+
+    @property
+    def top_level(self) -> List[str]:
+        """Top-level field names, in path order"""
+        return list(self._tree)
+
+    @property
+    def query_param(self) -> str:
+        """Value of the Apify "fields" query parameter"""
+        return ",".join(self.top_level)
+
+    def apply(self, item: Any) -> Any:
+        """Return a copy of an item with only the projected fields"""
+        return self._project(item, self._tree)
+
+    def apply_all(self, items: List[Any]) -> List[Any]:
+        """Project a page of items"""
+        return [self._project(item, self._tree) for item in items]
+
+    def _project(self, value: Any, tree: Dict[str, Any]) -> Any:
+        if not tree:
+            return value  # Leaf: keep the whole value
+        if isinstance(value, list):
+            return [self._project(element, tree) for element in value]
+        if not isinstance(value, dict):
+            return value  # Scalar where an object was expected - let the parser decide
+
+        if WILDCARD in tree:
+            subtree = tree[WILDCARD]
+            return {key: self._project(child, subtree) for key, child in value.items()}
+
+        return {
+            key: self._project(value[key], subtree)
+            for key, subtree in tree.items()
+            if key in value
+        }
+
+    @staticmethod
+    def _build_tree(paths: Iterable[str]) -> Dict[str, Any]:
+        """Nested dict of path segments; an empty dict marks a field kept whole"""
+        tree: Dict[str, Any] = {}
+        for path in paths:
+            node = tree
+            segments = path.split(".")
+            for index, segment in enumerate(segments):
+                if segment in node and not node[segment]:
+                    break  # A shorter path already keeps this field whole
+                if index == len(segments) - 1:
+                    node[segment] = {}
+                else:
+                    node = node.setdefault(segment, {})
+        return tree
+
+    def __repr__(self) -> str:
+        return f"FieldProjection({', '.join(self.paths)})"
@@ -0,0 +1,59 @@
+# utils/rate_limiter.py - Minimum-Interval Rate Limiter for Upstreams with a Usage Policy
+from typing import Dict, Any, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Spaces calls at least `interval` seconds apart (e.g. Nominatim: 1 request/s)
+
+    Each caller reserves the next free start time and sleeps until it, so
+    concurrent callers are served in arrival order. Callers that would have
+    to wait longer than max_wait are turned away instead of queueing.
+    The limit is per process; with several workers divide the rate among them.
+    """
+
+    def __init__(self, name: str, interval: float = 1.0, max_wait: Optional[float] = None):
+        self.name = name
+        self.interval = interval
+        self.max_wait = max_wait  # None = always wait for a slot
+        self.granted = 0
+        self.rejected = 0
+        self._next_start = 0.0
+
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """
+        Wait for the next call slot
+
+        Args:
+            max_wait: Longest acceptable wait for this call (default: the limiter's max_wait)
+
+        Returns:
+            True when the call may start now, False if the wait would exceed max_wait
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        wait = start - now
+        if max_wait is not None and wait > max_wait:
+            self.rejected += 1
+            logger.warning(f"Rate limit for {self.name}: next slot in {wait:.1f}s - skipping call")
+            return False
+
+        self._next_start = start + self.interval  # Reserved before sleeping, so callers queue in order
+        self.granted += 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter state for the metrics endpoint"""
+        return {
+            "interval": self.interval,
+            "granted": self.granted,
+            "rejected": self.rejected,
+            "backlog": round(max(0.0, self._next_start - time.monotonic()), 1)
+        }
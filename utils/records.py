@@ -0,0 +1,119 @@
+# utils/records.py - Compact Typed Records for Search Results
+from typing import Dict, Any, ClassVar, Optional, Tuple, Union
+from dataclasses import dataclass
+
+_MISSING = object()
+
+class Record:
+    """
+    Dict-style read access for the frozen, slotted result records
+
+    Parsed results used to be plain dicts. The records keep that read API
+    (record['price'], record.get('url', '')) for the CSV export and older
+    callers, and Jinja resolves template attributes such as hotel.price on
+    them directly. to_dict() gives a plain (JSON-ready) copy.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key, _MISSING) if not key.startswith('_') else _MISSING
+        if value is _MISSING or callable(value):
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy; nested records become dicts and tuples lists"""
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        """Rebuild a flat record from to_dict() output (lists become tuples, unknown keys are ignored)"""
+        return cls(**{
+            name: tuple(data[name]) if isinstance(data[name], list) else data[name]
+            for name in cls.__slots__ if name in data
+        })
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_plain(element) for element in value]
+    return value
+
+@dataclass(frozen=True, slots=True)
+class Flight(Record):
+    """One flight option (one pricing option of one Skyscanner itinerary)"""
+    airline: str
+    price: int
+    time: str  # HH:MM departure
+    duration: str  # e.g. "2h 05m"
+    stops: int
+    source: str
+    url: str
+    date: str  # YYYY-MM-DD
+    duration_minutes: Optional[int] = None  # None if the actor gave no duration
+    departure_minutes: Optional[int] = None  # Minutes after midnight, None if unknown
+
+@dataclass(frozen=True, slots=True)
+class Hotel(Record):
+    """One Booking.com property"""
+    accommodation_type: ClassVar[str] = 'hotel'
+
+    name: str
+    price: int
+    rating: float
+    location: str
+    type: str
+    source: str
+    url: str
+    checkin: str
+    checkout: str
+
+@dataclass(frozen=True, slots=True)
+class AirbnbListing(Record):
+    """One Airbnb listing"""
+    accommodation_type: ClassVar[str] = 'airbnb'
+
+    name: str
+    price: int
+    rating: float
+    review_count: int
+    location: str
+    property_type: str
+    person_capacity: int
+    badges: Tuple[str, ...]
+    url: str
+    source: str
+    type: str
+
+Accommodation = Union[Hotel, AirbnbListing]
+
+@dataclass(frozen=True, slots=True)
+class Combination(Record):
+    """Outbound + return flight + accommodation with its costs and score"""
+    outbound_flight: Flight
+    return_flight: Flight
+    accommodation: Accommodation
+    accommodation_type: str
+    flight_cost: int
+    accommodation_cost: int
+    total_cost: int
+    nights: int
+    persons: int
+    score: float
+    cost_per_person: float
+    cost_per_night: float
+    flight_minutes: Optional[int] = None  # Outbound + return duration, None if either is unknown
+    stops: int = 0  # Outbound + return stops
@@ -0,0 +1,88 @@
+# utils/request_coalescer.py - Single-Flight Coalescing for Identical Upstream Calls
+from typing import Dict, Any, Callable, Awaitable, TypeVar
+import asyncio
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def make_request_key(actor_name: str, payload: Dict[str, Any]) -> str:
+    """
+    Build a canonical key for an actor call
+
+    The payload is serialized with sorted keys so that logically identical
+    inputs (same data, different dict order) map to the same key.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    return f"{actor_name}:{digest}"
+
+class _Flight:
+    """A single in-flight upstream call and the number of callers awaiting it"""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+class RequestCoalescer:
+    """
+    In-flight registry that lets concurrent identical calls share one upstream call
+
+    The first caller for a key starts the upstream call as a separate task; later
+    callers with the same key await that task instead of starting their own.
+    Errors are propagated to every waiter. A cancelled waiter only detaches itself;
+    the upstream call is cancelled once no caller is waiting for it anymore.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Flight] = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run factory() once per key among concurrent callers
+
+        Args:
+            key: Canonical request key (see make_request_key)
+            factory: Zero-argument coroutine function performing the upstream call
+
+        Returns:
+            The shared result of the upstream call
+        """
+        flight = self._in_flight.get(key)
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _task, key=key, flight=flight: self._forget(key, flight))
+            self.upstream_calls += 1
+        else:
+            self.coalesced_calls += 1
+            logger.info(f"Coalescing identical in-flight call: {key.split(':')[0]}")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Last interested caller went away - stop the upstream call
+                logger.debug(f"Cancelling abandoned upstream call: {key.split(':')[0]}")
+                flight.task.cancel()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        """Remove a finished call from the registry"""
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing counters"""
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,  # Upstream calls saved
+            "in_flight": len(self._in_flight)
+        }
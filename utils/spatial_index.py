@@ -0,0 +1,142 @@
+# utils/spatial_index.py - k-d Tree for Nearest-Neighbour Queries on the Globe
+from typing import List, Optional, Sequence, Tuple
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088  # Mean Earth radius (IUGG)
+
+Vector = Tuple[float, float, float]
+
+def to_unit_vector(lat: float, lon: float) -> Vector:
+    """Point on the unit sphere for a latitude/longitude in degrees"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (cos_phi * math.cos(lam), cos_phi * math.sin(lam), math.sin(phi))
+
+def chord_to_km(chord: float) -> float:
+    """Great-circle distance for a straight-line distance between unit vectors"""
+    return 2 * math.asin(min(chord / 2, 1.0)) * EARTH_RADIUS_KM
+
+def km_to_chord(km: float) -> float:
+    """Straight-line distance between unit vectors for a great-circle distance"""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+class SphericalIndex:
+    """
+    k-d tree over latitude/longitude points mapped to 3-D unit vectors
+
+    On the unit sphere the straight-line (chord) distance grows strictly
+    with the great-circle distance, so ordinary Euclidean k-d tree pruning
+    gives exact spherical nearest neighbours. This works the same way at
+    the poles and across the antimeridian, with no special cases.
+    Distances are on a sphere of EARTH_RADIUS_KM. They differ from
+    ellipsoidal (geodesic) distances by less than 0.6%, so callers that need
+    geodesic precision refine the few candidates they get back.
+
+    Points with missing or invalid coordinates are left out. Query results
+    refer to points by their position in the input sequence.
+    """
+
+    LEAF_SIZE = 16
+
+    def __init__(self, coordinates: Sequence[Tuple[float, float]]):
+        self._vectors: List[Vector] = []
+        self._positions: List[int] = []
+        for position, (lat, lon) in enumerate(coordinates):
+            try:
+                lat, lon = float(lat), float(lon)
+            except (TypeError, ValueError):
+                continue
+            if math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90:
+                self._vectors.append(to_unit_vector(lat, lon))
+                self._positions.append(position)
+
+        self._root = self._build(list(range(len(self._vectors)))) if self._vectors else None
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[float, int]]:
+        """
+        The k points closest to a location
+
+        Returns:
+            (great-circle km, input position) pairs, closest first
+        """
+        if self._root is None or k < 1:
+            return []
+        query = to_unit_vector(lat, lon)
+        best: List[Tuple[float, int]] = []  # Max-heap of (-squared chord, point) holding the k closest so far
+        self._search_nearest(self._root, query, k, best)
+        return sorted((chord_to_km(math.sqrt(-neg)), self._positions[i]) for neg, i in best)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, int]]:
+        """
+        All points within a great-circle radius of a location
+
+        Returns:
+            (great-circle km, input position) pairs, closest first
+        """
+        if self._root is None or radius_km < 0:
+            return []
+        query = to_unit_vector(lat, lon)
+        limit = km_to_chord(radius_km) ** 2
+        found: List[Tuple[float, int]] = []
+        self._search_within(self._root, query, limit, found)
+        return sorted((chord_to_km(math.sqrt(d2)), self._positions[i]) for d2, i in found)
+
+    # ------------------------------------------------------------------
+    # Tree construction and search
+    # ------------------------------------------------------------------
+
+    def _build(self, points: List[int]) -> tuple:
+        """Leaf: (None, points). Inner node: (axis, split, left, right), split on the widest axis"""
+        if len(points) <= self.LEAF_SIZE:
+            return (None, points)
+
+        vectors = self._vectors
+        spreads = [
+            max(vectors[i][axis] for i in points) - min(vectors[i][axis] for i in points)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        points.sort(key=lambda i: vectors[i][axis])
+        middle = len(points) // 2
+        split = vectors[points[middle]][axis]
+        return (axis, split, self._build(points[:middle]), self._build(points[middle:]))
+
+    def _search_nearest(self, node: tuple, query: Vector, k: int, best: List[Tuple[float, int]]) -> None:
+        if node[0] is None:
+            vectors = self._vectors
+            for i in node[1]:
+                v = vectors[i]
+                d2 = (v[0] - query[0]) ** 2 + (v[1] - query[1]) ** 2 + (v[2] - query[2]) ** 2
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, i))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, i))
+            return
+
+        axis, split, left, right = node
+        offset = query[axis] - split
+        near, far = (left, right) if offset < 0 else (right, left)
+        self._search_nearest(near, query, k, best)
+        if len(best) < k or offset * offset < -best[0][0]:
+            self._search_nearest(far, query, k, best)
+
+    def _search_within(self, node: tuple, query: Vector, limit: float, found: List[Tuple[float, int]]) -> None:
+        if node[0] is None:
+            vectors = self._vectors
+            for i in node[1]:
+                v = vectors[i]
+                d2 = (v[0] - query[0]) ** 2 + (v[1] - query[1]) ** 2 + (v[2] - query[2]) ** 2
+                if d2 <= limit:
+                    found.append((d2, i))
+            return
+
+        axis, split, left, right = node
+        offset = query[axis] - split
+        if offset < 0 or offset * offset <= limit:
+            self._search_within(left, query, limit, found)
+        if offset >= 0 or offset * offset <= limit:
+            self._search_within(right, query, limit, found)
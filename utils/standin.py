@@ -0,0 +1,342 @@
+# utils/standin.py - Record/Replay Stand-in for Upstream APIs (Apify, Reddit, Nominatim)
+"""
+Local HTTP server that answers in place of the external APIs, for offline and
+deterministic load and latency benchmarks.
+
+Each upstream is mounted under its own path prefix:
+
+    /apify/...      → https://api.apify.com
+    /reddit/...     → https://www.reddit.com
+    /nominatim/...  → https://nominatim.openstreetmap.org
+
+In replay mode, responses come from recorded cassettes (one JSON file per
+request). Latency, error rate and payload size can be shaped per upstream. In
+record mode, requests are forwarded to the real APIs and every response is
+saved as a cassette.
+
+Usage:
+    python -m utils.standin --mode record --cassettes cassettes --port 8900
+    python -m utils.standin --cassettes cassettes --port 8900 \\
+        --profile apify:latency=2.0,latency_jitter=0.5,error_rate=0.05 \\
+        --profile nominatim:latency=0.3
+
+Point the application at it (environment or .env):
+    APIFY_API_URL=http://127.0.0.1:8900/apify/v2
+    REDDIT_BASE_URL=http://127.0.0.1:8900/reddit
+    NOMINATIM_BASE_URL=http://127.0.0.1:8900/nominatim
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+UPSTREAMS = {
+    "apify": "https://api.apify.com",
+    "reddit": "https://www.reddit.com",
+    "nominatim": "https://nominatim.openstreetmap.org"
+}
+
+# Query parameters that carry credentials or vary per call and must not affect matching
+IGNORED_QUERY_PARAMS = {"token", "_"}
+
+# Request headers forwarded to the real API in record mode
+FORWARDED_HEADERS = {"authorization", "user-agent", "accept", "accept-language", "content-type"}
+
+@dataclass
+class UpstreamProfile:
+    """Shape of the replayed traffic for one upstream"""
+    latency: float = 0.0  # Seconds added to every response
+    latency_jitter: float = 0.0  # Uniform +/- jitter on the latency
+    error_rate: float = 0.0  # Fraction of requests answered with error_status
+    error_status: int = 503
+    payload_items: Optional[int] = None  # Resize JSON list bodies to this many items
+
+@dataclass
+class Cassette:
+    """One recorded request/response pair"""
+    upstream: str
+    method: str
+    path: str
+    query: str
+    body_digest: str
+    status: int
+    content_type: str
+    body: str
+
+class CassetteStore:
+    """
+    Directory of recorded cassettes, one JSON file per request
+
+    Lookups match on upstream, method, path, query and request body. A request
+    that was never recorded falls back to a recording of the same path (e.g.
+    a hotel search for another city), so replays also work for inputs that
+    were not recorded exactly.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._exact: Dict[str, Cassette] = {}
+        self._by_path: Dict[str, Cassette] = {}
+        self._load()
+
+    def find(self, upstream: str, method: str, path: str, query: str, body: bytes) -> Optional[Cassette]:
+        """Return the cassette for a request (exact match first, then same path)"""
+        cassette = self._exact.get(self._key(upstream, method, path, query, body_digest(body)))
+        if cassette is None:
+            cassette = self._by_path.get(self._path_key(upstream, method, path))
+        return cassette
+
+    def save(self, cassette: Cassette) -> str:
+        """Write a cassette to disk and index it"""
+        directory = os.path.join(self.directory, cassette.upstream)
+        os.makedirs(directory, exist_ok=True)
+
+        key = self._key(cassette.upstream, cassette.method, cassette.path, cassette.query, cassette.body_digest)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", cassette.path).strip("_")[:80]
+        filename = os.path.join(directory, f"{cassette.method.lower()}_{slug}_{hashlib.sha256(key.encode()).hexdigest()[:12]}.json")
+
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(asdict(cassette), f, ensure_ascii=False, indent=1)
+
+        self._index(cassette)
+        return filename
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def _load(self) -> None:
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in sorted(files):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(root, name), encoding="utf-8") as f:
+                        self._index(Cassette(**json.load(f)))
+                except (ValueError, TypeError) as e:
+                    logger.warning(f"Skipping unreadable cassette {name}: {e}")
+        logger.info(f"Loaded {len(self._exact)} cassettes from {self.directory}")
+
+    def _index(self, cassette: Cassette) -> None:
+        self._exact[self._key(cassette.upstream, cassette.method, cassette.path, cassette.query, cassette.body_digest)] = cassette
+        self._by_path.setdefault(self._path_key(cassette.upstream, cassette.method, cassette.path), cassette)
+
+    @staticmethod
+    def _key(upstream: str, method: str, path: str, query: str, digest: str) -> str:
+        return f"{upstream} {method} {path}?{query} {digest}"
+
+    @staticmethod
+    def _path_key(upstream: str, method: str, path: str) -> str:
+        return f"{upstream} {method} {path}"
+
+def normalize_query(params: List[Tuple[str, str]]) -> str:
+    """Sorted query string without credentials"""
+    kept = sorted((k, v) for k, v in params if k not in IGNORED_QUERY_PARAMS)
+    return "&".join(f"{k}={v}" for k, v in kept)
+
+def body_digest(body: bytes) -> str:
+    """Hash of a request body; JSON bodies are hashed in canonical form"""
+    if not body:
+        return ""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha256(body).hexdigest()
+
+class UpstreamStandin:
+    """Replays (or records) upstream traffic with configurable latency, errors and payload sizes"""
+
+    def __init__(
+        self,
+        store: CassetteStore,
+        mode: str = "replay",
+        profiles: Optional[Dict[str, UpstreamProfile]] = None,
+        seed: int = 0,
+        upstream_transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown stand-in mode: {mode}")
+        self.store = store
+        self.mode = mode
+        self.profiles = profiles or {}
+        self._random = random.Random(seed)  # Seeded: the same run injects the same errors
+        self._upstream_transport = upstream_transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.stats = {"requests": 0, "replayed": 0, "recorded": 0, "misses": 0, "injected_errors": 0}
+
+    async def handle(
+        self,
+        upstream: str,
+        method: str,
+        path: str,
+        params: List[Tuple[str, str]],
+        headers: Dict[str, str],
+        body: bytes
+    ) -> Tuple[int, str, bytes]:
+        """
+        Answer one request
+
+        Returns:
+            Tuple of (status code, content type, body)
+        """
+        self.stats["requests"] += 1
+        if upstream not in UPSTREAMS:
+            return 404, "application/json", json.dumps({"error": f"Unknown upstream '{upstream}'"}).encode()
+
+        if self.mode == "record":
+            return await self._record(upstream, method, path, params, headers, body)
+
+        profile = self.profiles.get(upstream, UpstreamProfile())
+        delay = max(0.0, profile.latency + self._random.uniform(-profile.latency_jitter, profile.latency_jitter))
+        if delay:
+            await asyncio.sleep(delay)
+
+        if profile.error_rate and self._random.random() < profile.error_rate:
+            self.stats["injected_errors"] += 1
+            return profile.error_status, "application/json", json.dumps({"error": "Injected by stand-in"}).encode()
+
+        cassette = self.store.find(upstream, method, path, normalize_query(params), body)
+        if cassette is None:
+            self.stats["misses"] += 1
+            logger.warning(f"No cassette for {upstream} {method} /{path}")
+            return 404, "application/json", json.dumps({"error": f"No cassette for {method} /{path}"}).encode()
+
+        self.stats["replayed"] += 1
+        content = cassette.body.encode("utf-8")
+        if profile.payload_items is not None:
+            content = resize_payload(content, profile.payload_items)
+        return cassette.status, cassette.content_type, content
+
+    async def _record(
+        self,
+        upstream: str,
+        method: str,
+        path: str,
+        params: List[Tuple[str, str]],
+        headers: Dict[str, str],
+        body: bytes
+    ) -> Tuple[int, str, bytes]:
+        """Forward a request to the real API and save the response as a cassette"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=300.0, transport=self._upstream_transport)
+
+        response = await self._client.request(
+            method,
+            f"{UPSTREAMS[upstream]}/{path}",
+            params=params,
+            headers={k: v for k, v in headers.items() if k.lower() in FORWARDED_HEADERS},
+            content=body or None
+        )
+        content_type = response.headers.get("content-type", "application/json")
+
+        filename = self.store.save(Cassette(
+            upstream=upstream,
+            method=method,
+            path=path,
+            query=normalize_query(params),
+            body_digest=body_digest(body),
+            status=response.status_code,
+            content_type=content_type,
+            body=response.text
+        ))
+        self.stats["recorded"] += 1
+        logger.info(f"Recorded {upstream} {method} /{path} ({response.status_code}) → {filename}")
+        return response.status_code, content_type, response.content
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def create_app(self):
+        """ASGI app serving all upstreams (run with uvicorn or mount via httpx.ASGITransport)"""
+        from contextlib import asynccontextmanager
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse, Response
+        from starlette.routing import Route
+
+        @asynccontextmanager
+        async def lifespan(app):
+            yield
+            await self.close()
+
+        async def stats(request):
+            return JSONResponse({"mode": self.mode, "cassettes": len(self.store), **self.stats})
+
+        async def proxy(request):
+            status, content_type, content = await self.handle(
+                request.path_params["upstream"],
+                request.method,
+                request.path_params["path"],
+                list(request.query_params.multi_items()),
+                dict(request.headers),
+                await request.body()
+            )
+            return Response(content, status_code=status, media_type=content_type)
+
+        return Starlette(
+            routes=[
+                Route("/_standin/stats", stats),
+                Route("/{upstream}/{path:path}", proxy, methods=["GET", "POST"])
+            ],
+            lifespan=lifespan
+        )
+
+def resize_payload(content: bytes, items: int) -> bytes:
+    """Repeat or truncate the items of a JSON list body (other bodies are returned unchanged)"""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return content
+    if not isinstance(data, list) or not data:
+        return content
+    resized = [data[i % len(data)] for i in range(items)]
+    return json.dumps(resized, ensure_ascii=False).encode("utf-8")
+
+def parse_profile(spec: str) -> Tuple[str, UpstreamProfile]:
+    """Parse 'upstream:key=value,key=value' (e.g. 'apify:latency=2.0,error_rate=0.1')"""
+    upstream, _, options = spec.partition(":")
+    profile = UpstreamProfile()
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if not hasattr(profile, key):
+            raise ValueError(f"Unknown profile option: {key}")
+        setattr(profile, key, int(value) if key in ("error_status", "payload_items") else float(value))
+    return upstream, profile
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay stand-in for Apify, Reddit and Nominatim")
+    parser.add_argument("--mode", choices=["replay", "record"], default="replay")
+    parser.add_argument("--cassettes", default="cassettes", help="Cassette directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and error injection")
+    parser.add_argument("--profile", action="append", default=[], help="upstream:latency=..,error_rate=..,payload_items=..")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    standin = UpstreamStandin(
+        CassetteStore(args.cassettes),
+        mode=args.mode,
+        profiles=dict(parse_profile(spec) for spec in args.profile),
+        seed=args.seed
+    )
+
+    import uvicorn
+    uvicorn.run(standin.create_app(), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()